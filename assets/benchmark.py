@@ -0,0 +1,265 @@
+"""
+Benchmarks for the util primitives and the full model builds.
+
+Each benchmark runs at several sizes. Results are written as JSON and can
+be compared against an earlier run; any benchmark whose median time grows
+by more than the threshold is reported as a regression and the script
+exits non-zero.
+
+Usage:
+    python3 benchmark.py [--quick] [--filter NAME] [--output benchmark.json]
+                         [--baseline benchmark_baseline.json] [--threshold 0.2]
+
+Caches (text meshes, honeycombs, imported assets) are redirected to a
+temporary folder. Functions that cache are timed cold; model builds are
+timed after a warm-up run, the way they behave in the watch daemon.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import runpy
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+
+import util
+import profiler
+
+benchmarks = {}
+
+
+def benchmark(name, params):
+    """
+    Register a benchmark.
+
+    The decorated function takes one size parameter and returns a callable
+    that performs the timed work; everything before the return is setup.
+    """
+    def register(func):
+        benchmarks[name] = (params, func)
+        return func
+    return register
+
+
+def clear_cache():
+    shutil.rmtree(util.cache_dir, ignore_errors=True)
+    util._glyph_meshes.clear()
+
+
+@benchmark("generate_uv_coordinates", [2, 4, 6])
+def bench_uv(subdivisions):
+    import trimesh
+    mesh = trimesh.creation.icosphere(subdivisions=subdivisions)
+    return lambda: util.generate_uv_coordinates(mesh)
+
+
+@benchmark("create_rect_with_hole", [1, 10, 100])
+def bench_rect_with_hole(panels):
+    def run():
+        for i in range(panels):
+            util.create_rect_with_hole(1100 + i, 1400, 50, 50, 50, 50)
+    return run
+
+
+@benchmark("create_panel", [1, 8, 32])
+def bench_panel(cutouts):
+    # A control panel with a row of round buttons and square displays
+    holes = [("circle" if i % 2 else "rect", -1000 + i * 60, 0) + ((20,) if i % 2 else (30, 30))
+             for i in range(cutouts)]
+
+    def run():
+        util._panels.clear()
+        util.create_panel(2200, 400, cutouts=holes)
+    return run
+
+
+@benchmark("create_text_mesh_custom_font", [4, 16, 32])
+def bench_text(length):
+    text = ("Code Collective " * 4)[:length]
+
+    def run():
+        clear_cache()
+        util.create_text_mesh_custom_font(text, font_size=20)
+    return run
+
+
+@benchmark("text_from_cached_glyphs", [4, 16, 32])
+def bench_text_cached_glyphs(length):
+    # A new label whose glyphs have all been extruded before
+    util.create_text_mesh_custom_font("Code Collective", font_size=20)
+    text = ("Collective Code " * 4)[:length]
+    return lambda: util.create_text_mesh_custom_font(text, font_size=20)
+
+
+@benchmark("generateHoneycomb", [300, 600, 1200])
+def bench_honeycomb(size):
+    machine = SimpleNamespace(x=size, y=size, z=size)
+
+    def run():
+        clear_cache()
+        util.generateHoneycomb(machine)
+    return run
+
+
+@benchmark("hollow_cylinder", [32, 240, 2048])
+def bench_hollow_cylinder(sections):
+    return lambda: util.hollow_cylinder(280, 270, 168, sections=sections)
+
+
+@benchmark("lathe", [32, 240, 2048])
+def bench_lathe(sections):
+    # A crucible: outer wall up, over the rim, inner wall down, closed ring
+    profile = [[280, 0], [280, 400], [270, 400], [270, 10], [0, 10], [0, 0], [280, 0]]
+    return lambda: util.lathe(profile, sections=sections)
+
+
+@benchmark("sweep_many", [1, 10, 100])
+def bench_sweep(cables):
+    path = np.array([[0, 0, 0], [0, 0, 500], [0, -200, 800], [0, -700, 850]])
+    paths = [path + [i * 20, 0, 0] for i in range(cables)]
+    return lambda: util.sweep_many(paths, 8)
+
+
+@benchmark("cylinder_between", [8, 240, 2048])
+def bench_cylinder_between(sections):
+    return lambda: util.cylinder_between([0, 0, 0], [220, 0, 210], 100, sections=sections)
+
+
+@benchmark("texturegen.render", [128, 512, 2048])
+def bench_texture(size):
+    import texturegen
+    recipe = dict(texturegen.TEXTURES["steel.jpg"], size=(size, size))
+    return lambda: texturegen.mip_chain(texturegen.render("steel.jpg", recipe))
+
+
+@benchmark("wafermap.render_tile", [64, 256, 1024])
+def bench_wafer_tile(tile):
+    import wafermap
+    spec = wafermap.layout(16384, tile)
+    center = 16384 // tile // 2
+    return lambda: wafermap.encode(wafermap.render_tile(spec, center, center))
+
+
+@benchmark("fabsim.simulate", [100, 1000, 10000])
+def bench_fabsim(hours):
+    import fabsim
+    return lambda: fabsim.simulate(fabsim.DEFAULT_LINE, 40, hours * 60)
+
+
+def model_build(script):
+    """Run a model script from a scratch folder so the real GLBs are untouched."""
+    workdir = tempfile.mkdtemp()
+    shutil.copy(os.path.join(here, script), workdir)
+    path = os.path.join(workdir, script)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            runpy.run_path(path, run_name="__main__")
+    return run
+
+
+@benchmark("lasercutter.py", ["build"])
+def bench_lasercutter(_):
+    return model_build("lasercutter.py")
+
+
+@benchmark("dirtbike.py", ["build"])
+def bench_dirtbike(_):
+    return model_build("dirtbike.py")
+
+
+def run_benchmarks(repeats, name_filter=None):
+    results = {}
+    for name, (params, setup) in benchmarks.items():
+        if name_filter and name_filter not in name:
+            continue
+        for param in params:
+            run = setup(param)
+            run()  # warm-up: imports, first-touch caches
+            times, export_times = [], []
+            for _ in range(repeats):
+                profiler.events.clear()
+                start = time.perf_counter()
+                run()
+                times.append(time.perf_counter() - start)
+                export_times += [e["dur"] / 1e6 for e in profiler.events
+                                 if e["name"] == "export_scene"]
+
+            key = f"{name}[{param}]"
+            results[key] = {
+                "median_s": statistics.median(times),
+                "min_s": min(times),
+                "mean_s": statistics.fmean(times),
+                "repeats": repeats,
+            }
+            if export_times:
+                results[key]["export_median_s"] = statistics.median(export_times)
+            print(f"{key:<40}{results[key]['median_s'] * 1000:>10.2f} ms")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the change against a baseline and return the regressed keys."""
+    regressions = []
+    print(f"\n{'benchmark':<40}{'baseline ms':>12}{'now ms':>10}{'change':>9}")
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]["median_s"]
+        after = result["median_s"]
+        change = after / before - 1 if before > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key:<40}{before * 1000:>12.2f}{after * 1000:>10.2f}{change:>+9.0%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quick", action="store_true", help="one timed repeat per benchmark")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--output", default=os.path.join(here, "benchmark.json"))
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown as a fraction of the baseline median")
+    args = parser.parse_args()
+
+    # Keep caches and published copies out of the real tree
+    util.cache_dir = tempfile.mkdtemp()
+    util.publish_dirs = []
+    os.chdir(here)
+
+    results = run_benchmarks(1 if args.quick else args.repeats, args.filter)
+    with open(args.output, "w") as f:
+        json.dump({
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
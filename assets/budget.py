@@ -0,0 +1,291 @@
+"""
+Render budget checks for exported GLBs.
+
+Every model ships to phones and XR headsets, so each one declares a
+budget in util.BUDGETS. A GLB is measured straight from its glTF JSON and
+binary chunk:
+
+    draw_calls    mesh primitives drawn, counting every node instance
+                  (collision proxy meshes are not drawn and not counted)
+    triangles     indexed triangles drawn, counting every node instance
+    texture_vram  decoded RGBA8 bytes of every image including its mip chain
+    glb_bytes     size of the file that has to be downloaded
+
+export_scene checks the budget before writing; a model whose budget has
+"mode": "fail" raises instead of being published, "warn" only prints.
+
+Usage:
+    python3 budget.py [model.glb ...] [--nodes N]
+
+With no arguments every model in util.MODELS is checked. The per-node
+table shows the top N nodes by the bytes they pull into the file.
+"""
+import io
+import json
+import os
+import struct
+import sys
+
+GLB_MAGIC = 0x46546C67
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+METRICS = ("draw_calls", "triangles", "texture_vram", "glb_bytes")
+
+# glTF primitive modes that draw triangles
+TRIANGLES, TRIANGLE_STRIP, TRIANGLE_FAN = 4, 5, 6
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+def parse_glb(data):
+    """
+    Split a GLB into its JSON document and binary chunk.
+
+    Returns:
+    (dict, bytes): The glTF JSON and the BIN chunk (empty if there is none).
+    """
+    magic, version, length = struct.unpack_from("<III", data, 0)
+    if magic != GLB_MAGIC:
+        raise ValueError("not a GLB file")
+    gltf, binary = None, b""
+    offset = 12
+    while offset < length:
+        chunk_length, chunk_type = struct.unpack_from("<II", data, offset)
+        chunk = data[offset + 8:offset + 8 + chunk_length]
+        if chunk_type == CHUNK_JSON:
+            gltf = json.loads(chunk)
+        elif chunk_type == CHUNK_BIN:
+            binary = chunk
+        offset += 8 + chunk_length
+    return gltf, binary
+
+
+def mip_chain_bytes(width, height, bytes_per_pixel=4):
+    """Bytes of a full mip chain down to 1x1."""
+    total = 0
+    while True:
+        total += width * height * bytes_per_pixel
+        if width == 1 and height == 1:
+            return total
+        width, height = max(1, width // 2), max(1, height // 2)
+
+
+def image_size(gltf, binary, image):
+    """Return (width, height) of an embedded image, or None if it can't be read."""
+    from PIL import Image
+    if "bufferView" not in image:
+        return None
+    view = gltf["bufferViews"][image["bufferView"]]
+    start = view.get("byteOffset", 0)
+    with Image.open(io.BytesIO(binary[start:start + view["byteLength"]])) as img:
+        return img.size
+
+
+def primitive_triangles(gltf, primitive):
+    mode = primitive.get("mode", TRIANGLES)
+    if "indices" in primitive:
+        count = gltf["accessors"][primitive["indices"]]["count"]
+    else:
+        count = gltf["accessors"][primitive["attributes"]["POSITION"]]["count"]
+    if mode == TRIANGLES:
+        return count // 3
+    if mode in (TRIANGLE_STRIP, TRIANGLE_FAN):
+        return max(0, count - 2)
+    return 0
+
+
+def mesh_buffer_views(gltf, mesh):
+    """Indices of the buffer views holding a mesh's vertex and index data."""
+    views = set()
+    for primitive in mesh["primitives"]:
+        accessors = list(primitive["attributes"].values())
+        if "indices" in primitive:
+            accessors.append(primitive["indices"])
+        for target in primitive.get("targets", []):
+            accessors += list(target.values())
+        for accessor in accessors:
+            if "bufferView" in gltf["accessors"][accessor]:
+                views.add(gltf["accessors"][accessor]["bufferView"])
+    return views
+
+
+def material_images(gltf, material_index):
+    """Indices of the images a material samples."""
+    if material_index is None:
+        return set()
+    material = gltf["materials"][material_index]
+    pbr = material.get("pbrMetallicRoughness", {})
+    infos = [pbr.get("baseColorTexture"), pbr.get("metallicRoughnessTexture"),
+             material.get("normalTexture"), material.get("occlusionTexture"),
+             material.get("emissiveTexture")]
+    textures = [gltf["textures"][info["index"]] for info in infos if info]
+    return {texture["source"] for texture in textures if "source" in texture}
+
+
+def node_references(gltf):
+    """Count how often each node is reached from the scenes' root nodes."""
+    references = {}
+
+    def walk(index):
+        references[index] = references.get(index, 0) + 1
+        for child in gltf["nodes"][index].get("children", []):
+            walk(child)
+
+    for scene in gltf.get("scenes", []):
+        for root in scene.get("nodes", []):
+            walk(root)
+    return references
+
+
+def analyse_glb(data):
+    """
+    Measure a GLB against the budget metrics.
+
+    Parameters:
+    data (bytes): GLB file contents.
+
+    Returns:
+    dict: Totals for draw_calls, triangles, texture_vram and glb_bytes, and
+    "nodes", a list of per-node dicts (name, instances, draw_calls,
+    triangles, bytes) sorted by bytes. A node's bytes are its mesh data
+    plus its material's images; data shared by several nodes is charged to
+    the first one only, so the column sums to the file's payload.
+    """
+    gltf, binary = parse_glb(data)
+    views = gltf.get("bufferViews", [])
+    images = gltf.get("images", [])
+    references = node_references(gltf)
+
+    texture_vram = 0
+    for image in images:
+        size = image_size(gltf, binary, image)
+        if size:
+            texture_vram += mip_chain_bytes(*size)
+
+    charged = set()
+    nodes = []
+    for index, node in enumerate(gltf.get("nodes", [])):
+        if "mesh" not in node:
+            continue
+        mesh = gltf["meshes"][node["mesh"]]
+        node_views = mesh_buffer_views(gltf, mesh)
+        for primitive in mesh["primitives"]:
+            for image in material_images(gltf, primitive.get("material")):
+                if "bufferView" in images[image]:
+                    node_views.add(images[image]["bufferView"])
+        new_views = node_views - charged
+        charged |= new_views
+
+        # A node reached through several parents is drawn once per path.
+        # Collision proxies (see util.add_collider) are never drawn.
+        instances = references.get(index, 0)
+        drawn = 0 if "collider" in node.get("extras", {}) else instances
+        nodes.append({
+            "name": node.get("name", f"node_{index}"),
+            "instances": instances,
+            "draw_calls": len(mesh["primitives"]) * drawn,
+            "triangles": sum(primitive_triangles(gltf, p) for p in mesh["primitives"]) * drawn,
+            "bytes": sum(views[v]["byteLength"] for v in new_views),
+        })
+
+    nodes.sort(key=lambda n: -n["bytes"])
+    return {
+        "draw_calls": sum(n["draw_calls"] for n in nodes),
+        "triangles": sum(n["triangles"] for n in nodes),
+        "texture_vram": texture_vram,
+        "glb_bytes": len(data),
+        "nodes": nodes,
+    }
+
+
+def over_budget(stats, budget):
+    """Return "metric: value > limit" strings for every limit stats exceeds."""
+    return [
+        f"{metric}: {stats[metric]:,} > {budget[metric]:,}"
+        for metric in METRICS
+        if metric in budget and stats[metric] > budget[metric]
+    ]
+
+
+def check_budget(name, data, budget=None):
+    """
+    Compare a GLB against its budget.
+
+    Parameters:
+    name (str): GLB filename, used to look up util.BUDGETS.
+    data (bytes): GLB file contents.
+    budget (dict): Overrides the declared budget.
+
+    Returns:
+    (dict, list): The analysis and a list of "metric: value > limit" strings.
+
+    Raises:
+    BudgetExceeded: if a limit is exceeded and the budget's mode is "fail".
+    """
+    if budget is None:
+        from util import BUDGETS
+        budget = BUDGETS.get(name)
+    stats = analyse_glb(data)
+    if not budget:
+        return stats, []
+
+    over = over_budget(stats, budget)
+    if over:
+        message = f"{name} is over budget: " + "; ".join(over)
+        if budget.get("mode", "warn") == "fail":
+            raise BudgetExceeded(message)
+        print(f"WARNING: {message}")
+    return stats, over
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def print_report(name, stats, budget, top_n=10):
+    print(f"\n{name}")
+    print(f"  {'metric':<14}{'value':>14}{'budget':>14}")
+    for metric in METRICS:
+        limit = budget.get(metric) if budget else None
+        flag = "  OVER" if limit is not None and stats[metric] > limit else ""
+        value = stats[metric]
+        if metric in ("texture_vram", "glb_bytes"):
+            shown = format_bytes(value), format_bytes(limit) if limit is not None else "-"
+        else:
+            shown = f"{value:,}", f"{limit:,}" if limit is not None else "-"
+        print(f"  {metric:<14}{shown[0]:>14}{shown[1]:>14}{flag}")
+
+    print(f"  {'node':<32}{'inst':>6}{'draws':>7}{'tris':>9}{'bytes':>12}")
+    for node in stats["nodes"][:top_n]:
+        print(f"  {node['name'][:31]:<32}{node['instances']:>6}{node['draw_calls']:>7}"
+              f"{node['triangles']:>9}{format_bytes(node['bytes']):>12}")
+
+
+if __name__ == "__main__":
+    import argparse
+    from util import MODELS, BUDGETS, here
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("glbs", nargs="*")
+    parser.add_argument("--nodes", type=int, default=10, help="rows in the per-node table")
+    args = parser.parse_args()
+
+    failed = False
+    for glb in args.glbs or list(MODELS.values()):
+        path = glb if os.path.exists(glb) else os.path.join(here, glb)
+        name = os.path.basename(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        budget = BUDGETS.get(name)
+        stats = analyse_glb(data)
+        print_report(name, stats, budget, args.nodes)
+        if budget and budget.get("mode", "warn") == "fail" and over_budget(stats, budget):
+            failed = True
+    sys.exit(1 if failed else 0)
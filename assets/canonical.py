@@ -0,0 +1,311 @@
+"""
+Rewrite a GLB into a canonical form, so the same model always gives the same bytes.
+
+trimesh's GLB reflects how a scene was built: nodes, meshes, materials
+and buffer views come out in insertion order, transforms carry float noise
+from the rotations that produced them (6.1e-17 where a 0 was meant), and
+every texture is re-encoded through PIL, JPEGs at PIL's default quality.
+Builds that should be identical can then differ, and every byte of
+difference is a new asset to the viewer, the browser and the CDN.
+
+canonical_glb rewrites the document so that
+- sibling nodes are sorted by name, and nodes, meshes, cameras, skins,
+  materials, textures, images, accessors and buffer views are numbered
+  in the order a walk of the scene first reaches them; anything
+  unreachable is dropped, and identical materials are merged,
+- node transforms are rounded to TRANSFORM_DECIMALS and -0.0 becomes 0.0,
+- images that came from a file are embedded as the file's own bytes
+  instead of the re-encoded copy. util.scene_glb exports each mesh with
+  the source keys of its textures in its extras ("texture_sources", by
+  texture name, see util.image_source); they are removed here,
+- the binary chunk is repacked in that order, 4-byte aligned, and the
+  JSON is written with sorted keys and no whitespace.
+
+export_scene applies it to every model unless REPRODUCIBLE=0 is set
+(see util.reproducible_export), before the budget check and before the
+split .gltf, so both see the canonical bytes.
+
+Usage:
+    python3 canonical.py model.glb [...]
+
+rewrites existing GLBs in place and prints their SHA-256.
+"""
+import hashlib
+import io
+import json
+import struct
+import sys
+
+from budget import CHUNK_BIN, CHUNK_JSON, GLB_MAGIC, parse_glb
+
+# Decimal places kept in node matrices, translations, rotations and scales.
+# Model units are mm, so this is far below anything visible and far above
+# the noise of float64 trigonometry.
+TRANSFORM_DECIMALS = 9
+
+TRANSFORM_KEYS = ("matrix", "translation", "rotation", "scale")
+
+# How trimesh embeds a PIL image: JPEGs as JPEG, everything else as PNG
+# (trimesh.exchange.gltf._append_image)
+MIME_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+
+def snap(values):
+    return [round(v, TRANSFORM_DECIMALS) + 0.0 for v in values]
+
+
+def texture_infos(value):
+    """Yield (name, textureInfo) for every texture in a material by name, extensions included."""
+    if isinstance(value, dict):
+        for key, item in sorted(value.items()):
+            if key.endswith("Texture") and isinstance(item, dict) and "index" in item:
+                yield key, item
+            yield from texture_infos(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from texture_infos(item)
+
+
+def source_mime_type(data):
+    """The MIME type of encoded image bytes, or None if a GLB can't embed them."""
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        return MIME_TYPES.get(img.format)
+
+
+def canonical_glb(data, sources=None):
+    """
+    Rewrite GLB bytes into their canonical form.
+
+    Parameters:
+    data (bytes): The GLB, as trimesh exported it.
+    sources (dict): File bytes by the source keys in the meshes'
+                    "texture_sources" extras (see util.image_source).
+
+    Returns:
+    bytes: The canonical GLB.
+    """
+    gltf, binary = parse_glb(data)
+    sources = {} if sources is None else sources
+    views = gltf.get("bufferViews", [])
+
+    def view_bytes(index):
+        view = views[index]
+        start = view.get("byteOffset", 0)
+        return binary[start:start + view["byteLength"]]
+
+    # Each list gets its items in first-use order; index maps old to new
+    order = {kind: [] for kind in ("nodes", "meshes", "cameras", "skins", "materials", "textures",
+                                   "samplers", "images", "accessors", "bufferViews")}
+    index = {kind: {} for kind in order}
+
+    def use(kind, old):
+        if old not in index[kind]:
+            index[kind][old] = len(order[kind])
+            order[kind].append(old)
+        return index[kind][old]
+
+    # Identical materials share one index
+    material_keys = {}
+
+    def use_material(old):
+        key = json.dumps(gltf["materials"][old], sort_keys=True)
+        if key not in material_keys:
+            material_keys[key] = old
+            use("materials", old)
+        index["materials"][old] = index["materials"][material_keys[key]]
+        return index["materials"][old]
+
+    def use_accessor(old):
+        new = use("accessors", old)
+        accessor = gltf["accessors"][old]
+        if "bufferView" in accessor:
+            use("bufferViews", accessor["bufferView"])
+        sparse = accessor.get("sparse")
+        if sparse:
+            use("bufferViews", sparse["indices"]["bufferView"])
+            use("bufferViews", sparse["values"]["bufferView"])
+        return new
+
+    def name_key(node_index):
+        return gltf["nodes"][node_index].get("name", ""), node_index
+
+    # Source key of each image, from the extras of the first mesh using it
+    image_sources = {}
+
+    def walk(node_index):
+        use("nodes", node_index)
+        node = gltf["nodes"][node_index]
+        if "camera" in node:
+            use("cameras", node["camera"])
+        if "skin" in node:
+            use("skins", node["skin"])
+        if "mesh" in node and node["mesh"] not in index["meshes"]:
+            use("meshes", node["mesh"])
+            mesh = gltf["meshes"][node["mesh"]]
+            mesh_sources = mesh.get("extras", {}).get("texture_sources", {})
+            for primitive in mesh["primitives"]:
+                for name in sorted(primitive["attributes"]):
+                    use_accessor(primitive["attributes"][name])
+                if "indices" in primitive:
+                    use_accessor(primitive["indices"])
+                for target in primitive.get("targets", []):
+                    for name in sorted(target):
+                        use_accessor(target[name])
+                if "material" in primitive:
+                    material = primitive["material"]
+                    if material not in index["materials"]:
+                        use_material(material)
+                        for name, info in texture_infos(gltf["materials"][material]):
+                            texture = gltf["textures"][info["index"]]
+                            use("textures", info["index"])
+                            if "sampler" in texture:
+                                use("samplers", texture["sampler"])
+                            if "source" in texture:
+                                image = gltf["images"][texture["source"]]
+                                use("images", texture["source"])
+                                if name in mesh_sources:
+                                    image_sources.setdefault(texture["source"], mesh_sources[name])
+                                if "bufferView" in image:
+                                    use("bufferViews", image["bufferView"])
+        for child in sorted(node.get("children", []), key=name_key):
+            walk(child)
+
+    scenes = gltf.get("scenes", [])
+    for scene in scenes:
+        for root in sorted(scene.get("nodes", []), key=name_key):
+            walk(root)
+
+    # Skins can grow while this runs, when a joint is only reached through one
+    for old in order["skins"]:
+        skin = gltf["skins"][old]
+        for joint in skin.get("joints", []) + [skin.get("skeleton")]:
+            if joint is not None and joint not in index["nodes"]:
+                walk(joint)
+        if "inverseBindMatrices" in skin:
+            use_accessor(skin["inverseBindMatrices"])
+
+    # Repack the binary chunk in first-use order, swapping in source images
+    image_data = {}
+    for old in order["images"]:
+        image = gltf["images"][old]
+        source = sources.get(image_sources.get(old))
+        if "bufferView" in image and source is not None:
+            mime = source_mime_type(source)
+            if mime:
+                image_data[image["bufferView"]], image["mimeType"] = source, mime
+    blob = bytearray()
+    new_views = []
+    for old in order["bufferViews"]:
+        blob += b"\0" * (-len(blob) % 4)
+        content = image_data.get(old) or view_bytes(old)
+        view = dict(views[old], buffer=0, byteOffset=len(blob), byteLength=len(content))
+        blob += content
+        new_views.append(view)
+    blob += b"\0" * (-len(blob) % 4)
+
+    # Renumber every reference
+    nodes = []
+    for old in order["nodes"]:
+        node = dict(gltf["nodes"][old])
+        for kind, key in (("meshes", "mesh"), ("cameras", "camera"), ("skins", "skin")):
+            if key in node:
+                node[key] = index[kind][node[key]]
+        if "children" in node:
+            node["children"] = [index["nodes"][c] for c in sorted(node["children"], key=name_key)]
+        for key in TRANSFORM_KEYS:
+            if key in node:
+                node[key] = snap(node[key])
+        nodes.append(node)
+
+    meshes = []
+    for old in order["meshes"]:
+        mesh = gltf["meshes"][old]
+        extras = mesh.get("extras")
+        if isinstance(extras, dict):
+            extras.pop("texture_sources", None)
+            if not extras:
+                del mesh["extras"]
+        for primitive in mesh["primitives"]:
+            primitive["attributes"] = {k: index["accessors"][v] for k, v in primitive["attributes"].items()}
+            if "indices" in primitive:
+                primitive["indices"] = index["accessors"][primitive["indices"]]
+            if "targets" in primitive:
+                primitive["targets"] = [{k: index["accessors"][v] for k, v in t.items()}
+                                        for t in primitive["targets"]]
+            if "material" in primitive:
+                primitive["material"] = index["materials"][primitive["material"]]
+        meshes.append(mesh)
+
+    skins = []
+    for old in order["skins"]:
+        skin = gltf["skins"][old]
+        skin["joints"] = [index["nodes"][j] for j in skin.get("joints", [])]
+        if "skeleton" in skin:
+            skin["skeleton"] = index["nodes"][skin["skeleton"]]
+        if "inverseBindMatrices" in skin:
+            skin["inverseBindMatrices"] = index["accessors"][skin["inverseBindMatrices"]]
+        skins.append(skin)
+
+    materials = [gltf["materials"][old] for old in order["materials"]]
+    for material in materials:
+        for _, info in texture_infos(material):
+            info["index"] = index["textures"][info["index"]]
+
+    textures = []
+    for old in order["textures"]:
+        texture = gltf["textures"][old]
+        if "sampler" in texture:
+            texture["sampler"] = index["samplers"][texture["sampler"]]
+        if "source" in texture:
+            texture["source"] = index["images"][texture["source"]]
+        textures.append(texture)
+
+    images = []
+    for old in order["images"]:
+        image = gltf["images"][old]
+        if "bufferView" in image:
+            image["bufferView"] = index["bufferViews"][image["bufferView"]]
+        images.append(image)
+
+    accessors = []
+    for old in order["accessors"]:
+        accessor = gltf["accessors"][old]
+        if "bufferView" in accessor:
+            accessor["bufferView"] = index["bufferViews"][accessor["bufferView"]]
+        sparse = accessor.get("sparse")
+        if sparse:
+            for part in (sparse["indices"], sparse["values"]):
+                part["bufferView"] = index["bufferViews"][part["bufferView"]]
+        accessors.append(accessor)
+
+    for scene in scenes:
+        if "nodes" in scene:
+            scene["nodes"] = [index["nodes"][n] for n in sorted(scene["nodes"], key=name_key)]
+
+    gltf.update(nodes=nodes, meshes=meshes, skins=skins, materials=materials, textures=textures,
+                cameras=[gltf["cameras"][old] for old in order["cameras"]],
+                samplers=[gltf["samplers"][old] for old in order["samplers"]],
+                images=images, accessors=accessors, bufferViews=new_views,
+                buffers=[{"byteLength": len(blob)}])
+    for key in list(order) + ["buffers"]:
+        if not gltf[key]:
+            del gltf[key]
+
+    document = json.dumps(gltf, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    document += b" " * (-len(document) % 4)
+    chunks = struct.pack("<II", len(document), CHUNK_JSON) + document
+    if blob:
+        chunks += struct.pack("<II", len(blob), CHUNK_BIN) + bytes(blob)
+    return struct.pack("<III", GLB_MAGIC, 2, 12 + len(chunks)) + chunks
+
+
+if __name__ == "__main__":
+    from util import write_atomic
+
+    for path in sys.argv[1:]:
+        with open(path, "rb") as f:
+            data = canonical_glb(f.read())
+        write_atomic(path, data)
+        print(f"{hashlib.sha256(data).hexdigest()}  {path}")
@@ -0,0 +1,332 @@
+"""
+Image-based lighting precomputed from the skybox.
+
+The viewers used to hand the six skybox JPEGs to Babylon as a plain cube
+texture, which leaves the device to work out diffuse and glossy lighting
+for the PBR materials at runtime. This script does that work once, with
+NumPy, and writes:
+
+    skybox/environment.env   Babylon prefiltered environment: one cubemap
+                             whose mip chain is GGX-prefiltered per
+                             roughness, plus irradiance as a spherical
+                             polynomial. Load it with
+                             CubeTexture.CreateFromPrefilteredData.
+    skybox/environment.json  The same irradiance as 9 RGB spherical
+                             harmonics coefficients, for other clients.
+    skybox/brdf_lut.png      Split-sum GGX BRDF lookup table: R = scale,
+                             G = bias, x = N.V (left to right),
+                             y = roughness (top row smooth).
+
+The .env file is also published next to the models for the XR app.
+
+Usage:
+    python3 environment.py [--size 256] [--samples 64] [--force]
+
+Outputs newer than the skybox faces are left alone unless --force is given.
+"""
+import argparse
+import io
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+from util import here, publish_dirs, write_atomic
+
+skybox_dir = os.path.join(here, "skybox")
+FACES = ["px", "nx", "py", "ny", "pz", "nz"]
+
+# Babylon's cube face orientation: normal, then the world directions of
+# the image's +x (right) and +y (down) axes
+FACE_AXES = np.array([
+    [[1, 0, 0], [0, 0, -1], [0, -1, 0]],
+    [[-1, 0, 0], [0, 0, 1], [0, -1, 0]],
+    [[0, 1, 0], [1, 0, 0], [0, 0, 1]],
+    [[0, -1, 0], [1, 0, 0], [0, 0, -1]],
+    [[0, 0, 1], [1, 0, 0], [0, -1, 0]],
+    [[0, 0, -1], [-1, 0, 0], [0, -1, 0]],
+], dtype=float)
+
+ENV_MAGIC = bytes([0x86, 0x16, 0x87, 0x96, 0xF6, 0xD6, 0x96, 0x36])
+LOD_GENERATION_SCALE = 0.8
+
+# Babylon converts LDR images with a plain 2.2 gamma
+GAMMA = 2.2
+
+
+def load_faces(size):
+    """Load the six skybox faces as a (6, size, size, 3) linear float cube."""
+    faces = []
+    for face in FACES:
+        with Image.open(os.path.join(skybox_dir, f"skybox_{face}.jpg")) as img:
+            img = img.convert("RGB").resize((size, size), Image.LANCZOS)
+            faces.append(np.asarray(img, dtype=np.float64) / 255.0)
+    return np.stack(faces) ** GAMMA
+
+
+def face_directions(size):
+    """
+    Unit direction and solid angle of every texel centre.
+
+    Returns:
+    (np.ndarray, np.ndarray): (6, size, size, 3) directions and
+    (6, size, size) solid angles.
+    """
+    coords = (np.arange(size) + 0.5) / size * 2 - 1
+    u, v = np.meshgrid(coords, coords)
+    points = (FACE_AXES[:, None, None, 0] + u[None, ..., None] * FACE_AXES[:, None, None, 1]
+              + v[None, ..., None] * FACE_AXES[:, None, None, 2])
+    length = np.linalg.norm(points, axis=-1)
+    solid_angle = (2.0 / size) ** 2 / length ** 3
+    return points / length[..., None], np.broadcast_to(solid_angle, (6, size, size))
+
+
+def lookup(cube, directions):
+    """Nearest-texel lookup of (n, 3) directions in a (6, s, s, 3) cube."""
+    size = cube.shape[1]
+    dots = np.einsum("nd,fd->nf", directions, FACE_AXES[:, 0])
+    face = np.argmax(dots, axis=1)
+    points = directions / dots[np.arange(len(directions)), face][:, None]
+    u = np.einsum("nd,nd->n", points, FACE_AXES[face, 1])
+    v = np.einsum("nd,nd->n", points, FACE_AXES[face, 2])
+    x = np.clip(((u + 1) / 2 * size).astype(int), 0, size - 1)
+    y = np.clip(((v + 1) / 2 * size).astype(int), 0, size - 1)
+    return cube[face, y, x]
+
+
+def downsample(cube):
+    """Halve a cube's resolution with a 2x2 box filter."""
+    f, s = cube.shape[:2]
+    return cube.reshape(f, s // 2, 2, s // 2, 2, 3).mean(axis=(2, 4))
+
+
+def hammersley(count):
+    i = np.arange(count, dtype=np.uint32)
+    bits = i.copy()
+    bits = ((bits << 16) | (bits >> 16)) & 0xFFFFFFFF
+    bits = ((bits & 0x55555555) << 1) | ((bits & 0xAAAAAAAA) >> 1)
+    bits = ((bits & 0x33333333) << 2) | ((bits & 0xCCCCCCCC) >> 2)
+    bits = ((bits & 0x0F0F0F0F) << 4) | ((bits & 0xF0F0F0F0) >> 4)
+    bits = ((bits & 0x00FF00FF) << 8) | ((bits & 0xFF00FF00) >> 8)
+    return np.column_stack([(i + 0.5) / count, bits / 2.0 ** 32])
+
+
+def ggx_half_vectors(alpha, count):
+    """
+    GGX-distributed half vectors around +Z and their D(h) values.
+
+    Returns:
+    (np.ndarray, np.ndarray): (count, 3) half vectors and (count,) D values.
+    """
+    xi = hammersley(count)
+    a2 = alpha * alpha
+    phi = 2 * np.pi * xi[:, 0]
+    cos_theta = np.sqrt((1 - xi[:, 1]) / (1 + (a2 - 1) * xi[:, 1]))
+    sin_theta = np.sqrt(1 - cos_theta ** 2)
+    h = np.column_stack([sin_theta * np.cos(phi), sin_theta * np.sin(phi), cos_theta])
+    d = a2 / (np.pi * ((a2 - 1) * cos_theta ** 2 + 1) ** 2)
+    return h, d
+
+
+def tangent_frames(normals):
+    helper = np.where(np.abs(normals[:, 2:3]) < 0.999, [[0, 0, 1.0]], [[1.0, 0, 0]])
+    tangent = np.cross(helper, normals)
+    tangent /= np.linalg.norm(tangent, axis=1, keepdims=True)
+    return tangent, np.cross(normals, tangent)
+
+
+def prefilter(mips, size, alpha, samples):
+    """
+    GGX-prefilter the environment for one roughness, assuming N = V = R.
+
+    Each sample reads from the source mip whose texels cover about the
+    solid angle the sample stands for (filtered importance sampling),
+    which keeps the result smooth with few samples.
+
+    Returns:
+    np.ndarray: (6, size, size, 3) linear colours.
+    """
+    base = mips[0].shape[1]
+    texel_solid_angle = 4 * np.pi / (6 * base * base)
+    h, d = ggx_half_vectors(alpha, samples)
+    # With N = V, L = reflect(-V, H) and pdf(L) = D / 4
+    lod = 0.5 * np.log2(4 / (samples * d) / texel_solid_angle) + 1
+    level = np.clip(np.round(lod), 0, len(mips) - 1).astype(int)
+
+    directions, _ = face_directions(size)
+    result = np.zeros((6, size, size, 3))
+    for face in range(6):
+        normals = directions[face].reshape(-1, 3)
+        tangent, bitangent = tangent_frames(normals)
+        total = np.zeros((len(normals), 3))
+        weight = np.zeros(len(normals))
+        for k in range(samples):
+            world_h = h[k, 0] * tangent + h[k, 1] * bitangent + h[k, 2] * normals
+            n_dot_h = h[k, 2]
+            light = 2 * n_dot_h * world_h - normals
+            n_dot_l = np.einsum("nd,nd->n", normals, light)
+            lit = n_dot_l > 0
+            if not lit.any():
+                continue
+            total[lit] += lookup(mips[level[k]], light[lit]) * n_dot_l[lit, None]
+            weight[lit] += n_dot_l[lit]
+        result[face] = (total / np.maximum(weight, 1e-8)[:, None]).reshape(size, size, 3)
+    return result
+
+
+def spherical_harmonics(cube):
+    """
+    Irradiance spherical harmonics of a linear cube, the way Babylon computes them.
+
+    Returns:
+    np.ndarray: (9, 3) coefficients in Babylon's order (l00, l1-1, l10, l11,
+    l2-2, l2-1, l20, l21, l22), already converted to Lambertian radiance.
+    """
+    directions, solid_angle = face_directions(cube.shape[1])
+    x, y, z = directions[..., 0], directions[..., 1], directions[..., 2]
+    basis = np.stack([
+        np.full_like(x, np.sqrt(1 / (4 * np.pi))),
+        -np.sqrt(3 / (4 * np.pi)) * y,
+        np.sqrt(3 / (4 * np.pi)) * z,
+        -np.sqrt(3 / (4 * np.pi)) * x,
+        np.sqrt(15 / (4 * np.pi)) * x * y,
+        -np.sqrt(15 / (4 * np.pi)) * y * z,
+        np.sqrt(5 / (16 * np.pi)) * (3 * z * z - 1),
+        -np.sqrt(15 / (4 * np.pi)) * x * z,
+        np.sqrt(15 / (16 * np.pi)) * (x * x - y * y),
+    ])
+    sh = np.einsum("bfyx,fyx,fyxc->bc", basis, solid_angle, cube)
+    sh *= 4 * np.pi / solid_angle.sum()
+    # Radiance -> irradiance (cosine lobe convolution) -> Lambertian radiance
+    band = np.array([np.pi] + [2 * np.pi / 3] * 3 + [np.pi / 4] * 5)
+    return sh * band[:, None] / np.pi
+
+
+def spherical_polynomial(sh):
+    """Convert harmonics to the polynomial form stored in .env files."""
+    l00, l1_1, l10, l11, l2_2, l2_1, l20, l21, l22 = sh
+    polynomial = {
+        "x": -1.02333 * l11,
+        "y": -1.02333 * l1_1,
+        "z": 1.02333 * l10,
+        "xx": 0.886277 * l00 - 0.247708 * l20 + 0.429043 * l22,
+        "yy": 0.886277 * l00 - 0.247708 * l20 - 0.429043 * l22,
+        "zz": 0.886277 * l00 + 0.495417 * l20,
+        "yz": -0.858086 * l2_1,
+        "zx": -0.858086 * l21,
+        "xy": 0.858086 * l2_2,
+    }
+    return {key: (value / np.pi).tolist() for key, value in polynomial.items()}
+
+
+def brdf_lut(size=128, samples=256):
+    """
+    Split-sum GGX BRDF table (Karis 2013), rows by roughness, columns by N.V.
+
+    Returns:
+    np.ndarray: (size, size, 2) scale and bias.
+    """
+    n_dot_v = (np.arange(size) + 0.5) / size
+    roughness = (np.arange(size) + 0.5) / size
+    view = np.column_stack([np.sqrt(1 - n_dot_v ** 2), np.zeros(size), n_dot_v])
+    lut = np.zeros((size, size, 2))
+    for row, r in enumerate(roughness):
+        alpha = r * r
+        h, _ = ggx_half_vectors(alpha, samples)
+        v_dot_h = view @ h.T
+        light_z = 2 * v_dot_h * h[None, :, 2] - view[:, 2:3]
+        n_dot_l = np.clip(light_z, 0, 1)
+        n_dot_h = np.clip(h[None, :, 2], 0, 1)
+        v_dot_h = np.clip(v_dot_h, 0, 1)
+        k = alpha / 2
+        g_v = n_dot_v[:, None] / (n_dot_v[:, None] * (1 - k) + k)
+        g_l = n_dot_l / (n_dot_l * (1 - k) + k)
+        g_vis = np.where(n_dot_l > 0,
+                         g_v * g_l * v_dot_h / np.maximum(n_dot_h * n_dot_v[:, None], 1e-8), 0)
+        fresnel = (1 - v_dot_h) ** 5
+        lut[row, :, 0] = ((1 - fresnel) * g_vis).mean(axis=1)
+        lut[row, :, 1] = (fresnel * g_vis).mean(axis=1)
+    return lut
+
+
+def encode_face(face):
+    """Linear LDR face -> RGBD PNG bytes (D = 1 since nothing exceeds 1)."""
+    rgb = np.clip(face, 0, 1) ** (1 / GAMMA)
+    rgba = np.concatenate([rgb, np.ones(face.shape[:2] + (1,))], axis=-1)
+    buffer = io.BytesIO()
+    Image.fromarray(np.round(rgba * 255).astype(np.uint8), "RGBA").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def write_env(path, levels, irradiance):
+    """Write a Babylon .env file: magic, JSON manifest, then one PNG per face per mip."""
+    images, mipmaps, position = [], [], 0
+    for level in levels:
+        for face in level:
+            data = encode_face(face)
+            mipmaps.append({"length": len(data), "position": position})
+            images.append(data)
+            position += len(data)
+    manifest = {
+        "version": 1,
+        "width": levels[0].shape[1],
+        "irradiance": irradiance,
+        "specular": {"mipmaps": mipmaps, "lodGenerationScale": LOD_GENERATION_SCALE},
+    }
+    data = ENV_MAGIC + json.dumps(manifest).encode("utf-8") + b"\0" + b"".join(images)
+    write_atomic(path, data)
+    return data
+
+
+def up_to_date(outputs):
+    inputs = [os.path.join(skybox_dir, f"skybox_{face}.jpg") for face in FACES]
+    newest = max(os.path.getmtime(p) for p in inputs + [os.path.abspath(__file__)])
+    return all(os.path.exists(p) and os.path.getmtime(p) >= newest for p in outputs)
+
+
+def build(size=256, samples=64):
+    cube = load_faces(size)
+    mips = [cube]
+    while mips[-1].shape[1] > 1:
+        mips.append(downsample(mips[-1]))
+
+    # Mip 0 is the mirror reflection; each further mip matches the roughness
+    # Babylon's shader picks for it: lod = log2(size * alpha) * scale
+    levels = [cube]
+    for lod in range(1, len(mips)):
+        alpha = min(2 ** (lod / LOD_GENERATION_SCALE) / size, 1.0)
+        levels.append(prefilter(mips, mips[lod].shape[1], alpha, samples))
+        print(f"Prefiltered mip {lod} ({mips[lod].shape[1]}px, alpha {alpha:.3f})")
+
+    sh = spherical_harmonics(cube)
+    env = write_env(os.path.join(skybox_dir, "environment.env"), levels, spherical_polynomial(sh))
+    for publish_dir in publish_dirs:
+        if os.path.isdir(publish_dir):
+            write_atomic(os.path.join(publish_dir, "environment.env"), env)
+
+    names = ["l00", "l1_1", "l10", "l11", "l2_2", "l2_1", "l20", "l21", "l22"]
+    with open(os.path.join(skybox_dir, "environment.json"), "w") as f:
+        json.dump({"size": size, "mips": len(levels),
+                   "sphericalHarmonics": dict(zip(names, sh.tolist()))}, f, indent=2)
+
+    lut = brdf_lut()
+    rgb = np.concatenate([lut, np.zeros(lut.shape[:2] + (1,))], axis=-1)
+    Image.fromarray(np.round(np.clip(rgb, 0, 1) * 255).astype(np.uint8), "RGB").save(
+        os.path.join(skybox_dir, "brdf_lut.png"))
+    print(f"Wrote environment.env ({len(env) // 1024} KB), environment.json and brdf_lut.png")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=256, help="cube face size, a power of two")
+    parser.add_argument("--samples", type=int, default=64, help="GGX samples per texel")
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    outputs = [os.path.join(skybox_dir, name)
+               for name in ("environment.env", "environment.json", "brdf_lut.png")]
+    if not args.force and up_to_date(outputs):
+        print("Environment is up to date")
+    else:
+        build(args.size, args.samples)
@@ -0,0 +1,293 @@
+"""
+Discrete-event simulation of a wafer fab line, for the factory optimization mode.
+
+A line is a list of stations, one per process step from the roadmap
+(metallurgical silicon through dicing on the laser cutter). Each station
+has some identical machines, a mean process time with a coefficient of
+variation, and a buffer in front of it. Lots are released into the first
+station at a fixed interval and flow through every station in order. A
+lot that finishes while the next buffer is full stays on its machine,
+blocking it, until a place opens (blocking after service); lots released
+while the first buffer is full wait at the source.
+
+The simulation is a single loop over a heap of (time, lot) completions
+merged with the release clock. Lot state lives in flat per-lot lists
+indexed by lot id rather than in objects, and process times are drawn in
+blocks per station from their own NumPy generator, so results depend only
+on the seed. Times are in minutes.
+
+simulate() runs one line; sweep() runs many configurations across
+processes and score() turns a result into one number for ranking layouts.
+
+Usage:
+    python3 fabsim.py [--config line.json] [--hours 2000] [--seed 0]
+    python3 fabsim.py --sweep [--workers N]
+
+--sweep tries one extra machine at each station in turn and ranks the
+layouts by score.
+"""
+import argparse
+import heapq
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Process times in minutes per lot of 25 wafers; buffer is the number of
+# lots that can wait in front of the station
+DEFAULT_LINE = [
+    {"name": "metallurgical_si", "machines": 1, "time": 36.0, "cv": 0.3, "buffer": 8},
+    {"name": "polysilicon", "machines": 2, "time": 70.0, "cv": 0.4, "buffer": 8},
+    {"name": "czochralski", "machines": 3, "time": 110.0, "cv": 0.5, "buffer": 6},
+    {"name": "slicing", "machines": 1, "time": 32.0, "cv": 0.3, "buffer": 6},
+    {"name": "doping", "machines": 2, "time": 60.0, "cv": 0.5, "buffer": 6},
+    {"name": "lithography", "machines": 2, "time": 76.0, "cv": 0.6, "buffer": 4},
+    {"name": "etch", "machines": 2, "time": 66.0, "cv": 0.5, "buffer": 4},
+    {"name": "inspection", "machines": 1, "time": 30.0, "cv": 0.8, "buffer": 4},
+    {"name": "dicing", "machines": 1, "time": 34.0, "cv": 0.2, "buffer": 4},
+]
+
+# Process times drawn per refill
+DRAW_BLOCK = 4096
+
+
+def process_times(rng, mean, cv):
+    """Endless gamma-distributed process times with the given mean and CV."""
+    if cv <= 0:
+        while True:
+            yield mean
+    shape, scale = 1 / cv ** 2, mean * cv ** 2
+    while True:
+        yield from rng.gamma(shape, scale, DRAW_BLOCK).tolist()
+
+
+def simulate(line, release_interval, horizon, warmup=None, seed=0):
+    """
+    Run a line until horizon minutes and measure it after warmup.
+
+    Parameters:
+    line (list): Station dicts with name, machines, time, cv and buffer
+                 (None for an unbounded buffer).
+    release_interval (float): Minutes between lot releases.
+    horizon (float): Simulated minutes.
+    warmup (float): Minutes ignored by the statistics, default horizon / 10.
+    seed (int): Seed for every station's process times.
+
+    Returns:
+    dict: throughput (lots per hour), cycle time mean and p95 (minutes),
+    wip (lots, by Little's law), events, and per station utilization and
+    blocked fractions. Also "release", "finish" as per-lot arrays of times,
+    NaN where a lot hadn't finished.
+    """
+    warmup = horizon / 10 if warmup is None else warmup
+    n = len(line)
+    last = n - 1
+    draw = [process_times(np.random.default_rng([seed, s]), st["time"], st.get("cv", 0)).__next__
+            for s, st in enumerate(line)]
+    free = [st["machines"] for st in line]
+    capacity = [float("inf") if st.get("buffer") is None else st["buffer"] for st in line]
+    queue = [deque() for _ in line]
+    # Lots finished upstream of each station, still holding their machine;
+    # blocked[0] is the source's backlog
+    blocked = [deque() for _ in line]
+    busy = [0.0] * n
+    blocked_time = [0.0] * n
+
+    # Per-lot state, indexed by lot id
+    release = []
+    finish = []
+    station = []
+    blocked_since = []
+
+    heap = []
+    push, pop = heapq.heappush, heapq.heappop
+    next_release = 0.0
+    events = 0
+
+    while True:
+        if heap and heap[0][0] <= next_release:
+            now, lot = pop(heap)
+            if now > horizon:
+                break
+            s = station[lot]
+            if s == last:
+                finish[lot] = now
+            else:
+                t = s + 1
+                if free[t]:
+                    free[t] -= 1
+                    station[lot] = t
+                    dt = draw[t]()
+                    busy[t] += dt
+                    push(heap, (now + dt, lot))
+                elif len(queue[t]) < capacity[t]:
+                    queue[t].append(lot)
+                else:
+                    # Keeps its machine at s until a place opens at t
+                    blocked[t].append(lot)
+                    blocked_since[lot] = now
+                    events += 1
+                    continue
+
+            # A machine at s is free: refill it, then pass the opening upstream
+            while True:
+                if queue[s]:
+                    lot = queue[s].popleft()
+                    station[lot] = s
+                    dt = draw[s]()
+                    busy[s] += dt
+                    push(heap, (now + dt, lot))
+                    if not blocked[s]:
+                        break
+                    lot = blocked[s].popleft()
+                    queue[s].append(lot)
+                elif blocked[s]:
+                    lot = blocked[s].popleft()
+                    station[lot] = s
+                    dt = draw[s]()
+                    busy[s] += dt
+                    push(heap, (now + dt, lot))
+                else:
+                    free[s] += 1
+                    break
+                if s == 0:
+                    break
+                # The lot that moved up frees its machine one station back
+                s -= 1
+                blocked_time[s] += now - blocked_since[lot]
+        else:
+            now = next_release
+            if now > horizon:
+                break
+            lot = len(release)
+            release.append(now)
+            finish.append(np.nan)
+            station.append(0)
+            blocked_since.append(0.0)
+            if free[0]:
+                free[0] -= 1
+                dt = draw[0]()
+                busy[0] += dt
+                push(heap, (now + dt, lot))
+            elif len(queue[0]) < capacity[0]:
+                queue[0].append(lot)
+            else:
+                blocked[0].append(lot)
+            next_release += release_interval
+        events += 1
+
+    release = np.array(release)
+    finish = np.array(finish)
+    measured = finish >= warmup
+    cycle = finish[measured] - release[measured]
+    window = horizon - warmup
+    throughput = measured.sum() / window * 60
+    cycle_mean = float(cycle.mean()) if len(cycle) else float("nan")
+    return {
+        "throughput": float(throughput),
+        "cycle_time": cycle_mean,
+        "cycle_time_p95": float(np.percentile(cycle, 95)) if len(cycle) else float("nan"),
+        "wip": float(throughput / 60 * cycle_mean),
+        "events": events,
+        "stations": [{"name": st["name"],
+                      "utilization": min(busy[s] / (st["machines"] * horizon), 1.0),
+                      "blocked": blocked_time[s] / (st["machines"] * horizon)}
+                     for s, st in enumerate(line)],
+        "release": release,
+        "finish": finish,
+    }
+
+
+def score(result, cycle_time_weight=0.01):
+    """Rank a layout: throughput in lots per hour, less a penalty per hour of cycle time."""
+    return result["throughput"] - cycle_time_weight * result["cycle_time"] / 60
+
+
+def _run(args):
+    line, release_interval, horizon, seed = args
+    result = simulate(line, release_interval, horizon, seed=seed)
+    # The per-lot arrays are too big to send back for every configuration
+    del result["release"], result["finish"]
+    return result
+
+
+def sweep(lines, release_interval, horizon, seeds=(0,), workers=None):
+    """
+    Simulate many line configurations, in parallel across processes.
+
+    Every configuration runs once per seed and the seeds' results are
+    averaged, so layouts are compared on the same random process times.
+
+    Returns:
+    list of dict: One averaged result per line, in order, with its score.
+    """
+    jobs = [(line, release_interval, horizon, seed) for line in lines for seed in seeds]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            runs = list(pool.map(_run, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        runs = [_run(job) for job in jobs]
+
+    results = []
+    for i in range(len(lines)):
+        group = runs[i * len(seeds):(i + 1) * len(seeds)]
+        result = {key: float(np.mean([r[key] for r in group]))
+                  for key in ("throughput", "cycle_time", "cycle_time_p95", "wip")}
+        result["events"] = sum(r["events"] for r in group)
+        result["stations"] = group[0]["stations"]
+        result["score"] = score(result)
+        results.append(result)
+    return results
+
+
+def add_machine(line, index):
+    """Return a copy of a line with one more machine at station index."""
+    line = [dict(st) for st in line]
+    line[index]["machines"] += 1
+    return line
+
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", help="JSON list of stations, default DEFAULT_LINE")
+    parser.add_argument("--release", type=float, default=40.0, help="minutes between lot releases")
+    parser.add_argument("--hours", type=float, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sweep", action="store_true", help="try one extra machine per station")
+    parser.add_argument("--seeds", type=int, default=3, help="replications per layout in --sweep")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    line = DEFAULT_LINE
+    if args.config:
+        with open(args.config) as f:
+            line = json.load(f)
+    horizon = args.hours * 60
+
+    start = time.perf_counter()
+    if args.sweep:
+        layouts = [("baseline", line)] + [(f"+1 {st['name']}", add_machine(line, i))
+                                          for i, st in enumerate(line)]
+        results = sweep([l for _, l in layouts], args.release, horizon,
+                        seeds=range(args.seed, args.seed + args.seeds), workers=args.workers)
+        elapsed = time.perf_counter() - start
+        print(f"{'layout':<24}{'lots/h':>8}{'cycle h':>9}{'wip':>7}{'score':>8}")
+        for (name, _), r in sorted(zip(layouts, results), key=lambda x: -x[1]["score"]):
+            print(f"{name:<24}{r['throughput']:>8.3f}{r['cycle_time'] / 60:>9.1f}"
+                  f"{r['wip']:>7.1f}{r['score']:>8.3f}")
+        events = sum(r["events"] for r in results)
+    else:
+        r = simulate(line, args.release, horizon, seed=args.seed)
+        elapsed = time.perf_counter() - start
+        print(f"{r['throughput']:.3f} lots/h, cycle time {r['cycle_time'] / 60:.1f} h "
+              f"(p95 {r['cycle_time_p95'] / 60:.1f} h), WIP {r['wip']:.1f} lots")
+        print(f"\n{'station':<20}{'util':>7}{'blocked':>9}")
+        for st in r["stations"]:
+            print(f"{st['name']:<20}{st['utilization']:>7.0%}{st['blocked']:>9.0%}")
+        events = r["events"]
+    print(f"\n{events:,} events in {elapsed:.2f} s ({events / elapsed / 1e6:.2f} M events/s)")
@@ -0,0 +1,201 @@
+"""
+Split a GLB into a .gltf with one external buffer per top-level node.
+
+A GLB has to be downloaded completely before a viewer can show anything,
+and any change to the model invalidates all of it. The split form is a
+small .gltf JSON next to a folder of files:
+
+    laser_cutter.gltf
+    laser_cutter/enclosure_left.3f2a9c1e.bin   vertex and index data for
+                                               one top-level node
+    laser_cutter/metal.8d04be77.jpg            each texture, as it was
+                                               embedded in the GLB
+
+Clients fetch the buffers and images in parallel, and because every file
+is named after a hash of its content, a rebuild that only changes one part
+only changes that part's URL; everything else stays cached. Collision
+proxies go in the buffer of the node they belong to. Data shared between
+nodes goes in the buffer of the first node that uses it, and data no node
+uses goes in "scene".
+
+export_scene writes the split form next to each GLB when EXPORT_GLTF is
+set (see util.export_gltf).
+
+Usage:
+    python3 gltfsplit.py model.glb [...]
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+
+from budget import material_images, mesh_buffer_views, parse_glb
+from util import write_atomic
+
+EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg", "image/webp": "webp", "image/ktx2": "ktx2"}
+
+
+# The names content_name gives; nothing else in a model's folder is removed
+CONTENT_NAME = re.compile(r"^[A-Za-z0-9_-]+\.[0-9a-f]{8}\.[A-Za-z0-9]+$")
+
+
+def content_name(stem, data, ext):
+    safe = re.sub(r"[^A-Za-z0-9_-]+", "_", stem) or "data"
+    return f"{safe}.{hashlib.sha256(data).hexdigest()[:8]}.{ext}"
+
+
+def view_owners(gltf):
+    """
+    Map each buffer view to the group that loads it, in scene order.
+
+    Returns:
+    (dict, list): {view index: group name} and the group names in order.
+    """
+    owners, groups = {}, []
+
+    def walk(index, group):
+        node = gltf["nodes"][index]
+        views = set()
+        if "mesh" in node:
+            mesh = gltf["meshes"][node["mesh"]]
+            views = mesh_buffer_views(gltf, mesh)
+            for primitive in mesh["primitives"]:
+                for image in material_images(gltf, primitive.get("material")):
+                    if "bufferView" in gltf["images"][image]:
+                        views.add(gltf["images"][image]["bufferView"])
+        for view in sorted(views):
+            owners.setdefault(view, group)
+        for child in node.get("children", []):
+            walk(child, group)
+
+    for scene in gltf.get("scenes", []):
+        for root in scene.get("nodes", []):
+            node = gltf["nodes"][root]
+            collider = node.get("extras", {}).get("collider", {})
+            group = collider.get("for") or node.get("name") or f"node{root}"
+            if group not in groups:
+                groups.append(group)
+            walk(root, group)
+    return owners, groups
+
+
+def split_glb(data, name):
+    """
+    Convert GLB bytes to a .gltf document with external buffers and images.
+
+    Parameters:
+    data (bytes): The GLB.
+    name (str): Folder for the external files, relative to the .gltf.
+
+    Returns:
+    (bytes, dict): The .gltf JSON and {file name in the folder: bytes}.
+    """
+    gltf, binary = parse_glb(data)
+    views = gltf.get("bufferViews", [])
+
+    def view_bytes(view):
+        start = view.get("byteOffset", 0)
+        return binary[start:start + view["byteLength"]]
+
+    files = {}
+    # Images become files of their own, named after the image
+    image_views = set()
+    for i, image in enumerate(gltf.get("images", [])):
+        if "bufferView" not in image:
+            continue
+        content = view_bytes(views[image["bufferView"]])
+        ext = EXTENSIONS.get(image.get("mimeType"), "bin")
+        filename = content_name(image.get("name", f"image{i}"), content, ext)
+        files[filename] = content
+        image_views.add(image.pop("bufferView"))
+        image["uri"] = f"{name}/{filename}"
+
+    owners, groups = view_owners(gltf)
+    kept = [i for i in range(len(views)) if i not in image_views]
+    groups = [g for g in groups if any(owners.get(i) == g for i in kept)]
+    if any(i not in owners for i in kept):
+        groups.append("scene")
+
+    # Pack each group's views into its own buffer, 4-byte aligned
+    buffers, new_index, new_views = [], {}, []
+    for group in groups:
+        blob = bytearray()
+        for i in kept:
+            if owners.get(i, "scene") != group:
+                continue
+            blob += b"\0" * (-len(blob) % 4)
+            view = dict(views[i], buffer=len(buffers), byteOffset=len(blob))
+            blob += view_bytes(views[i])
+            new_index[i] = len(new_views)
+            new_views.append(view)
+        filename = content_name(group, bytes(blob), "bin")
+        files[filename] = bytes(blob)
+        buffers.append({"uri": f"{name}/{filename}", "byteLength": len(blob)})
+
+    for accessor in gltf.get("accessors", []):
+        if "bufferView" in accessor:
+            accessor["bufferView"] = new_index[accessor["bufferView"]]
+        sparse = accessor.get("sparse")
+        if sparse:
+            for part in (sparse["indices"], sparse["values"]):
+                part["bufferView"] = new_index[part["bufferView"]]
+    gltf["bufferViews"] = new_views
+    gltf["buffers"] = buffers
+    if not new_views:
+        del gltf["bufferViews"], gltf["buffers"]
+    return json.dumps(gltf, separators=(",", ":")).encode("utf-8"), files
+
+
+def referenced_files(gltf_path):
+    """Names of the files in the model's folder that a .gltf on disk uses."""
+    if not os.path.exists(gltf_path):
+        return set()
+    try:
+        with open(gltf_path, "rb") as f:
+            gltf = json.load(f)
+    except ValueError:
+        return set()
+    uris = [item.get("uri", "") for key in ("buffers", "images") for item in gltf.get(key, [])]
+    return {os.path.basename(uri) for uri in uris}
+
+
+def write_gltf(gltf_path, document, files):
+    """
+    Write a split model: its files first, then the .gltf, then drop stale files.
+
+    The files are content-addressed, so readers of the old .gltf keep
+    finding theirs: the files it used are kept until the next build
+    replaces this one. Only files named like content_name's are removed.
+    """
+    folder = os.path.splitext(gltf_path)[0]
+    os.makedirs(folder, exist_ok=True)
+    keep = set(files) | referenced_files(gltf_path)
+    for filename, data in files.items():
+        path = os.path.join(folder, filename)
+        if not os.path.exists(path):
+            write_atomic(path, data)
+    write_atomic(gltf_path, document)
+    for filename in os.listdir(folder):
+        path = os.path.join(folder, filename)
+        if filename not in keep and CONTENT_NAME.match(filename) and os.path.isfile(path):
+            os.remove(path)
+
+
+def export_split(data, glb_path):
+    """Write the split form of GLB bytes next to glb_path. Returns the .gltf path."""
+    gltf_path = os.path.splitext(glb_path)[0] + ".gltf"
+    name = os.path.basename(os.path.splitext(glb_path)[0])
+    write_gltf(gltf_path, *split_glb(data, name))
+    return gltf_path
+
+
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        with open(path, "rb") as f:
+            data = f.read()
+        gltf_path = export_split(data, path)
+        folder = os.path.splitext(gltf_path)[0]
+        sizes = sorted(((os.path.getsize(os.path.join(folder, n)), n) for n in os.listdir(folder)),
+                       reverse=True)
+        print(f"{gltf_path}: {len(sizes)} files, largest {', '.join(n for _, n in sizes[:3])}")
@@ -0,0 +1,72 @@
+"""
+Startup profiling report for the model scripts.
+
+Runs each model under `python -X importtime` and summarises where its
+import time goes, so regressions in cold-start cost are easy to spot.
+
+Usage:
+    python3 importtime.py [model.py ...]
+
+With no arguments every model in util.MODELS is profiled. Note that this
+runs the full build, so the model's GLB is rewritten as usual.
+"""
+import os
+import subprocess
+import sys
+
+from util import MODELS
+
+here = os.path.dirname(os.path.abspath(__file__))
+top_n = 10
+
+
+def parse_importtime(stderr):
+    """
+    Parse `-X importtime` output.
+
+    Returns:
+    list of (module, level, self_us, cumulative_us) tuples, in report order.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), level, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def profile_model(script):
+    """Run one model with -X importtime and return its parsed import entries."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", script],
+        cwd=here,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise RuntimeError(f"{script} exited with code {result.returncode}")
+    return parse_importtime(result.stderr)
+
+
+def print_report(script, entries):
+    top_level = [e for e in entries if e[1] == 0]
+    total_ms = sum(e[3] for e in top_level) / 1000
+    print(f"\n{script}: {total_ms:.0f} ms importing {len(entries)} modules")
+
+    print(f"  {'top-level import':<32}{'cumulative ms':>14}")
+    for name, _, _, cumulative in sorted(top_level, key=lambda e: -e[3])[:top_n]:
+        print(f"  {name:<32}{cumulative / 1000:>14.1f}")
+
+    print(f"  {'slowest module (self time)':<32}{'self ms':>14}")
+    for name, _, self_us, _ in sorted(entries, key=lambda e: -e[2])[:top_n]:
+        print(f"  {name:<32}{self_us / 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    scripts = [os.path.basename(s) for s in sys.argv[1:]] or list(MODELS)
+    for script in scripts:
+        print_report(script, profile_model(script))
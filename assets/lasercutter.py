@@ -4,9 +4,7 @@ import trimesh
 from trimesh.creation import cylinder, box, icosphere
 from trimesh.boolean import difference
 from trimesh.transformations import translation_matrix
-from shapely.geometry import LineString
-
-from copy import deepcopy
+from shapely.geometry import LineString, Polygon
 
 # NOTE: Trimesh uses a right-handed coordinate system by default:
 # X: right
@@ -17,12 +15,18 @@ from types import SimpleNamespace
 
 import os
 from util import *
+import visibility
+from occlusion import bake_ambient_occlusion
 from PIL import Image
 
 here = os.path.dirname(os.path.abspath(__file__))
 
 components = {}
-machine = SimpleNamespace(x=2400, y=1400, z=1100)
+# Machine size in mm and the other parameters in util.MODEL_PARAMS.
+# variants.py and modelserver.py build other values by passing overrides in
+# `params`; run on its own this builds the defaults.
+params = model_params("lasercutter.py", globals().get("params"))
+machine = SimpleNamespace(x=params["x"], y=params["y"], z=params["z"])
 room = SimpleNamespace(x=8000, y=8000, z=4000)
 wall_width = 1
 
@@ -49,12 +53,13 @@ glass_material = trimesh.visual.material.PBRMaterial(
     alphaMode="BLEND",
 )
 
-wall = box([room.y, room.x, wall_width])
+step("room", components)
+wall = Node(box([room.y, room.x, wall_width]))
 floor = translate(wall, [0,room.y/2-machine.y/2,0])
 floor.visual.material = glass_material
-rightwall = translate(rotate(box([room.z, room.y, wall_width]), [0,90,0]), [-room.x/2, room.y/2-machine.y/2, room.z/2])
-leftwall = translate(rotate(box([room.z, room.y, wall_width]), [0,270,0]), [room.x/2, room.y/2-machine.y/2, room.z/2])
-rearwall = translate(rotate(box([room.z, room.x, wall_width]), [0,270,90]), [0, -machine.y/2, room.z/2])
+rightwall = translate(rotate(Node(box([room.z, room.y, wall_width])), [0,90,0]), [-room.x/2, room.y/2-machine.y/2, room.z/2])
+leftwall = translate(rotate(Node(box([room.z, room.y, wall_width])), [0,270,0]), [room.x/2, room.y/2-machine.y/2, room.z/2])
+rearwall = translate(rotate(Node(box([room.z, room.x, wall_width])), [0,270,90]), [0, -machine.y/2, room.z/2])
 add_texture(rightwall, "brickwall.jpg")
 add_texture(leftwall, "brickwall.jpg")
 add_texture(rearwall, "brickwall.jpg")
@@ -66,24 +71,25 @@ components["leftwall"] = leftwall
 components["rearwall"] = rearwall
 
 
+step("enclosure", components)
 # enclosure = difference([main_box, cutout_box])
 # Create the left enclosure
 # Want a vertical rectangle on YZ plane, thickness in X
-enclosure_left = create_rect_with_hole(
-    width=machine.z,  # along Y
-    height=machine.y,  # along Z
+enclosure_left = Node(create_rect_with_hole(
+    width=machine.y,  # along Y
+    height=machine.z,  # along Z
     top=50,
     bottom=50,
     left=50,
     right=50,
-    extrusion_height=aluminum_thickness,  # thickness goes into X direction after rotation
-)
-rotate(enclosure_left, [0, 90, 0])
+    plane="yz",
+    extrusion_height=aluminum_thickness,  # thickness goes into X direction
+))
 
 enclosure_left.visual = metallic_texture
 
 # Create the right enclosure
-enclosure_right = deepcopy(enclosure_left)
+enclosure_right = enclosure_left.instance()
 # Apply translation
 enclosure_left.apply_transform(
     translation_matrix([machine.x / 2 - aluminum_thickness / 2, 0, machine.z / 2])
@@ -94,23 +100,22 @@ enclosure_right.apply_transform(
 )
 
 # Create the front enclosure
-enclosure_front = create_rect_with_hole(
+enclosure_front = Node(create_rect_with_hole(
     machine.x, machine.z, 50, 50, 50, 50, plane="xz"
-)
+))
 enclosure_front.visual = metallic_texture
-rotate(enclosure_front, [90, 0, 0])
 
-enclosure_rear = deepcopy(enclosure_front)
+enclosure_rear = enclosure_front.instance()
 # Apply translation
 translate(enclosure_front, [0, machine.y / 2, machine.z / 2])
 translate(enclosure_rear, [0, -machine.y / 2, machine.z / 2])
 
-door_front_left = box([machine.x / 2 - 50, machine.z - 100, aluminum_thickness])
+door_front_left = Node(box([machine.x / 2 - 50, machine.z - 100, aluminum_thickness]))
 add_texture_simple(door_front_left, "red.jpg")
 rotate(door_front_left, [90, 0, 0])
-door_front_right = deepcopy(door_front_left)
-door_rear_left = deepcopy(door_front_left)
-door_rear_right = deepcopy(door_front_left)
+door_front_right = door_front_left.instance()
+door_rear_left = door_front_left.instance()
+door_rear_right = door_front_left.instance()
 translate(door_front_left, [(machine.x - 100 + 6) / 4, machine.y / 2, machine.z / 2])
 components["door_front_left"] = door_front_left
 translate(door_front_right, [-(machine.x - 100 + 6) / 4, machine.y / 2, machine.z / 2])
@@ -120,10 +125,10 @@ components["door_rear_left"] = door_rear_left
 translate(door_rear_right, [-(machine.x - 100 + 6) / 4, -machine.y / 2, machine.z / 2])
 components["door_rear_right"] = door_rear_right
 
-door3 = box([machine.y - 100, machine.z - 100, aluminum_thickness])
+door3 = Node(box([machine.y - 100, machine.z - 100, aluminum_thickness]))
 add_texture_simple(door3, "red.jpg")
 rotate(door3, [90, 0, 90])
-door4 = deepcopy(door3)
+door4 = door3.instance()
 translate(door3, [(machine.x) / 2, 0, machine.z / 2])
 components["door3"] = door3
 translate(door4, [-(machine.x) / 2, 0, machine.z / 2])
@@ -154,7 +159,7 @@ def create_pull_handle(
     profile = line.buffer(grip_radius, cap_style="round")
 
     # Extrude the 2D profile along Z
-    handle = trimesh.creation.extrude_polygon(profile, height=width)
+    handle = Node(trimesh.creation.extrude_polygon(profile, height=width))
     center(handle)
 
     handle.visual = metallic_texture
@@ -162,11 +167,19 @@ def create_pull_handle(
     return handle
 
 
+def create_textured_cylinder(radius, height, texture):
+    part = Node(cylinder(radius=radius, height=height))
+    add_texture(part, texture)
+    return part
+
+
+step("handles", components)
 # Create and position the handle on door_front_left
-door_handle_left = create_pull_handle(length = machine.z / 6, width = machine.z/30, thickness=machine.z/50)
-door_handle_cover = deepcopy(door_handle_left)
+door_handle_left = shared_component("pull_handle", create_pull_handle,
+                                    length=machine.z / 6, width=machine.z / 30, thickness=machine.z / 50)
+door_handle_cover = door_handle_left.instance()
 rotate(door_handle_left, [0, 90, 0])  # Orient horizontally
-door_handle_right = deepcopy(door_handle_left) 
+door_handle_right = door_handle_left.instance() 
 translate(
     door_handle_left,
     [
@@ -198,20 +211,18 @@ components["door_handle_left"] = door_handle_left
 components["door_handle_right"] = door_handle_right
 components["door_handle_cover"] = door_handle_cover
 
+step("bed_and_lens", components)
 # Cutting components["bed"]
-components["bed"] = box(
-    extents=[machine.x, machine.y, 5],
-    transform=trimesh.transformations.translation_matrix([0, 0, machine.z]),
+components["bed"] = Node(
+    box(extents=[machine.x, machine.y, 5]),
+    trimesh.transformations.translation_matrix([0, 0, machine.z]),
 )
 add_texture(components["bed"], "aluminum.jpg")
 
-components["laser_lens"] = cylinder(
-    radius=5,
-    height=5,
-    transform=trimesh.transformations.translation_matrix([0, 0, machine.z + 10]),
-)
-add_texture(components["laser_lens"], "red.jpg")
+components["laser_lens"] = shared_component("laser_lens", create_textured_cylinder, 5, 5, "red.jpg")
+translate(components["laser_lens"], [0, 0, machine.z + 10])
 
+step("extensions", components)
 # Side piece
 sp_total_height = machine.z / 4
 sp_bend_point = machine.z / 6
@@ -228,13 +239,13 @@ points = [
 profile = Polygon(points)
 
 # Extrude the 2D profile along the Z-axis
-left_extension = trimesh.creation.extrude_polygon(profile, height=sp_width)
+left_extension = Node(trimesh.creation.extrude_polygon(profile, height=sp_width))
 translate(left_extension, [-machine.y / 2, -sp_total_height / 2, -sp_width / 2])
 rotate(left_extension, [90, 0, 90])
 
 left_extension.visual = metallic_texture
 
-right_extension = deepcopy(left_extension)
+right_extension = left_extension.instance()
 translate(
     left_extension, [machine.x / 2 - sp_width / 2, 0, machine.z + sp_total_height / 2]
 )
@@ -244,36 +255,31 @@ translate(
 )
 components["right_extension"] = right_extension
 
-rear_extension = box([machine.x, 20, sp_total_height])
+rear_extension = Node(box([machine.x, 20, sp_total_height]))
 rear_extension.visual = metallic_texture
 translate(rear_extension, [0, -machine.y / 2 + 20 / 2, machine.z + sp_total_height / 2])
 components["rear_extension"] = rear_extension
 
-front_extension = box([machine.x - sp_width * 2, 20, sp_bend_point / 2])
+front_extension = Node(box([machine.x - sp_width * 2, 20, sp_bend_point / 2]))
 front_extension.visual = metallic_texture
 translate(front_extension, [0, machine.y / 2 - 20 / 2, machine.z + sp_bend_point / 4])
 components["front_extension"] = front_extension
 
 
+step("emergency_stop", components)
 # Emergency Stop
-emergency_stop = cylinder(
-    radius=machine.x/70,
-    height=40,
-)
-add_texture(emergency_stop, "red.jpg")
+emergency_stop = shared_component("emergency_stop", create_textured_cylinder, machine.x / 70, 40, "red.jpg")
 rotate(emergency_stop, [-45,0,0])
 translate(emergency_stop, [-machine.x/2 + sp_width/2, machine.y/2-50, machine.z+sp_bend_point+45])
 components["emergency_stop"] = emergency_stop
 
+step("laser_body", components)
 # Laser components
-components["laser_body"] = cylinder(
-    radius=15,
-    height=40,
-    transform=trimesh.transformations.translation_matrix([0, 0, machine.z + 10]),
-)
-add_texture(components["laser_body"], "steel.jpg")
+components["laser_body"] = shared_component("laser_body", create_textured_cylinder, 15, 40, "steel.jpg")
+translate(components["laser_body"], [0, 0, machine.z + 10])
 
 
+step("cover", components)
 # Define a tapered side cover profile
 line = LineString(
     [
@@ -288,7 +294,7 @@ profile = line.buffer(5, cap_style=2)
 
 # Extrude the 2D profile along Z
 cover_length = machine.x - sp_width * 2
-cover_overhang_part = trimesh.creation.extrude_polygon(profile, height=cover_length)
+cover_overhang_part = Node(trimesh.creation.extrude_polygon(profile, height=cover_length))
 
 # Apply transformations: center, orient, and position
 cover_overhang_part.apply_translation([0, 0, -(cover_length) / 2])
@@ -299,13 +305,13 @@ cover_overhang_part.apply_translation([0, 0, machine.z])
 add_texture(cover_overhang_part, "red.jpg")
 
 cover_overhang = machine.y - sp_bend_point
-cover_top = create_rect_with_hole(
+cover_top = Node(create_rect_with_hole(
     width=cover_length, height=cover_overhang, top=50, bottom=50, left=50, right=50
-)
+))
 add_texture(cover_top, "red.jpg")
 translate(cover_top, [0, -(machine.y - cover_overhang) / 2, machine.z + sp_total_height])
 
-cover_glass = center(box([cover_length - 100, cover_overhang - 100, 10]))
+cover_glass = center(Node(box([cover_length - 100, cover_overhang - 100, 10])))
 translate(cover_glass, [0, -50, machine.z + sp_total_height])
 # Define the glass material
 # Set a translucent light blue RGBA color (R, G, B, A)
@@ -315,9 +321,9 @@ cover_glass.visual.material = glass_material
 
 # Create a group scene for cover and glass
 cover_group = trimesh.Scene()
-cover_group.add_geometry(cover_overhang_part, node_name="cover_overhang_part")
-cover_group.add_geometry(cover_top, node_name="cover_top")
-cover_group.add_geometry(cover_glass, node_name="cover_glass")
+add_component(cover_group, "cover_overhang_part", cover_overhang_part)
+add_component(cover_group, "cover_top", cover_top)
+add_component(cover_group, "cover_glass", cover_glass)
 cover_group.metadata = {
     "pivot_point": [0, -machine.y/2 + 20/2, machine.z + sp_total_height],  # Your hinge location
     "rotation_axis": "x"  # Or "y"/"z" depending on hinge orientation
@@ -330,17 +336,18 @@ components["cover_group"] = cover_group
 # buffer(5) makes total height 10 units (5 above and below)
 profile = line.buffer(5, cap_style=2)  # cap_style=2 for flat ends
 
+step("rails_vents_cables", components)
 rail_lift = 40
 # Rails
 # Create a cylindrical rail
 radius = 10  # half of the box width for a similar size
 cover_length = machine.x  # length of the rail
 
-components["x_rail"] = trimesh.creation.cylinder(
+components["x_rail"] = Node(trimesh.creation.cylinder(
     radius=radius,
     height=cover_length,
     sections=64,  # increase for smoother appearance
-)
+))
 
 rotate(components["x_rail"], [0, 90, 0])
 # Apply transform to lift and center it along the X-axis
@@ -360,9 +367,14 @@ for i in range(8):
 # Cables
 cables = []
 exhaust_radius = machine.y / 15
-exhaust = trimesh.creation.capsule(height=machine.z*0.9, radius=exhaust_radius)
-add_texture(exhaust, "cable.jpg")
-translate(exhaust, [machine.x / 2 + 10, 0, machine.y / 2])
+# Exhaust duct: up the right side of the machine, then back into the rear wall
+exhaust_x = machine.x / 2 + 10
+exhaust = sweep([
+    [exhaust_x, 0, machine.y / 2 - machine.z * 0.45],
+    [exhaust_x, 0, machine.y / 2 + machine.z * 0.3],
+    [exhaust_x, -machine.y * 0.25, machine.y / 2 + machine.z * 0.52],
+    [exhaust_x, -machine.y / 2, machine.y / 2 + machine.z * 0.55],
+], exhaust_radius, sections=24, texture="cable.jpg")
 cables.append(exhaust)
 
 # Logo
@@ -373,49 +385,60 @@ cables.append(exhaust)
 #logo_mesh.apply_translation([-50, machine.z / 2 + 1, machine.y / 2 - 30])
 #add_texture(logo_mesh, "logo.png")
 
+step("crate", components)
 # Load and position crate model
-crate = rotate(center(trimesh.load(os.path.join(here, "Crate.glb"))), [90,0,180])
-# Scale to 1000 units tall (Z axis)
+# Scale to 1200 units tall (Z axis); at that size 256px textures are plenty
 box_height = 1200
-current_height = crate.bounds[1][2] - crate.bounds[0][2]
-scale_factor = box_height / current_height
-crate.apply_scale([scale_factor*2, scale_factor*2, scale_factor])
+crate = import_asset("Crate.glb", rotation=[90, 0, 180], height=box_height,
+                     stretch=[2, 2, 1], max_faces=2000, max_texture_size=256)
 # Position to left of laser cutter
 translate(crate, [room.x/2 + crate.bounds[0][1], room.y/2, box_height/2])
 components["crate"] = crate
 
 
+def create_wafer(wafer_radius, wafer_thickness, flat_width):
+    # Create full round wafer
+    wafer_disk = cylinder(radius=wafer_radius, height=wafer_thickness, sections=128)
+    # Create box to subtract for the flat
+    flat_box = box([flat_width, wafer_radius * 2 + 10, wafer_thickness + 1])
+    flat_box.apply_translation([wafer_radius - flat_width / 2, 0, 0])  # Position box on one edge
+    # Subtract the flat
+    with span("wafer_difference", "boolean") as s:
+        wafer = Node(s.count(difference([wafer_disk, flat_box])))
+    # Slightly shiny silicon printed with dies (see wafermap.py), mapped
+    # straight down onto the top face
+    uv = (wafer.geometry.vertices[:, :2] / wafer_radius + 1) / 2
+    wafer.visual = trimesh.visual.TextureVisuals(
+        uv=uv,
+        material=trimesh.visual.material.PBRMaterial(
+            baseColorTexture=texture_image("wafer.png"),
+            metallicFactor=0.1,
+            roughnessFactor=0.2,
+        ),
+    )
+    return wafer
+
+
+step("wafer", components)
 # Create a silicon wafer-style disk with a flat edge
-wafer_radius = 250  # 500 mm diameter
+wafer_radius = params["wafer_diameter"] / 2  # 500 mm by default
 wafer_thickness = 0.775  # Typical silicon wafer thickness in mm
-flat_width = 30  # Width of the flat cut, adjust as needed
-# Create full round wafer
-wafer_disk = cylinder(radius=wafer_radius, height=wafer_thickness, sections=128)
-# Create box to subtract for the flat
-flat_box = box([flat_width, wafer_radius * 2 + 10, wafer_thickness + 1])
-flat_box.apply_translation([wafer_radius - flat_width / 2, 0, 0])  # Position box on one edge
-# Subtract the flat
-wafer_with_flat = difference([wafer_disk, flat_box])
-# Set metallic/silicon-like material (dark gray, slightly shiny)
-silicon_material = trimesh.visual.material.PBRMaterial(
-    baseColorFactor=[0.2, 0.2, 0.2, 1.0],
-    metallicFactor=0.1,
-    roughnessFactor=0.2,
-)
-wafer_with_flat.visual.material = silicon_material
+flat_width = wafer_radius * 0.12  # Depth of the flat, in proportion to textures/wafer.png
+wafer_with_flat = shared_component("wafer", create_wafer, wafer_radius, wafer_thickness, flat_width)
 # Position the wafer somewhere visible in the scene
 translate(wafer_with_flat, [room.x/2-box_height/2, room.y/2, box_height])
 # Add to components
 components["wafer"] = wafer_with_flat
 
 
+step("assemble", components)
 # Combine honeycomb_list, buttons, vents, and cables
 #components["honeycomb_mesh"] = generateHoneycomb(machine)
 #translate(components["honeycomb_mesh"], [0, 0, machine.z + aluminum_thickness])
 #add_texture(components["honeycomb_mesh"], "aluminum.jpg")
 
-components["vents_mesh"] = trimesh.util.concatenate(vents)
-components["cables_mesh"] = trimesh.util.concatenate(cables)
+components["vents_mesh"] = concatenate(vents)
+components["cables_mesh"] = concatenate([bake(c) for c in cables])
 
 # Apply rotation to orient the machine
 rotation = trimesh.transformations.rotation_matrix(-np.pi / 2, [1, 0, 0])
@@ -426,19 +449,40 @@ for name, component in components.items():
         translate(component, [0,machine.y/2,0])
         component.apply_transform(rotation)
 
-# Create scene
-scene = trimesh.Scene(components.values())
-scene.bg_color = [0.9, 0.9, 0.9, 1.0]
+end_step()
 
 """Export the model to GLB format"""
-export_path = os.path.join(here, "laser_cutter.glb")
+export_path = globals().get("export_path", os.path.join(here, "laser_cutter.glb"))
 new_scene = trimesh.Scene()
 
 for name, mesh in components.items():
     print(f"Processing {name}")
-    new_scene.add_geometry(mesh, node_name=name, geom_name=name)
     mesh.metadata["name"] = name
+    add_component(new_scene, name, mesh)
+    add_collider(new_scene, name, mesh)
+
+new_scene.bg_color = [0.9, 0.9, 0.9, 1.0]
+
+# Bake contact shadows into the static room and enclosure so viewers need
+# no shadows or SSAO
+step("ambient_occlusion", category="lighting")
+static_nodes = ["floor", "rightwall", "leftwall", "rearwall",
+                "enclosure_left", "enclosure_right", "enclosure_front", "enclosure_rear"]
+bake_ambient_occlusion(new_scene, static_nodes)
+
+# Drop triangles that can't be seen from anywhere a viewer's camera can go
+# inside the room (Y is up after the rotation above): wall exteriors, floor
+# undersides, faces buried in other parts. The XR app's orbit camera allows
+# radius 100-5000 at any beta and the desktop viewer flies freely, so the
+# region is the whole room interior.
+step("hidden_surfaces", category="visibility")
+view_region = {
+    "target": [0, machine.z / 2, -machine.y / 2],
+    "radius": (100, 5000),
+    "beta": (0, np.pi),
+    "bounds": [[-room.x / 2, wall_width, -room.y], [room.x / 2, room.z, -wall_width]],
+}
+visibility.print_report(visibility.remove_hidden_surfaces(new_scene, view_region))
+end_step()
 
-new_scene.bg_color = scene.bg_color
-
-new_scene.export(export_path)
+export_scene(new_scene, export_path)
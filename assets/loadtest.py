@@ -0,0 +1,133 @@
+"""
+Load test for modelserver.py with a local asyncio client.
+
+Starts a ModelServer in this process on a free port, with an empty disk
+cache, and fires a shuffled mix of requests for a few laser cutter sizes at
+it from many concurrent connections. While it runs, a ticker measures how
+late the event loop wakes up, which shows whether cold builds ever block
+it. The report gives latency by X-Cache source, throughput, the number of
+builds (one per distinct size if coalescing works) and the worst loop lag.
+
+Usage:
+    python3 loadtest.py [--requests 200] [--concurrency 32] [--sizes 3] [--workers N]
+
+Exits with status 1 if any request fails, a size is built more than once
+or two responses for the same size differ.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+from modelserver import ModelServer
+
+
+async def fetch(port, path):
+    """GET a path from the local server. Returns (status, headers, body)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", 0)))
+    writer.close()
+    await writer.wait_closed()
+    return status, headers, body
+
+
+async def measure_lag(stop, interval=0.01):
+    """Return the longest delay past interval seen while sleeping in a loop."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+async def run(requests, concurrency, sizes, workers, model_dir, seed=0):
+    rng = random.Random(seed)
+    paths = [f"/models/laser_cutter.glb?x={1000 + 200 * i}&y={500 + 100 * i}&z={600 + 50 * i}"
+             for i in range(sizes)]
+    plan = [paths[i % sizes] for i in range(requests)]
+    rng.shuffle(plan)
+
+    server = ModelServer(workers, model_dir=model_dir)
+    listener = await server.start("127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    print(f"Server on port {port} with {server.workers} workers; "
+          f"{requests} requests for {sizes} sizes, {concurrency} at a time")
+
+    results = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(path):
+        async with semaphore:
+            start = time.perf_counter()
+            status, headers, body = await fetch(port, path)
+            results.append((path, status, headers.get("x-cache"), time.perf_counter() - start, body))
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(measure_lag(stop))
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(one(path) for path in plan))
+        elapsed = time.perf_counter() - start
+        # A second round for the first size, entirely from memory
+        for _ in range(20):
+            await one(paths[0])
+    finally:
+        stop.set()
+        worst_lag = await lag
+        listener.close()
+        await listener.wait_closed()
+        server.close()
+
+    by_source = defaultdict(list)
+    bodies = defaultdict(set)
+    failures = 0
+    for path, status, source, seconds, body in results:
+        if status != 200:
+            failures += 1
+            print(f"{path}: {status} {body.decode(errors='replace').strip()}")
+            continue
+        by_source[source].append(seconds)
+        bodies[path].add(body)
+
+    print(f"\n{'source':<12}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for source, times in sorted(by_source.items()):
+        print(f"{source:<12}{len(times):>8}{percentile(times, 50) * 1000:>10.1f}"
+              f"{percentile(times, 95) * 1000:>10.1f}{max(times) * 1000:>10.1f}")
+    print(f"\n{requests} requests in {elapsed:.2f} s ({requests / elapsed:.0f}/s), "
+          f"{server.stats['build']} builds taking {server.build_seconds:.2f} s, "
+          f"worst event loop lag {worst_lag * 1000:.1f} ms")
+
+    ok = failures == 0 and server.stats["build"] <= sizes and all(len(b) == 1 for b in bodies.values())
+    if not ok:
+        print("FAILED: errors, repeated builds or differing responses")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--sizes", type=int, default=3, help="distinct machine sizes requested")
+    parser.add_argument("--workers", type=int, help="build processes, default every core")
+    args = parser.parse_args()
+
+    # Start cold: built models go to a scratch directory, not cache/
+    with tempfile.TemporaryDirectory() as model_dir:
+        ok = asyncio.run(run(args.requests, args.concurrency, args.sizes, args.workers, model_dir))
+    sys.exit(0 if ok else 1)
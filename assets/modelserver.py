@@ -0,0 +1,317 @@
+"""
+Build models on demand over HTTP.
+
+    GET /models/laser_cutter.glb?x=1000&y=500&z=600&wafer_diameter=300
+
+builds the laser cutter with those parameters (see util.MODEL_PARAMS;
+anything left out keeps its default) and returns the GLB. The game asks
+for per-player or per-level variants this way instead of shipping a file
+for each one.
+
+Builds run the model scripts in a process pool, so a cold build never
+blocks the event loop and the workers keep util's in-memory caches warm
+between builds. Results are cached by a hash of the model, its parameters
+and the source of every script here: in memory (an LRU bounded by bytes)
+and in cache/model_<key>.glb (an LRU by modification time). Requests for
+a key that is already being built wait for that build instead of starting
+another. Each response says where it came from in X-Cache (memory, disk,
+build or coalesced), and GET /stats reports the counts.
+
+Usage:
+    python3 modelserver.py [--port 8100] [--workers N] [--memory-mb 256]
+
+The source hash is taken at startup; restart the server after editing the
+model code. loadtest.py drives it with a local client.
+"""
+import argparse
+import asyncio
+import contextlib
+import glob
+import hashlib
+import io
+import json
+import os
+import runpy
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import occlusion
+import profiler
+import util
+from util import here
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def source_digest():
+    """Hash every script in this folder, so a code change invalidates built models."""
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(here, "*.py"))):
+        with open(path, "rb") as f:
+            digest.update(os.path.basename(path).encode() + b"\0" + f.read())
+    return digest.hexdigest()
+
+
+def model_key(script, params, source):
+    text = json.dumps([script, params, source], sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def warm_up():
+    """Import the modelling stack in a worker before the first request needs it."""
+    import trimesh.creation
+    import trimesh.exchange.gltf
+    import shapely.geometry
+    import manifold3d
+    return os.getpid()
+
+
+def build_model(script, params, export_path):
+    """
+    Run a model script in a pool worker and export it to export_path.
+
+    The model's own budget applies, and nothing is published to the web
+    roots. The script's progress output is discarded. util's caches stay
+    warm between builds; the ones keyed on dimensions are LRUs, so a
+    worker's memory doesn't grow with every size it builds. Ambient
+    occlusion is baked in this process, as the pool already uses every core.
+
+    Returns:
+    float: Build time in seconds.
+    """
+    start = time.perf_counter()
+    occlusion.default_workers = 1
+    util.publish_dirs[:] = []
+    util.BUDGETS[os.path.basename(export_path)] = util.BUDGETS.get(util.MODELS[script])
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runpy.run_path(os.path.join(here, script),
+                           init_globals={"params": params, "export_path": export_path},
+                           run_name="__main__")
+    finally:
+        # Nothing reports a worker's spans, and they add up build after build
+        profiler.events.clear()
+    return time.perf_counter() - start
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    # Mark the entry as recently used for prune_disk
+    os.utime(path)
+    return data
+
+
+def prune_disk(model_dir, max_bytes):
+    """Delete the least recently used built models until the total fits max_bytes."""
+    paths = glob.glob(os.path.join(model_dir, "model_*.glb"))
+    entries = sorted((os.stat(p).st_mtime, os.path.getsize(p), p) for p in paths)
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+
+
+class MemoryCache:
+    """LRU of GLB bytes by key, bounded by total size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+
+    def get(self, key):
+        data = self.entries.get(key)
+        if data is not None:
+            self.entries.move_to_end(key)
+        return data
+
+    def put(self, key, data):
+        if key in self.entries:
+            self.bytes -= len(self.entries.pop(key))
+        self.entries[key] = data
+        self.bytes += len(data)
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= len(evicted)
+
+
+class ModelServer:
+    """
+    The HTTP front end, caches and build pool.
+
+    Parameters:
+    workers (int): Build processes, default every core.
+    memory_bytes (int): Size of the in-memory LRU.
+    disk_bytes (int): Size of the on-disk LRU.
+    model_dir (str): Where built models are kept, cache/ by default.
+    """
+
+    def __init__(self, workers=None, memory_bytes=256 * 1024 * 1024, disk_bytes=2 * 1024 ** 3,
+                 model_dir=util.cache_dir):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(self.workers)
+        self.memory = MemoryCache(memory_bytes)
+        self.disk_bytes = disk_bytes
+        self.model_dir = model_dir
+        self.pending = {}
+        self.stats = Counter()
+        self.build_seconds = 0.0
+        self.source = source_digest()
+        self.scripts = {glb: script for script, glb in util.MODELS.items()}
+
+    async def start(self, host="127.0.0.1", port=8100):
+        """Warm up the pool and start listening. Returns the asyncio server."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, warm_up)
+                               for _ in range(self.workers)))
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    async def get_model(self, script, params):
+        """
+        Return (key, GLB bytes, source) for a model, building it if needed.
+
+        Raises:
+        Whatever the build raised, e.g. budget.BudgetExceeded.
+        """
+        key = model_key(script, params, self.source)
+        data = self.memory.get(key)
+        if data is not None:
+            return key, data, "memory"
+        if key in self.pending:
+            return key, await asyncio.shield(self.pending[key]), "coalesced"
+
+        loop = asyncio.get_running_loop()
+        future = self.pending[key] = loop.create_future()
+        os.makedirs(self.model_dir, exist_ok=True)
+        path = os.path.join(self.model_dir, f"model_{key}.glb")
+        try:
+            if os.path.exists(path):
+                data = await loop.run_in_executor(None, read_file, path)
+                source = "disk"
+            else:
+                self.build_seconds += await loop.run_in_executor(
+                    self.pool, build_model, script, params, path)
+                data = await loop.run_in_executor(None, read_file, path)
+                await loop.run_in_executor(None, prune_disk, self.model_dir, self.disk_bytes)
+                source = "build"
+        except asyncio.CancelledError:
+            # The request that started the build went away. Requests
+            # coalesced onto it get an error response rather than having
+            # their own handlers cancelled.
+            future.set_exception(RuntimeError(f"build of {script} was cancelled"))
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting; don't let asyncio report it as unhandled
+            future.exception()
+            raise
+        else:
+            self.memory.put(key, data)
+            future.set_result(data)
+        finally:
+            del self.pending[key]
+        return key, data, source
+
+    async def respond(self, method, target, headers):
+        """Return (status, headers, body) for one request."""
+        url = urlsplit(target)
+        if url.path == "/stats":
+            stats = dict(self.stats, pending=len(self.pending), memory_entries=len(self.memory.entries),
+                         memory_bytes=self.memory.bytes, build_seconds=round(self.build_seconds, 3))
+            return 200, {"Content-Type": "application/json"}, json.dumps(stats).encode()
+
+        name = unquote(url.path).rpartition("/models/")[2]
+        if not url.path.startswith("/models/") or name not in self.scripts:
+            return 404, {}, b"unknown model\n"
+        if method != "GET":
+            return 405, {"Allow": "GET"}, b""
+
+        script = self.scripts[name]
+        try:
+            params = util.model_params(script, {k: parse_value(v) for k, v in parse_qsl(url.query)})
+        except ValueError as e:
+            return 400, {}, f"{e}\n".encode()
+
+        try:
+            key, data, source = await self.get_model(script, params)
+        except Exception as e:
+            self.stats["errors"] += 1
+            return 500, {}, f"{script} failed: {e}\n".encode()
+        self.stats[source] += 1
+
+        etag = f'"{key}"'
+        response_headers = {"Content-Type": "model/gltf-binary", "ETag": etag,
+                            "Cache-Control": "no-cache", "X-Cache": source}
+        if headers.get("if-none-match") == etag:
+            return 304, response_headers, b""
+        return 200, response_headers, data
+
+    async def handle(self, reader, writer):
+        """Serve one HTTP/1.1 request per connection."""
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if len(request_line) != 3:
+                status, response_headers, body = 400, {}, b"bad request line\n"
+            else:
+                status, response_headers, body = await self.respond(*request_line[:2], headers)
+
+            head = [f"HTTP/1.1 {status} {REASONS[status]}",
+                    f"Content-Length: {len(body)}",
+                    "Access-Control-Allow-Origin: *",
+                    "Connection: close"]
+            head += [f"{name}: {value}" for name, value in response_headers.items()]
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host, port, workers, memory_bytes):
+    server = ModelServer(workers, memory_bytes)
+    try:
+        listener = await server.start(host, port)
+        print(f"Serving models on http://{host}:{port}/models/ with {server.workers} workers")
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--workers", type=int, help="build processes, default every core")
+    parser.add_argument("--memory-mb", type=int, default=256, help="in-memory cache size")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.memory_mb * 1024 * 1024))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,437 @@
+"""
+Offline ambient occlusion for static geometry.
+
+Walls, floors and enclosure panels don't move, so their contact shadows
+can be baked once at build time instead of being rendered with shadows or
+SSAO on phones and headsets. Every vertex of the selected nodes casts a
+cosine-weighted hemisphere of rays against the rest of the scene, and the
+result is written as per-vertex colour (glTF COLOR_0), which viewers
+multiply into the base colour with no runtime cost.
+
+Large flat faces need extra vertices to carry the shading, but only where
+it changes. Nodes are tessellated coarsely first, and triangles whose
+corners differ by more than a tolerance are split again and again until
+the occlusion across them is smooth or they reach a minimum size. A wall
+gets dense vertices along the corners and the parts standing on it, and
+stays a few large triangles everywhere else.
+
+Rays are cast in NumPy batches through trimesh's ray interface, which
+uses Embree's BVH when embreex is installed. Large bakes are split across
+all cores, and results are cached in cache/ per node, by a hash of the
+geometry, its placement, the occluders within reach of it and the bake
+settings. Changing one part of a model only rebakes the nodes near it.
+
+Usage in a model script, before exporting:
+
+    bake_ambient_occlusion(new_scene, ["floor", "rearwall"], min_edge=250)
+"""
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from profiler import span
+from visibility import _drawable_nodes, _is_transparent
+
+# Rays per intersector call
+RAY_BATCH = 65536
+# Below this many rays a worker pool costs more than it saves
+PARALLEL_RAYS = 500000
+
+# Processes for large bakes when the caller doesn't say; None means every
+# core. modelserver.py sets 1, since its builds already run in a pool.
+default_workers = None
+
+# Set in worker processes by _init_worker
+_intersector = None
+
+
+class StaleCache(Exception):
+    """A cached bake doesn't fit the tessellation it is replayed on."""
+
+
+def tessellate(mesh, max_edge):
+    """
+    Split a mesh so that no edge is longer than max_edge.
+
+    Vertices are split along hard edges first, so each flat side of a box
+    gets its own vertices and normal, and UVs and explicit vertex normals
+    are interpolated onto the new vertices.
+
+    Returns:
+    (trimesh.Trimesh, np.ndarray): The tessellated mesh (without visuals,
+    with vertex normals if the mesh had explicit ones) and, per vertex,
+    the normal of the original face it came from.
+    """
+    import trimesh
+
+    corners = mesh.triangles
+    vertices, faces, source = trimesh.remesh.subdivide_to_size(
+        corners.reshape(-1, 3), np.arange(len(corners) * 3).reshape(-1, 3),
+        max_edge=max_edge, return_index=True)
+
+    # Original face of every new vertex, and its barycentric position there
+    vertex_face = np.zeros(len(vertices), dtype=np.int64)
+    vertex_face[faces.ravel()] = np.repeat(source, 3)
+    barycentric = trimesh.triangles.points_to_barycentric(corners[vertex_face], vertices)
+
+    normals = mesh.face_normals[vertex_face]
+
+    explicit = None
+    if "vertex_normals" in mesh._cache:
+        explicit = unit_normals(np.einsum("vk,vkd->vd", barycentric,
+                                          mesh.vertex_normals[mesh.faces][vertex_face]), normals)
+
+    uv = getattr(mesh.visual, "uv", None)
+    if uv is not None and len(uv) == len(mesh.vertices):
+        uv = np.einsum("vk,vkd->vd", barycentric, uv[mesh.faces][vertex_face])
+    else:
+        uv = None
+
+    # Weld vertices shared by subdivided triangles of the same flat side
+    key = [vertices, normals] + [a for a in (explicit, uv) if a is not None]
+    _, first, inverse = np.unique(np.round(np.hstack(key), 6), axis=0,
+                                  return_index=True, return_inverse=True)
+    result = trimesh.Trimesh(vertices[first], inverse.reshape(-1)[faces], process=False)
+    if uv is not None:
+        result.visual = trimesh.visual.TextureVisuals(uv=uv[first])
+    if explicit is not None:
+        result.vertex_normals = explicit[first]
+    return result, normals[first]
+
+
+def unit_normals(normals, fallback):
+    """
+    Normalize interpolated normals.
+
+    Where they cancel out, e.g. halfway across a panel's thin wall between
+    its front and back normals, the fallback normal is used instead.
+    """
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    return np.where(length > 1e-6, normals / np.maximum(length, 1e-12), fallback)
+
+
+def refine(vertices, faces, attributes, marked):
+    """
+    Split marked triangles in four without leaving T-junctions.
+
+    A neighbour that ends up with one split edge is split in two, and one
+    with more is split in four as well. Edges are matched by position, so
+    the copies of a vertex along a hard edge are split together.
+
+    Parameters:
+    vertices (np.ndarray): (n, 3) positions.
+    faces (np.ndarray): (m, 3) vertex indices.
+    attributes (list): Other (n, d) per-vertex arrays, interpolated onto
+        the new vertices.
+    marked (np.ndarray): (m,) boolean, the triangles to split.
+
+    Returns:
+    (np.ndarray, np.ndarray, list): Vertices, faces and attributes, with
+    the original vertices first and in their original order.
+    """
+    _, position = np.unique(np.round(vertices, 6), axis=0, return_inverse=True)
+    position = position.reshape(-1)
+    # Edge k of a face runs from corner k to corner k + 1
+    ends = np.stack([faces, np.roll(faces, -1, axis=1)], axis=2)
+    _, edge = np.unique(np.sort(position[ends], axis=2).reshape(-1, 2), axis=0,
+                        return_inverse=True)
+    edge = edge.reshape(-1, 3)
+
+    split = np.zeros(edge.max() + 1, dtype=bool)
+    marked = marked.copy()
+    while True:
+        split[edge[marked]] = True
+        grow = ~marked & (split[edge].sum(axis=1) > 1)
+        if not grow.any():
+            break
+        marked |= grow
+
+    # A new vertex in the middle of every split edge, one per side of it
+    cut = split[edge]
+    pairs, slot = np.unique(np.sort(ends[cut], axis=1), axis=0, return_inverse=True)
+    middle = np.full(faces.shape, -1)
+    middle[cut] = len(vertices) + slot.reshape(-1)
+    vertices = np.vstack([vertices, vertices[pairs].mean(axis=1)])
+    attributes = [np.vstack([values, values[pairs].mean(axis=1)]) for values in attributes]
+
+    v0, v1, v2 = faces.T
+    m0, m1, m2 = middle.T
+    new = [np.column_stack(corners)[marked]
+           for corners in ((v0, m0, m2), (m0, v1, m1), (m2, m1, v2), (m0, m1, m2))]
+    # Split the others across their one split edge, from the opposite corner
+    green = np.nonzero(~marked & cut.any(axis=1))[0]
+    k = cut[green].argmax(axis=1)
+    a, b, c = (faces[green, (k + i) % 3] for i in range(3))
+    m = middle[green, k]
+    new += [np.column_stack([a, m, c]), np.column_stack([m, b, c])]
+    faces = np.vstack([faces[~marked & ~cut.any(axis=1)]] + new)
+    return vertices, faces, attributes
+
+
+def hemisphere_directions(normals, samples, seed=0):
+    """
+    Cosine-weighted ray directions around each normal.
+
+    A fixed stratified pattern is rotated by a random angle per vertex so
+    neighbouring vertices don't band together.
+
+    Returns:
+    np.ndarray: (len(normals), samples, 3) unit directions.
+    """
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(samples)))
+    u = (np.arange(samples) % side + 0.5) / side
+    v = (np.arange(samples) // side + 0.5) / side
+    r, phi = np.sqrt(u), 2 * np.pi * v
+    local = np.column_stack([r * np.cos(phi), r * np.sin(phi), np.sqrt(1 - u)])
+
+    # Tangent frame per normal, twisted by a random angle
+    helper = np.where(np.abs(normals[:, :1]) < 0.9, [[1.0, 0, 0]], [[0, 1.0, 0]])
+    tangent = np.cross(normals, helper)
+    tangent /= np.linalg.norm(tangent, axis=1, keepdims=True)
+    bitangent = np.cross(normals, tangent)
+    twist = rng.uniform(0, 2 * np.pi, len(normals))[:, None]
+    tangent, bitangent = (np.cos(twist) * tangent + np.sin(twist) * bitangent,
+                          np.cos(twist) * bitangent - np.sin(twist) * tangent)
+    return (local[None, :, :1] * tangent[:, None] + local[None, :, 1:2] * bitangent[:, None]
+            + local[None, :, 2:] * normals[:, None])
+
+
+def _init_worker(triangles):
+    global _intersector
+    _intersector = _build_intersector(triangles)
+
+
+def _build_intersector(triangles):
+    import trimesh
+    occluders = trimesh.Trimesh(**trimesh.triangles.to_kwargs(triangles), process=False)
+    return occluders.ray
+
+
+def _occluded(origins, directions, max_distance, intersector=None):
+    """Boolean per ray: does it hit anything within max_distance?"""
+    intersector = intersector or _intersector
+    hit = np.zeros(len(origins), dtype=bool)
+    for start in range(0, len(origins), RAY_BATCH):
+        o = origins[start:start + RAY_BATCH]
+        d = directions[start:start + RAY_BATCH]
+        locations, ray_index, _ = intersector.intersects_location(o, d, multiple_hits=False)
+        distance = np.linalg.norm(locations - o[ray_index], axis=1)
+        hit[start + ray_index[distance < max_distance]] = True
+    return hit
+
+
+def vertex_occlusion(vertices, normals, triangles, samples=64, max_distance=600.0, workers=None):
+    """
+    Ambient occlusion per vertex against a set of occluding triangles.
+
+    Parameters:
+    vertices (np.ndarray): (n, 3) world-space positions.
+    normals (np.ndarray): (n, 3) world-space unit normals.
+    triangles (np.ndarray): (m, 3, 3) world-space occluders.
+    samples (int): Rays per vertex.
+    max_distance (float): Hits further away than this don't occlude.
+    workers (int): Processes to use; defaults to default_workers.
+
+    Returns:
+    np.ndarray: (n,) visibility in [0, 1], 1 meaning fully open.
+    """
+    scale = np.ptp(triangles.reshape(-1, 3), axis=0).max()
+    directions = hemisphere_directions(normals, samples).reshape(-1, 3)
+    origins = np.repeat(vertices + normals * 1e-4 * scale, samples, axis=0)
+
+    workers = workers or default_workers or os.cpu_count() or 1
+    if workers > 1 and len(origins) > PARALLEL_RAYS:
+        chunks = np.array_split(np.arange(len(origins)), workers * 4)
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(triangles,)) as pool:
+            results = pool.map(_occluded, [origins[c] for c in chunks],
+                               [directions[c] for c in chunks], [max_distance] * len(chunks))
+            hit = np.concatenate(list(results))
+    else:
+        hit = _occluded(origins, directions, max_distance, _build_intersector(triangles))
+    return 1.0 - hit.reshape(-1, samples).mean(axis=1)
+
+
+def _cache_key(mesh, transform, triangles, settings):
+    digest = hashlib.sha256()
+    arrays = [mesh.vertices, mesh.faces, transform, triangles]
+    if "vertex_normals" in mesh._cache:
+        arrays.append(mesh.vertex_normals)
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+    digest.update(repr(sorted(settings.items())).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _within(triangles, bounds, distance):
+    """The triangles whose bounding boxes come within distance of a (2, 3) box."""
+    low, high = np.asarray(bounds[0]) - distance, np.asarray(bounds[1]) + distance
+    near = np.all((triangles.max(axis=1) >= low) & (triangles.min(axis=1) <= high), axis=1)
+    return triangles[near]
+
+
+def adaptive_occlusion(mesh, transform, triangles, max_edge=2000.0, min_edge=250.0,
+                       tolerance=0.05, samples=64, max_distance=600.0, workers=None,
+                       known=None):
+    """
+    Tessellate a mesh where its ambient occlusion changes, and bake it.
+
+    The mesh is first tessellated to max_edge. Then every triangle whose
+    corners differ in visibility by more than tolerance is split (see
+    refine), and only the new vertices are baked, until no triangle needs
+    splitting or its edges would fall below min_edge.
+
+    Parameters:
+    mesh (trimesh.Trimesh): The mesh, in its own frame.
+    transform (np.ndarray): (4, 4) placement of the mesh in the scene.
+    triangles (np.ndarray): (m, 3, 3) world-space occluders.
+    known (np.ndarray): Visibility of every vertex from an earlier bake
+        with the same inputs. The same mesh is rebuilt from it without
+        casting any rays; StaleCache is raised if it doesn't fit.
+
+    Returns:
+    (trimesh.Trimesh, np.ndarray): The tessellated mesh (without colours,
+    with normals if the mesh had explicit ones) and its per-vertex
+    visibility in [0, 1].
+    """
+    import trimesh
+
+    base, normals = tessellate(mesh, max_edge)
+    vertices, faces = np.asarray(base.vertices), np.asarray(base.faces)
+    uv = getattr(base.visual, "uv", None)
+    explicit = "vertex_normals" in base._cache
+    # Face normals, then any explicit normals and UVs
+    attributes = [normals]
+    if explicit:
+        attributes.append(np.asarray(base.vertex_normals))
+    if uv is not None:
+        attributes.append(np.asarray(uv))
+
+    def occlusion(start):
+        # Visibility of vertices[start:], replayed or baked
+        if known is not None:
+            if len(known) < len(vertices):
+                raise StaleCache()
+            return known[start:len(vertices)]
+        if not len(triangles):
+            return np.ones(len(vertices) - start)
+        world = trimesh.transformations.transform_points(vertices[start:], transform)
+        world_normals = attributes[0][start:] @ transform[:3, :3].T
+        world_normals /= np.linalg.norm(world_normals, axis=1, keepdims=True)
+        return vertex_occlusion(world, world_normals, triangles, samples, max_distance, workers)
+
+    ao = occlusion(0)
+    while True:
+        edges = vertices[faces] - vertices[np.roll(faces, -1, axis=1)]
+        longest = np.linalg.norm(edges, axis=2).max(axis=1)
+        marked = (np.ptp(ao[faces], axis=1) > tolerance) & (longest >= 2 * min_edge)
+        if not marked.any():
+            break
+        start = len(vertices)
+        vertices, faces, attributes = refine(vertices, faces, attributes, marked)
+        attributes[0] /= np.linalg.norm(attributes[0], axis=1, keepdims=True)
+        if explicit:
+            attributes[1] = unit_normals(attributes[1], attributes[0])
+        ao = np.concatenate([ao, occlusion(start)])
+
+    if known is not None and len(known) != len(vertices):
+        raise StaleCache()
+
+    result = trimesh.Trimesh(vertices, faces, process=False)
+    if uv is not None:
+        result.visual = trimesh.visual.TextureVisuals(uv=attributes[-1])
+    if explicit:
+        # Keep exporting the mesh's own normals (see util.Node.visual)
+        result.vertex_normals = attributes[1]
+    return result, ao
+
+
+@span("bake_ambient_occlusion", "lighting")
+def bake_ambient_occlusion(scene, nodes, max_edge=2000.0, min_edge=500.0, tolerance=0.05,
+                           samples=64, max_distance=600.0, strength=0.8, workers=None):
+    """
+    Bake ambient occlusion into the vertex colours of static nodes, in place.
+
+    Parameters:
+    scene (trimesh.Scene): The assembled scene.
+    nodes (list): Names of the static nodes to bake.
+    max_edge (float): Longest edge of the first, uniform tessellation.
+    min_edge (float): Shortest edge adaptive refinement may create;
+        smaller is sharper near contacts and costs more vertices.
+    tolerance (float): Largest difference in visibility left across a
+        triangle that could still be split.
+    samples (int): Rays per vertex.
+    max_distance (float): Occluders further away than this are ignored.
+    strength (float): 0 leaves colours untouched, 1 turns fully occluded
+        vertices black.
+    workers (int): Processes to use; defaults to default_workers.
+
+    Returns:
+    dict: {node: {"vertices": n, "mean_ao": mean visibility, "cached": bool}}
+    """
+    import trimesh
+    from util import cache_path
+
+    # Everything opaque that is drawn casts occlusion; glass doesn't
+    triangles = np.concatenate([
+        trimesh.transformations.transform_points(mesh.vertices, transform)[mesh.faces]
+        for _, transform, _, mesh in _drawable_nodes(scene) if not _is_transparent(mesh)
+    ])
+    settings = {"max_edge": max_edge, "min_edge": min_edge, "tolerance": tolerance,
+                "samples": samples, "max_distance": max_distance}
+
+    world_before = {node: scene.graph[node][0] for node in scene.graph.nodes_geometry}
+    report = {}
+    for node in nodes:
+        transform, geometry_name = scene.graph[node]
+        mesh = scene.geometry[geometry_name]
+
+        # Only occluders within max_distance of the node can shade it, so
+        # they are all the bake needs and all its cache entry depends on
+        world = trimesh.transformations.transform_points(mesh.vertices, transform)
+        nearby = _within(triangles, [world.min(axis=0), world.max(axis=0)], max_distance)
+        filename = cache_path(f"ao_{_cache_key(mesh, transform, nearby, settings)}.npy")
+        bake_settings = (max_edge, min_edge, tolerance, samples, max_distance, workers)
+        cached = os.path.exists(filename)
+        try:
+            known = np.load(filename) if cached else None
+            baked, ao = adaptive_occlusion(mesh, transform, nearby, *bake_settings, known)
+        except StaleCache:
+            # Written by an earlier version of the tessellation
+            cached = False
+            baked, ao = adaptive_occlusion(mesh, transform, nearby, *bake_settings)
+        if not cached:
+            np.save(filename, ao)
+
+        shade = np.round(255 * (1 - strength * (1 - ao))).astype(np.uint8)
+        colors = np.column_stack([shade, shade, shade, np.full(len(shade), 255, np.uint8)])
+        material = getattr(mesh.visual, "material", None)
+        if not isinstance(baked.visual, trimesh.visual.TextureVisuals):
+            baked.visual = trimesh.visual.TextureVisuals()
+        if material is not None:
+            baked.visual.material = material
+        baked.visual.vertex_attributes["color"] = colors
+        baked.metadata.update(mesh.metadata)
+
+        # A geometry shared with other nodes gets its own baked copy.
+        # graph.update replaces the edge's attributes, so pass its matrix
+        # and metadata back in with the new geometry.
+        if len(scene.graph.geometry_nodes[geometry_name]) > 1:
+            parent = scene.graph.transforms.parents[node]
+            edge = scene.graph.transforms.edge_data[(parent, node)]
+            geometry_name = f"{node}_ao"
+            scene.geometry[geometry_name] = baked
+            scene.graph.update(frame_from=parent, frame_to=node, geometry=geometry_name,
+                               matrix=edge.get("matrix"), metadata=edge.get("metadata", {}))
+        else:
+            scene.geometry[geometry_name] = baked
+        report[node] = {"vertices": len(baked.vertices), "mean_ao": float(ao.mean()),
+                        "cached": cached}
+
+    moved = [node for node, matrix in world_before.items()
+             if not np.allclose(scene.graph[node][0], matrix)]
+    if moved:
+        raise RuntimeError(f"baking ambient occlusion moved {', '.join(sorted(moved))}")
+    return report
@@ -0,0 +1,202 @@
+"""
+Build profiler for the model scripts.
+
+Records wall time, CPU time, peak RSS growth and triangle/vertex counts for
+component builds, booleans, texture loads and exports. Spans are cheap and
+always collected; set PROFILE=1 to have the script write a Chrome trace
+(open it in chrome://tracing or https://ui.perfetto.dev) and print a
+summary table when it exits:
+
+    PROFILE=1 python3 lasercutter.py
+
+Usage in code:
+
+    with span("difference", "boolean") as s:
+        mesh = difference([a, b])
+        s.count(mesh)
+
+    @span("add_texture", "texture")
+    def add_texture(mesh, texture_filename): ...
+
+    step("walls", components)   # sequential phases of a script, no indenting
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import ContextDecorator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+events = []
+_t0 = time.perf_counter_ns()
+_current_step = None
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KB, or 0 where unavailable."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def mesh_counts(obj):
+    """Return (triangles, vertices) for a mesh, Node, scene or list of them."""
+    if obj is None:
+        return 0, 0
+    if isinstance(obj, dict):
+        obj = list(obj.values())
+    if isinstance(obj, (list, tuple)):
+        counts = [mesh_counts(o) for o in obj]
+        return sum(c[0] for c in counts), sum(c[1] for c in counts)
+    geometry = getattr(obj, "geometry", None)
+    if isinstance(geometry, dict):  # trimesh.Scene
+        return mesh_counts(list(geometry.values()))
+    if geometry is not None:  # util.Node
+        obj = geometry
+    faces = getattr(obj, "faces", None)
+    vertices = getattr(obj, "vertices", None)
+    if faces is None or vertices is None:
+        return 0, 0
+    return len(faces), len(vertices)
+
+
+class span(ContextDecorator):
+    """
+    Time a block or function.
+
+    Parameters:
+    name (str): Span name shown in the trace and summary.
+    category (str): Grouping, e.g. "component", "boolean", "texture", "export".
+
+    Used as a decorator, the triangles and vertices of the return value are
+    counted automatically; as a context manager call count() on the span.
+    """
+
+    def __init__(self, name, category="build"):
+        self.name = name
+        self.category = category
+        self._open = []
+
+    def __enter__(self):
+        self._open.append({
+            "wall": time.perf_counter_ns(),
+            "cpu": time.process_time_ns(),
+            "rss": peak_rss_kb(),
+            "triangles": 0,
+            "vertices": 0,
+        })
+        return self
+
+    def count(self, obj):
+        """Add the triangles and vertices of obj to the innermost open span."""
+        triangles, vertices = mesh_counts(obj)
+        self._open[-1]["triangles"] += triangles
+        self._open[-1]["vertices"] += vertices
+        return obj
+
+    def __exit__(self, *exc):
+        start = self._open.pop()
+        end = time.perf_counter_ns()
+        events.append({
+            "name": self.name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": (start["wall"] - _t0) / 1000,
+            "dur": (end - start["wall"]) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {
+                "cpu_ms": (time.process_time_ns() - start["cpu"]) / 1e6,
+                "rss_delta_kb": peak_rss_kb() - start["rss"],
+                "triangles": start["triangles"],
+                "vertices": start["vertices"],
+            },
+        })
+        return False
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self:
+                return self.count(func(*args, **kwargs))
+        return wrapper
+
+
+def step(name, components=None, category="component"):
+    """
+    Close the previous step of a script and open a new one.
+
+    If a components dict is passed, the step is credited with the triangles
+    of every component added to it while the step was open.
+    """
+    end_step()
+    global _current_step
+    s = span(name, category)
+    s.__enter__()
+    _current_step = (s, components, set(components) if components is not None else set())
+
+
+def end_step():
+    """Close the open step, if any."""
+    global _current_step
+    if _current_step is None:
+        return
+    s, components, before = _current_step
+    if components is not None:
+        s.count([v for k, v in components.items() if k not in before])
+    s.__exit__(None, None, None)
+    _current_step = None
+
+
+def summary():
+    """Aggregate recorded spans by name, slowest first."""
+    rows = {}
+    for e in events:
+        row = rows.setdefault((e["cat"], e["name"]), {
+            "calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "rss_delta_kb": 0,
+            "triangles": 0, "vertices": 0,
+        })
+        row["calls"] += 1
+        row["wall_ms"] += e["dur"] / 1000
+        row["cpu_ms"] += e["args"]["cpu_ms"]
+        row["rss_delta_kb"] += e["args"]["rss_delta_kb"]
+        row["triangles"] += e["args"]["triangles"]
+        row["vertices"] += e["args"]["vertices"]
+    return sorted(rows.items(), key=lambda item: -item[1]["wall_ms"])
+
+
+def print_summary():
+    print(f"\n{'category':<10}{'span':<28}{'calls':>6}{'wall ms':>10}{'cpu ms':>10}"
+          f"{'rss +KB':>10}{'tris':>10}{'verts':>10}")
+    for (category, name), row in summary():
+        print(f"{category:<10}{name:<28}{row['calls']:>6}{row['wall_ms']:>10.1f}"
+              f"{row['cpu_ms']:>10.1f}{row['rss_delta_kb']:>10}{row['triangles']:>10}"
+              f"{row['vertices']:>10}")
+
+
+def write_trace(path):
+    """Write recorded spans as Chrome trace JSON."""
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def _report_at_exit():
+    end_step()
+    script = os.path.splitext(os.path.basename(sys.argv[0] or "build"))[0]
+    path = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0] or ".")),
+                        f"{script}.trace.json")
+    write_trace(path)
+    print_summary()
+    print(f"Trace written to {path}")
+
+
+if os.environ.get("PROFILE"):
+    atexit.register(_report_at_exit)
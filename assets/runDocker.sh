@@ -1 +1 @@
-docker run -v $(pwd):/app --rm lasercutter:latest
\ No newline at end of file
+docker run -v $(pwd)/..:/repo -w /repo/assets --rm lasercutter:latest
\ No newline at end of file
@@ -0,0 +1,252 @@
+"""
+Procedural textures, generated with NumPy.
+
+Replaces createtextures.sh, which needed ImageMagick and produced new
+random noise on every run. Each texture here is a recipe in TEXTURES,
+seeded by its filename, so a rebuild writes byte-identical files and
+doesn't invalidate the asset caches or the watch daemon. Blurs and
+streaks are done with FFTs over a wrapping image, so every texture tiles
+seamlessly.
+
+For every texture the full-size image goes to textures/<name>, where
+add_texture finds it, and a mip chain (2x2 box filter in linear light,
+down to MIN_SIZE) goes to textures/mips/<stem>_<size>.<ext>. Builds for
+smaller devices pick a mip with TEXTURE_SIZE (see util.texture_image).
+
+Usage:
+    python3 texturegen.py [name ...] [--seed N] [--workers N] [--force]
+
+Textures newer than this script are left alone unless --force is given.
+"""
+import argparse
+import io
+import os
+import re
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from util import here, write_atomic
+
+texture_dir = os.path.join(here, "textures")
+mip_dir = os.path.join(texture_dir, "mips")
+
+# Smallest mip written, in pixels along the shorter side
+MIN_SIZE = 16
+GAMMA = 2.2
+
+# size: (width, height); base: grey level; noise: uniform noise amplitude;
+# blur: gaussian sigma in pixels; streak: (sigma, angle in degrees) of a
+# one-sided motion blur; stripes: period of dark vertical lines; normalize:
+# stretch the result to the full range; brightness: scale afterwards;
+# color: RGB tint, otherwise the texture is greyscale; quality: JPEG
+# quality, default 90.
+#
+# Sizes and qualities keep every texture no larger than the ImageMagick
+# file it replaced; check with
+#     git show 8656218:assets/textures/<name> | wc -c
+TEXTURES = {
+    # Brushed finish for the main enclosure
+    "metal.jpg": {"size": (512, 512), "base": 0.70, "noise": 0.3, "blur": 0.5,
+                  "streak": (20, 0), "quality": 72},
+    # Lighter aluminium for the cutting bed
+    "aluminum.jpg": {"size": (512, 512), "base": 0.85, "noise": 0.2, "blur": 0.3,
+                     "streak": (15, 0), "brightness": 1.1, "quality": 75},
+    # Darker steel for the laser tube
+    "steel.jpg": {"size": (512, 512), "base": 0.50, "noise": 0.4, "blur": 0.5,
+                  "streak": (25, 45), "brightness": 0.9, "quality": 85},
+    # Linear grooves along the rails; pixel noise and grooves compress
+    # badly, so this one is half size
+    "rail.jpg": {"size": (256, 256), "base": 0.60, "noise": 0.3, "stripes": 4,
+                 "quality": 80},
+    # Matte plastic for the control panel
+    "panel.jpg": {"size": (512, 512), "base": 0.75, "noise": 0.15, "blur": 1.0,
+                  "brightness": 0.95, "quality": 86},
+    # Slightly glossy plastic for buttons
+    "button.jpg": {"size": (128, 128), "base": 0.80, "noise": 0.1, "blur": 0.5,
+                   "brightness": 1.05, "quality": 86},
+    # Black rubber for cables and the exhaust hose
+    "cable.jpg": {"size": (256, 256), "base": 0.20, "noise": 0.2, "blur": 0.5,
+                  "brightness": 0.8},
+    # Near-white glass for the lens
+    "lens.png": {"size": (256, 256), "base": 0.98, "noise": 0.02, "blur": 0.2,
+                 "normalize": False},
+    # Lit teal display
+    "lcd.png": {"size": (64, 32), "base": 1.0, "noise": 0.02, "blur": 0.3,
+                "normalize": False, "color": (0.29, 1.0, 0.73)},
+    # Off-white background for printed text
+    "logo.png": {"size": (512, 128), "base": 0.97, "noise": 0.02, "normalize": False},
+}
+
+
+def _frequencies(shape):
+    h, w = shape
+    return np.fft.fftfreq(h)[:, None], np.fft.rfftfreq(w)[None, :]
+
+
+def gaussian_blur(image, sigma_x, sigma_y=None):
+    """Wrapping gaussian blur with separate sigmas along x and y."""
+    sigma_y = sigma_x if sigma_y is None else sigma_y
+    if sigma_x <= 0 and sigma_y <= 0:
+        return image
+    fy, fx = _frequencies(image.shape)
+    response = np.exp(-2 * np.pi ** 2 * ((sigma_x * fx) ** 2 + (sigma_y * fy) ** 2))
+    return np.fft.irfft2(np.fft.rfft2(image) * response, s=image.shape)
+
+
+def motion_blur(image, sigma, angle):
+    """Wrapping one-sided motion blur, like ImageMagick's -motion-blur 0xSIGMA+ANGLE."""
+    h, w = image.shape
+    t = np.arange(int(np.ceil(3 * sigma)) + 1)
+    weight = np.exp(-t ** 2 / (2 * sigma ** 2))
+    theta = np.radians(angle)
+    x = np.round(t * np.cos(theta)).astype(int) % w
+    y = np.round(-t * np.sin(theta)).astype(int) % h
+    kernel = np.zeros((h, w))
+    np.add.at(kernel, (y, x), weight)
+    kernel /= kernel.sum()
+    return np.fft.irfft2(np.fft.rfft2(image) * np.fft.rfft2(kernel), s=image.shape)
+
+
+def texture_seed(name, seed=0):
+    """Stable per-texture seed; Python's hash() is salted per process."""
+    return zlib.crc32(name.encode("utf-8")) ^ seed
+
+
+def render(name, recipe, seed=0):
+    """
+    Render one recipe at full size.
+
+    Returns:
+    np.ndarray: (height, width) or (height, width, 3) floats in [0, 1].
+    """
+    width, height = recipe["size"]
+    rng = np.random.default_rng(texture_seed(name, seed))
+    image = recipe["base"] + recipe["noise"] * rng.uniform(-0.5, 0.5, (height, width))
+
+    if "stripes" in recipe:
+        lines = np.where(np.arange(width) % recipe["stripes"] == 0, 0.5, 1.0)
+        image *= gaussian_blur(np.tile(lines, (height, 1)), 1.0, 0.0)
+    image = gaussian_blur(image, recipe.get("blur", 0))
+    if "streak" in recipe:
+        image = motion_blur(image, *recipe["streak"])
+
+    if recipe.get("normalize", True):
+        # Like -normalize: clip the darkest 2% and brightest 1%
+        low, high = np.percentile(image, [2, 99])
+        image = (image - low) / max(high - low, 1e-8)
+    image = np.clip(image * recipe.get("brightness", 1.0), 0, 1)
+    if "color" in recipe:
+        image = image[..., None] * np.asarray(recipe["color"])
+    return image
+
+
+def mip_chain(image):
+    """Halve an image until its shorter side reaches MIN_SIZE, averaging in linear light."""
+    levels = [image]
+    linear = image ** GAMMA
+    while min(linear.shape[:2]) // 2 >= MIN_SIZE:
+        h, w = linear.shape[0] // 2 * 2, linear.shape[1] // 2 * 2
+        linear = linear[:h, :w]
+        linear = (linear[0::2, 0::2] + linear[1::2, 0::2]
+                  + linear[0::2, 1::2] + linear[1::2, 1::2]) / 4
+        levels.append(linear ** (1 / GAMMA))
+    return levels
+
+
+def encode(image, filename, quality=90):
+    """Quantize and encode an image in the format its extension names."""
+    pixels = np.round(image * 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    img = Image.fromarray(pixels, "RGB" if pixels.ndim == 3 else "L")
+    if filename.lower().endswith((".jpg", ".jpeg")):
+        img.save(buffer, "JPEG", quality=quality)
+    else:
+        img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def mip_filename(name, size):
+    stem, ext = os.path.splitext(name)
+    return os.path.join(mip_dir, f"{stem}_{size}{ext}")
+
+
+def write_if_changed(path, data):
+    """Leave identical files untouched so their mtimes don't trigger rebuilds."""
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    write_atomic(path, data)
+    return True
+
+
+def generate(name, seed=0):
+    """
+    Render a texture and its mips and write them into textures/.
+
+    Returns:
+    (str, list): The name and the list of (path, changed) written.
+    """
+    recipe = TEXTURES[name]
+    levels = mip_chain(render(name, recipe, seed))
+    written = []
+    for level, image in enumerate(levels):
+        if level == 0:
+            path = os.path.join(texture_dir, name)
+        else:
+            path = mip_filename(name, max(image.shape[:2]))
+        data = encode(image, name, recipe.get("quality", 90))
+        written.append((path, write_if_changed(path, data)))
+
+    # Mips from a larger size of the recipe would otherwise still be picked
+    stem, ext = os.path.splitext(name)
+    pattern = re.compile(re.escape(stem) + r"_\d+" + re.escape(ext))
+    for filename in os.listdir(mip_dir):
+        path = os.path.join(mip_dir, filename)
+        if pattern.fullmatch(filename) and path not in dict(written):
+            os.remove(path)
+    return name, written
+
+
+def generate_all(names=None, seed=0, workers=None):
+    """
+    Generate textures, in parallel across processes when there are several cores.
+
+    Returns:
+    dict: {name: [(path, changed), ...]}
+    """
+    names = list(names or TEXTURES)
+    os.makedirs(mip_dir, exist_ok=True)
+    workers = min(workers or os.cpu_count() or 1, len(names))
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            results = pool.map(generate, names, [seed] * len(names))
+            return dict(results)
+    return dict(generate(name, seed) for name in names)
+
+
+def up_to_date(name):
+    path = os.path.join(texture_dir, name)
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(__file__)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("names", nargs="*", help="textures to generate, default all")
+    parser.add_argument("--seed", type=int, default=0, help="varies every texture's noise")
+    parser.add_argument("--workers", type=int, help="processes to use, default every core")
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    names = args.names or list(TEXTURES)
+    if not args.force:
+        names = [name for name in names if not up_to_date(name)]
+    if not names:
+        print("Textures are up to date")
+    else:
+        for name, written in generate_all(names, args.seed, args.workers).items():
+            changed = sum(c for _, c in written)
+            print(f"{name}: {len(written)} levels, {changed} changed")
@@ -1,68 +1,333 @@
-import trimesh
 import numpy as np
-from shapely.geometry import Polygon, MultiPolygon
-from PIL import ImageFont, Image, ImageDraw
-from shapely.ops import unary_union
-from trimesh.visual.texture import SimpleMaterial, TextureVisuals
 import hashlib
-import pickle
-from trimesh.transformations import rotation_matrix, translation_matrix
 import os
+from collections import OrderedDict
+from profiler import span, step, end_step
 here = os.path.dirname(os.path.abspath(__file__))
-hash_obj = hashlib.sha256()
 
 cache_dir = os.path.join(here, "cache")
 
-# Create cache directory if it doesn't exist
-if not os.path.exists(cache_dir):
-    os.makedirs(cache_dir)
+# Heavy dependencies (trimesh, shapely, PIL) are imported inside the
+# helpers that use them, so tools that only need the model registry or a few
+# helpers don't pay for them at startup. Model scripts import what they use
+# themselves: `from util import *` does not provide trimesh, shapely or PIL.
 
 
-def rotate(mesh, angle=[0, 0, 0]):
+def cache_path(filename):
+    """Return a path inside cache/, creating the directory on first use."""
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, filename)
+
+# Model scripts in this folder and the GLB each one exports
+MODELS = {
+    "lasercutter.py": "laser_cutter.glb",
+    "dirtbike.py": "e_bike.glb",
+}
+
+# Parameters a model script reads from its `params` global, as
+# (default, minimum, maximum) in mm. Scripts fill in the defaults with
+# model_params; variants.py and modelserver.py build other values.
+MODEL_PARAMS = {
+    "lasercutter.py": {
+        "x": (2400, 500, 4000),
+        "y": (1400, 300, 3000),
+        "z": (1100, 300, 2000),
+        "wafer_diameter": (500, 50, 600),
+    },
+    "dirtbike.py": {},
+}
+
+def model_params(script, params=None):
     """
-    Rotate a trimesh object by specified angles (in degrees) about x, y, and z axes.
+    Fill in a model's default parameters and check the given ones.
 
     Parameters:
-    mesh (trimesh.Trimesh): The mesh to rotate.
-    angle (list or tuple): Rotation angles in degrees for [x, y, z] axes.
+    script (str): Model script, a key of MODEL_PARAMS.
+    params (dict): Overrides, e.g. {"x": 1000}.
 
     Returns:
-    trimesh.Trimesh: The rotated mesh.
+    dict: Every parameter of the model, in MODEL_PARAMS order.
+
+    Raises:
+    ValueError: for an unknown parameter, a non-number or one out of range.
     """
-    # Convert degrees to radians
-    angle_rad = np.radians(angle)
+    declared = MODEL_PARAMS.get(script, {})
+    params = dict(params or {})
+    unknown = set(params) - set(declared)
+    if unknown:
+        raise ValueError(f"{script} has no parameter {', '.join(sorted(unknown))}")
+    result = {}
+    for name, (default, low, high) in declared.items():
+        value = params.get(name, default)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{name} must be a number, not {value!r}")
+        if not low <= value <= high:
+            raise ValueError(f"{name} must be between {low} and {high}, not {value}")
+        result[name] = value
+    return result
 
-    # Define the origin for rotation (can be the mesh centroid or origin)
-    origin = [0,0,0]
+# Render budgets per exported model, checked by export_scene (see budget.py).
+# "fail" refuses to write a model over budget, "warn" only reports it.
+BUDGETS = {
+    "laser_cutter.glb": {
+        "draw_calls": 64,
+        "triangles": 50_000,
+        "texture_vram": 8 * 1024 * 1024,
+        "glb_bytes": 1024 * 1024,
+        "mode": "fail",
+    },
+    "e_bike.glb": {
+        "draw_calls": 48,
+        "triangles": 50_000,
+        "texture_vram": 8 * 1024 * 1024,
+        "glb_bytes": 1024 * 1024,
+        "mode": "fail",
+    },
+}
 
-    # Rotation about X axis
-    rot_x = rotation_matrix(angle_rad[0], [1, 0, 0], point=origin)
-    # Rotation about Y axis
-    rot_y = rotation_matrix(angle_rad[1], [0, 1, 0], point=origin)
-    # Rotation about Z axis
-    rot_z = rotation_matrix(angle_rad[2], [0, 0, 1], point=origin)
+# Largest texture side to use, for builds aimed at smaller devices. Textures
+# from texturegen.py have mips in textures/mips/; others are used as they are.
+texture_max_size = int(os.environ.get("TEXTURE_SIZE", 0)) or None
 
-    # Combine rotations (Z * Y * X order)
-    transform = rot_z @ rot_y @ rot_x
+# Also write each model as a .gltf with a buffer per top-level node and
+# external textures (see gltfsplit.py), so clients can fetch it in parallel
+# and cache it part by part.
+export_gltf = bool(os.environ.get("EXPORT_GLTF"))
 
-    # Apply the transformation
-    mesh.apply_transform(transform)
+# Rewrite every GLB into a canonical form (see canonical.py), so a rebuild
+# of an unchanged model gives identical bytes and caches can keep it.
+# REPRODUCIBLE=0 writes trimesh's own output instead.
+reproducible_export = os.environ.get("REPRODUCIBLE", "1") != "0"
+
+# Other web roots that serve the models built here. The XR app consumes the
+# same GLBs, so each model is built once and copied rather than forked.
+publish_dirs = [
+    os.path.join(here, "..", "xr", "public", "assets"),
+]
+
+
+class Node:
+    """
+    A geometry plus a pending 4x4 transform.
+
+    rotate, translate and center compose into the matrix instead of
+    rewriting every vertex, and export keeps the matrix as the glTF node
+    transform. The properties the helpers read (vertices, bounds, centroid)
+    are reported in the transformed frame, so UV generation and centering
+    behave exactly as they would on a baked mesh.
+
+    Nodes made with instance() share geometry and visuals; each keeps its
+    own transform, name and metadata, and exports as another glTF node
+    referencing the same mesh. Assigning a new visual to a shared node
+    gives it its own mesh object over the same vertex and face arrays.
+
+    Parameters:
+    geometry (trimesh.Trimesh): The untransformed mesh.
+    matrix (np.ndarray): Initial 4x4 transform, identity by default.
+    name (str): Optional instance name.
+    """
+
+    def __init__(self, geometry, matrix=None, name=None):
+        self.geometry = geometry
+        self.matrix = np.eye(4) if matrix is None else np.array(matrix, dtype=np.float64)
+        self.name = name
+        self.metadata = {}
+        self.shared = False
+
+    def instance(self, name=None):
+        """Return a new handle on the same geometry, starting from this transform."""
+        other = Node(self.geometry, self.matrix, name=name)
+        self.shared = other.shared = True
+        return other
+
+    def apply_transform(self, matrix):
+        self.matrix = np.asarray(matrix, dtype=np.float64) @ self.matrix
+        return self
+
+    def apply_translation(self, offset):
+        self.matrix[:3, 3] += offset
+        return self
+
+    def apply_scale(self, scaling):
+        scale = np.eye(4)
+        scale[:3, :3] *= np.broadcast_to(np.asarray(scaling, dtype=np.float64), 3)
+        return self.apply_transform(scale)
+
+    @property
+    def vertices(self):
+        return self.geometry.vertices @ self.matrix[:3, :3].T + self.matrix[:3, 3]
+
+    @property
+    def faces(self):
+        return self.geometry.faces
+
+    @property
+    def bounds(self):
+        v = self.vertices
+        return np.array([v.min(axis=0), v.max(axis=0)])
+
+    @property
+    def centroid(self):
+        return self.matrix[:3, :3] @ self.geometry.centroid + self.matrix[:3, 3]
+
+    @property
+    def visual(self):
+        return self.geometry.visual
+
+    @visual.setter
+    def visual(self, value):
+        if self.shared:
+            import trimesh
+            geometry = self.geometry
+            # Keep explicit normals (panels, lathes, sweeps); trimesh would
+            # otherwise average them across hard edges
+            normals = geometry._cache["vertex_normals"] if "vertex_normals" in geometry._cache else None
+            self.geometry = trimesh.Trimesh(vertices=geometry.vertices, faces=geometry.faces,
+                                            vertex_normals=normals,
+                                            metadata=dict(geometry.metadata), process=False)
+            self.shared = False
+        self.geometry.visual = value
+
+    def to_mesh(self):
+        """Return a copy of the geometry with the transform baked into its vertices."""
+        # With the cache, so explicit normals are copied and transformed too
+        mesh = self.geometry.copy(include_cache=True)
+        mesh.apply_transform(self.matrix)
+        return mesh
+
+def bake(component):
+    """Return a plain mesh for a Node, or the component itself otherwise."""
+    return component.to_mesh() if isinstance(component, Node) else component
+
+def concatenate(meshes):
+    """
+    Join meshes into one, like trimesh.util.concatenate.
+
+    trimesh hands back a plain copy of a single mesh, which drops explicit
+    vertex normals (sweeps, lathes, panels); this keeps them.
+    """
+    import trimesh
+
+    if len(meshes) == 1:
+        return meshes[0].copy(include_cache=True)
+    return trimesh.util.concatenate(meshes)
+
+def add_component(scene, name, component):
+    """
+    Add a mesh, Node or sub-scene to a scene under the given name.
+
+    A Node's matrix becomes the node transform, so its vertices are never
+    rewritten during the build. Nodes sharing geometry reference a single
+    mesh in the scene instead of each carrying a copy.
+    """
+    if isinstance(component, Node):
+        shared_name = next((key for key, geom in scene.geometry.items()
+                            if geom is component.geometry), None)
+        if shared_name is None:
+            scene.add_geometry(component.geometry, node_name=name, geom_name=name,
+                               transform=component.matrix, metadata=component.metadata)
+        else:
+            scene.graph.update(frame_to=name, frame_from=scene.graph.base_frame,
+                               matrix=component.matrix, geometry=shared_name,
+                               metadata=component.metadata)
+    else:
+        scene.add_geometry(component, node_name=name, geom_name=name)
+
+class LRUCache(OrderedDict):
+    """A dict that forgets its least recently used entries beyond max_entries."""
+
+    def __init__(self, max_entries):
+        super().__init__()
+        self.max_entries = max_entries
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.max_entries:
+            self.popitem(last=False)
+
+# Components built by shared_component, by name and inputs. They outlive a
+# single build, so every variant built in one process (see variants.py)
+# reuses the parts whose inputs it didn't change. Long-lived processes such
+# as modelserver.py build a new size on every request, so only the most
+# recently used are kept.
+_shared_components = LRUCache(512)
+
+def shared_component(name, build, *args, **kwargs):
+    """
+    Build a component once per distinct set of inputs and hand out instances.
+
+    build(*args, **kwargs) must depend on nothing but its arguments and
+    return a finished Node, visuals included: callers get instances over the
+    same geometry, so they may transform them freely but must not modify
+    the geometry or its visual in place (assigning a new visual is fine).
+
+    Parameters:
+    name (str): Component name, part of the cache key.
+    build (callable): Returns a Node or trimesh.Trimesh.
+
+    Returns:
+    Node: A new instance of the cached component.
+    """
+    key = (name, repr(args), repr(sorted(kwargs.items())))
+    if key not in _shared_components:
+        component = build(*args, **kwargs)
+        _shared_components[key] = component if isinstance(component, Node) else Node(component)
+    return _shared_components[key].instance()
+
+def rotation_xyz(angle):
+    """
+    4x4 rotation for [x, y, z] angles in degrees, applied X, then Y, then Z.
+
+    Built in closed form rather than multiplying three matrices.
+    """
+    ax, ay, az = np.radians(angle)
+    cx, sx = np.cos(ax), np.sin(ax)
+    cy, sy = np.cos(ay), np.sin(ay)
+    cz, sz = np.cos(az), np.sin(az)
+    transform = np.eye(4)
+    transform[:3, :3] = [
+        [cz * cy, cz * sy * sx - sz * cx, cz * sy * cx + sz * sx],
+        [sz * cy, sz * sy * sx + cz * cx, sz * sy * cx - cz * sx],
+        [-sy, cy * sx, cy * cx],
+    ]
+    return transform
+
+def rotate(mesh, angle=[0, 0, 0]):
+    """
+    Rotate a trimesh object by specified angles (in degrees) about x, y, and z axes.
+
+    Rotation is about the origin, in Z * Y * X order. On a Node this only
+    updates the pending transform.
+
+    Parameters:
+    mesh (trimesh.Trimesh or Node): The mesh to rotate.
+    angle (list or tuple): Rotation angles in degrees for [x, y, z] axes.
+
+    Returns:
+    trimesh.Trimesh or Node: The rotated mesh.
+    """
+    mesh.apply_transform(rotation_xyz(angle))
 
     return mesh
-import numpy as np
-from trimesh.transformations import translation_matrix
-from trimesh.transformations import translation_matrix
 
 def center(mesh):
     """
     Center a trimesh object with respect to its centroid.
 
     Parameters:
-    mesh (trimesh.Trimesh): The mesh to center.
+    mesh (trimesh.Trimesh or Node): The mesh to center.
 
     Returns:
-    trimesh.Trimesh: The centered mesh.
+    trimesh.Trimesh or Node: The centered mesh.
     """
+    from trimesh.transformations import translation_matrix
+
     # Compute the centroid of the mesh
     centroid = mesh.centroid
 
@@ -79,12 +344,14 @@ def translate(mesh, offset=[0, 0, 0]):
     Translate a trimesh object by a given offset vector.
 
     Parameters:
-    mesh (trimesh.Trimesh): The mesh to translate.
+    mesh (trimesh.Trimesh or Node): The mesh to translate.
     offset (list or tuple): Translation vector [x, y, z].
 
     Returns:
-    trimesh.Trimesh: The translated mesh.
+    trimesh.Trimesh or Node: The translated mesh.
     """
+    from trimesh.transformations import translation_matrix
+
     # Create the translation matrix
     tform = translation_matrix(offset)
 
@@ -93,81 +360,230 @@ def translate(mesh, offset=[0, 0, 0]):
 
     return mesh
 
+def export_scene(scene, export_path):
+    """
+    Export a scene to GLB, swapping the file into place atomically.
+
+    The viewer polls the model for changes, so it must never see a
+    half-written file. The GLB is checked against its entry in BUDGETS
+    first; a model over a "fail" budget raises budget.BudgetExceeded and
+    nothing is written. With reproducible_export the GLB is canonicalized
+    first, and with export_gltf the split .gltf form is written next to
+    every copy of the GLB as well.
+
+    Parameters:
+    scene (trimesh.Scene): The scene to export.
+    export_path (str): Destination .glb path.
+    """
+    with span("export_scene", "export") as s:
+        s.count(scene)
+        data = scene_glb(scene)
+
+    from budget import check_budget
+    check_budget(os.path.basename(export_path), data)
+    write_atomic(export_path, data)
+
+    # Publish the same bytes to every other web root that serves our models
+    paths = [export_path] + [os.path.join(publish_dir, os.path.basename(export_path))
+                             for publish_dir in publish_dirs if os.path.isdir(publish_dir)]
+    for path in paths[1:]:
+        write_atomic(path, data)
+
+    if export_gltf:
+        from gltfsplit import export_split
+        for path in paths:
+            export_split(data, path)
+
+def scene_glb(scene):
+    """
+    Export a scene to GLB bytes, canonicalized with reproducible_export.
+
+    For the canonical form every mesh is exported with the source keys of
+    its textures in its extras (see texture_sources), which canonical_glb
+    uses to embed the original files and then removes.
+    """
+    restore_image_formats(scene)
+    if not reproducible_export:
+        return scene.export(file_type="glb")
+
+    from canonical import canonical_glb
+
+    # Metadata dicts can be shared between meshes, so replace rather than update
+    tagged = {}
+    for geom in scene.geometry.values():
+        sources = texture_sources(getattr(geom.visual, "material", None))
+        if sources and id(geom) not in tagged:
+            tagged[id(geom)] = geom, geom.metadata
+            geom.metadata = dict(geom.metadata, texture_sources=sources)
+    try:
+        data = scene.export(file_type="glb")
+    finally:
+        for geom, metadata in tagged.values():
+            geom.metadata = metadata
+    return canonical_glb(data, _image_sources)
+
+def write_atomic(path, data):
+    """Write bytes to a temporary file and rename it over path."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+# Extruded glyphs already loaded by this process, by (font, size, depth, glyph).
+# The meshes are shared: copy before modifying them.
+_glyph_meshes = {}
+_fonts = {}
+
 def get_parameter_hash(text, font_path, font_size, depth):
     """Generate a reliable hash of all parameters that affect the output."""
+    hash_obj = hashlib.sha256()
     hash_obj.update(text.encode('utf-8'))
     hash_obj.update(font_path.encode('utf-8'))
     hash_obj.update(str(font_size).encode('utf-8'))
     hash_obj.update(str(depth).encode('utf-8'))
     return hash_obj.hexdigest()
 
-def create_text_mesh_custom_font(text, font_path=os.path.join(here, "nofile"), font_size=100, depth=2):
+def load_font(font_path, font_size):
+    from PIL import ImageFont
+
+    key = (font_path, font_size)
+    if key not in _fonts:
+        _fonts[key] = ImageFont.truetype(font_path, font_size)
+    return _fonts[key]
+
+def extrude_glyph(glyph, font, depth):
     """
-    Render text using a custom TTF font via Pillow, export to SVG,
-    parse path with svgpathtools, then extrude to a 3D mesh.
+    Rasterize one glyph and extrude its pixels into a mesh.
+
+    The glyph's pen origin (top left, as Pillow draws it) is at (0, 0) and
+    Y points up.
+
+    Returns:
+    trimesh.Trimesh: The glyph, or None for blank glyphs such as spaces.
     """
-    
-    # Generate hash for the current parameters
-    param_hash = get_parameter_hash(text, font_path, font_size, depth)
-    cache_file = os.path.join(cache_dir, f"{param_hash}.pkl")
-    
-    # Try to load from cache
-    if os.path.exists(cache_file):
-        try:
-            with open(cache_file, 'rb') as f:
-                return pickle.load(f)
-        except (pickle.PickleError, EOFError):
-            print("Warning: Cache file corrupted, regenerating mesh...")
-    
-    # Create image and draw text
-    font = ImageFont.truetype(font_path, font_size)
-    (width, height) = font.getsize(text)
-    image = Image.new("L", (width + 10, height + 10), 0)
-    draw = ImageDraw.Draw(image)
-    draw.text((5, 5), text, fill=255, font=font)
-
-    # Convert to SVG using svgwrite and the bitmap outline
-    contours = []
-    for y in range(image.height):
-        for x in range(image.width):
-            if image.getpixel((x, y)) > 0:
-                contours.append((x, -y))  # Flip Y axis for geometric consistency
-
-    if not contours:
-        raise ValueError("Text image is empty — font may be missing.")
+    import trimesh
+    from PIL import Image, ImageDraw
+    from shapely.geometry import MultiPolygon, Polygon, box
+    from shapely.ops import unary_union
 
-    # Turn pixel cloud into a Shapely polygon
-    pixels = [Polygon([
-        (x, y),
-        (x + 1, y),
-        (x + 1, y + 1),
-        (x, y + 1)
-    ]) for x, y in contours]
+    pad = 2
+    (_, _, width, height) = font.getbbox(glyph)
+    image = Image.new("L", (max(width, 1) + 2 * pad, max(height, 1) + 2 * pad), 0)
+    ImageDraw.Draw(image).text((pad, pad), glyph, fill=255, font=font)
 
-    unioned = unary_union(pixels)
+    # One rectangle per run of lit pixels in a row, then merge the rows
+    pixels = np.asarray(image) > 0
+    runs = []
+    for y, row in enumerate(pixels):
+        edges = np.flatnonzero(np.diff(np.concatenate([[0], row.astype(np.int8), [0]])))
+        for x0, x1 in edges.reshape(-1, 2):
+            runs.append(box(x0 - pad, pad - y, x1 - pad, pad - y + 1))
+    if not runs:
+        return None
+
+    unioned = unary_union(runs)
     if isinstance(unioned, Polygon):
         polygons = [unioned]
     elif isinstance(unioned, MultiPolygon):
         polygons = list(unioned.geoms)
     else:
-        raise ValueError("Failed to extract polygonal outlines from text.")
+        raise ValueError(f"Failed to extract polygonal outlines from glyph {glyph!r}.")
 
-    # Extrude
-    mesh = trimesh.util.concatenate([
-        trimesh.creation.extrude_polygon(p, height=depth)
-        for p in polygons if p.area > 1
-    ])
-    
-    # Save to cache for future use
-    try:
-        with open(cache_file, 'wb') as f:
-            pickle.dump(mesh, f)
-    except (pickle.PickleError, IOError) as e:
-        print(f"Warning: Failed to cache mesh ({str(e)})")
+    extruded = [trimesh.creation.extrude_polygon(p, height=depth) for p in polygons if p.area > 1]
+    return trimesh.util.concatenate(extruded) if extruded else None
+
+def glyph_mesh(glyph, font_path, font_size, depth):
+    """
+    Extruded mesh of one glyph, built once and cached in memory and in cache/.
+
+    Returns:
+    trimesh.Trimesh: The shared glyph mesh, or None for blank glyphs.
+    """
+    import pickle
+
+    key = (font_path, font_size, depth, glyph)
+    if key in _glyph_meshes:
+        return _glyph_meshes[key]
+
+    cache_file = cache_path(f"glyph_{get_parameter_hash(glyph, font_path, font_size, depth)}.pkl")
+    mesh = None
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'rb') as f:
+                mesh = pickle.load(f)
+        except (pickle.PickleError, EOFError):
+            print("Warning: Cache file corrupted, regenerating glyph...")
+            os.remove(cache_file)
+    if not os.path.exists(cache_file):
+        mesh = extrude_glyph(glyph, load_font(font_path, font_size), depth)
+        try:
+            write_atomic(cache_file, pickle.dumps(mesh))
+        except (pickle.PickleError, IOError) as e:
+            print(f"Warning: Failed to cache glyph ({str(e)})")
 
+    _glyph_meshes[key] = mesh
     return mesh
 
-import numpy as np
+def layout_text(text, font_path, font_size, depth):
+    """
+    Place the glyphs of a string.
+
+    Pen positions come from the font's advances and kerning, measured on
+    each prefix of the string, so the result matches drawing the whole
+    string at once. The string starts at (5, -5) like the old whole-string
+    raster did.
+
+    Returns:
+    list: (glyph, mesh, x offset) for every non-blank glyph.
+    """
+    font = load_font(font_path, font_size)
+    placed = []
+    for i, glyph in enumerate(text):
+        mesh = glyph_mesh(glyph, font_path, font_size, depth)
+        if mesh is not None:
+            placed.append((glyph, mesh, 5 + font.getlength(text[:i])))
+    if not placed:
+        raise ValueError("Text image is empty — font may be missing.")
+    return placed
+
+@span("create_text_mesh_custom_font", "component")
+def create_text_mesh_custom_font(text, font_path=os.path.join(here, "nofile"), font_size=100, depth=2):
+    """
+    Extrude text in a TTF/OTF font into a single mesh.
+
+    Every distinct glyph is rasterized and extruded once per font, size and
+    depth (see glyph_mesh); a string is assembled from translated copies of
+    the cached glyphs, so new labels reusing known glyphs cost almost
+    nothing.
+    """
+    import trimesh
+
+    parts = []
+    for _, mesh, x in layout_text(text, font_path, font_size, depth):
+        part = mesh.copy()
+        part.apply_translation([x, -5, 0])
+        parts.append(part)
+    return trimesh.util.concatenate(parts)
+
+@span("create_text_nodes", "component")
+def create_text_nodes(text, font_path=os.path.join(here, "nofile"), font_size=100, depth=2, name="text"):
+    """
+    Text as one Node per glyph, sharing a single geometry per distinct glyph.
+
+    Added with add_component, repeated glyphs export as instances of one
+    glTF mesh instead of copies.
+
+    Returns:
+    list: Nodes named "<name>_<index>", positioned like create_text_mesh_custom_font.
+    """
+    nodes = []
+    for i, (_, mesh, x) in enumerate(layout_text(text, font_path, font_size, depth)):
+        node = Node(mesh, name=f"{name}_{i}")
+        node.apply_translation([x, -5, 0])
+        # The geometry belongs to the glyph cache; a new visual gets its own mesh
+        node.shared = True
+        nodes.append(node)
+    return nodes
 
 def generate_uv_coordinates(mesh, normals=None):
     """
@@ -254,10 +670,111 @@ def generate_uv_coordinates(mesh, normals=None):
 
 
 
+# Material attributes that can hold a texture image
+MATERIAL_IMAGES = ("image", "baseColorTexture", "normalTexture", "emissiveTexture",
+                   "metallicRoughnessTexture", "occlusionTexture")
+
+# Texture images already opened, by path and modification time. Materials
+# only read their image, so every mesh using a texture shares one decode.
+_texture_images = {}
+
+# glTF texture each material image attribute is exported as; SimpleMaterial's
+# image becomes the base color
+GLTF_TEXTURES = {attr: "baseColorTexture" if attr == "image" else attr for attr in MATERIAL_IMAGES}
+
+# Encoded bytes images were decoded from, by the SHA-256 of the bytes (see
+# image_source). An image whose entry was evicted is embedded as trimesh
+# encodes it.
+_image_sources = LRUCache(256)
+
+def image_source(image, data):
+    """
+    Remember the file bytes a PIL image was opened from.
+
+    The bytes are kept under a key stored in image.info, which survives the
+    copies trimesh makes of materials, and a reproducible export embeds them
+    for the image instead of trimesh's re-encoding of it (see scene_glb).
+    The image must not be modified afterwards. Its format is kept in
+    image.info as well (see restore_image_formats).
+
+    Returns:
+    PIL.Image.Image: The image.
+    """
+    key = hashlib.sha256(data).hexdigest()
+    _image_sources[key] = data
+    image.info["source"] = key
+    image.info["source_format"] = image.format
+    return image
+
+def texture_sources(material):
+    """
+    Source keys of a material's images that came from a file.
+
+    Returns:
+    dict: image_source key by glTF texture name (e.g. "baseColorTexture").
+    """
+    sources = {}
+    for attr in MATERIAL_IMAGES:
+        info = getattr(getattr(material, attr, None), "info", None)
+        if info and info.get("source") in _image_sources:
+            sources[GLTF_TEXTURES[attr]] = info["source"]
+    return sources
+
+def restore_image_formats(scene):
+    """
+    Give copied texture images back the format of the file they came from.
+
+    Copying a PIL image drops its format, so a JPEG texture on a copied
+    material would otherwise be embedded as a PNG several times its size.
+    """
+    for geom in scene.geometry.values():
+        material = getattr(geom.visual, "material", None)
+        for attr in MATERIAL_IMAGES:
+            im = getattr(material, attr, None)
+            if im is not None and getattr(im, "format", "") is None:
+                im.format = im.info.get("source_format")
+
+def texture_image(texture_filename):
+    """
+    Open a texture from textures/, or its largest mip within texture_max_size.
+
+    Returns:
+    PIL.Image.Image: The opened image, shared with other callers.
+    """
+    import io
+    from PIL import Image
+
+    image_path = os.path.join(here, 'textures', texture_filename)
+    if texture_max_size is not None:
+        with Image.open(image_path) as im:
+            full_size = size = max(im.size)
+        stem, ext = os.path.splitext(texture_filename)
+
+        def mip_path(size):
+            return os.path.join(here, 'textures', 'mips', f"{stem}_{size}{ext}")
+
+        while size > texture_max_size:
+            size //= 2
+        # Below the smallest mip, use the smallest one rather than full size
+        while size < full_size and not os.path.exists(mip_path(size)):
+            size *= 2
+        if size < full_size:
+            image_path = mip_path(size)
+    key = (image_path, os.path.getmtime(image_path))
+    if key not in _texture_images:
+        with open(image_path, "rb") as f:
+            data = f.read()
+        image = Image.open(io.BytesIO(data))
+        image.load()
+        _texture_images[key] = image_source(image, data)
+    return _texture_images[key]
+
+@span("add_texture", "texture")
 def add_texture(mesh, texture_filename):
     """Add texture to a mesh with automatically generated UV coordinates"""
-    image_path = os.path.join(here, 'textures', texture_filename)
-    im = Image.open(image_path)
+    from trimesh.visual.texture import SimpleMaterial, TextureVisuals
+
+    im = texture_image(texture_filename)
     
     # Generate UV coordinates
     uv = generate_uv_coordinates(mesh)
@@ -268,10 +785,12 @@ def add_texture(mesh, texture_filename):
     )
     return mesh
 
+@span("add_texture_simple", "texture")
 def add_texture_simple(mesh, texture_filename):
     """Apply the center pixel of the texture to the entire mesh."""
-    image_path = os.path.join(here, 'textures', texture_filename)
-    im = Image.open(image_path)
+    from trimesh.visual.texture import SimpleMaterial, TextureVisuals
+
+    im = texture_image(texture_filename)
 
     # Get number of vertices
     num_vertices = len(mesh.vertices)
@@ -285,11 +804,252 @@ def add_texture_simple(mesh, texture_filename):
     )
     return mesh
 
-def create_rect_with_hole(width, height, top, bottom, left, right, 
+@span("decimate", "asset")
+def decimate(mesh, max_faces):
+    """
+    Reduce a mesh to at most max_faces triangles with quadric decimation.
+
+    Decimation drops visuals and normals, so texture coordinates and any
+    explicit vertex normals are carried over from the nearest original
+    vertex and the original material is kept.
+
+    Parameters:
+    mesh (trimesh.Trimesh): The mesh to reduce.
+    max_faces (int): Triangle budget.
+
+    Returns:
+    trimesh.Trimesh: The reduced mesh, or the input if already within budget.
+    """
+    from trimesh.visual.texture import TextureVisuals
+
+    if len(mesh.faces) <= max_faces:
+        return mesh
+    reduced = mesh.simplify_quadric_decimation(face_count=int(max_faces))
+
+    uv = getattr(mesh.visual, "uv", None)
+    normals = mesh.vertex_normals if "vertex_normals" in mesh._cache else None
+    if uv is not None or normals is not None:
+        # Nearest original vertex, in chunks to bound the distance matrix
+        nearest = np.empty(len(reduced.vertices), dtype=np.int64)
+        for start in range(0, len(reduced.vertices), 1024):
+            chunk = reduced.vertices[start:start + 1024]
+            d = ((chunk[:, None, :] - mesh.vertices[None, :, :]) ** 2).sum(axis=2)
+            nearest[start:start + 1024] = d.argmin(axis=1)
+    if uv is not None:
+        reduced.visual = TextureVisuals(uv=uv[nearest], material=mesh.visual.material)
+    elif hasattr(mesh.visual, "material"):
+        reduced.visual = TextureVisuals(material=mesh.visual.material)
+    if normals is not None:
+        # Set after the visual, and exported by trimesh because they are cached
+        reduced.vertex_normals = normals[nearest]
+    return reduced
+
+def downscale_textures(material, max_size):
+    """
+    Shrink every texture image on a material so neither side exceeds max_size.
+
+    Parameters:
+    material (trimesh.visual.material.Material): PBR or simple material.
+    max_size (int): Largest allowed width/height in pixels.
+    """
+    import io
+    from PIL import Image
+
+    for attr in MATERIAL_IMAGES:
+        im = getattr(material, attr, None)
+        if im is None or max(im.size) <= max_size:
+            continue
+        im = im.copy()
+        im.thumbnail((max_size, max_size), Image.LANCZOS)
+        # Resizing drops the format, and trimesh embeds anything that is not
+        # a JPEG as PNG. Save as JPEG whatever the source was, unless the
+        # image needs its alpha channel.
+        buffer = io.BytesIO()
+        if im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info:
+            im.save(buffer, format="PNG")
+        else:
+            im = im if im.mode in ("RGB", "L") else im.convert("RGB")
+            im.save(buffer, format="JPEG", quality=90)
+        setattr(material, attr, image_source(Image.open(buffer), buffer.getvalue()))
+
+def embedded_image_sources(scene, data):
+    """
+    Register the images of a scene loaded from GLB bytes with image_source.
+
+    Loaded images are matched to the GLB's embedded images by their pixels.
+    """
+    import io
+    from PIL import Image
+    from budget import parse_glb
+
+    gltf, binary = parse_glb(data)
+    views = gltf.get("bufferViews", [])
+    embedded = {}
+    for image in gltf.get("images", []):
+        if "bufferView" not in image:
+            continue
+        view = views[image["bufferView"]]
+        start = view.get("byteOffset", 0)
+        content = binary[start:start + view["byteLength"]]
+        with Image.open(io.BytesIO(content)) as im:
+            embedded[(im.size, im.mode, im.tobytes())] = content
+
+    for geom in scene.geometry.values():
+        material = getattr(geom.visual, "material", None)
+        for attr in MATERIAL_IMAGES:
+            im = getattr(material, attr, None)
+            if im is not None and hasattr(im, "tobytes"):
+                content = embedded.get((im.size, im.mode, im.tobytes()))
+                if content is not None:
+                    image_source(im, content)
+
+def load_glb(data):
+    """Load GLB bytes as a scene, registering its images with image_source."""
+    import io
+    import trimesh
+
+    scene = trimesh.load(io.BytesIO(data), file_type="glb", force="scene")
+    embedded_image_sources(scene, data)
+    return scene
+
+@span("import_asset", "asset")
+def import_asset(filename, rotation=[0, 0, 0], height=None, stretch=[1, 1, 1],
+                 max_faces=None, max_texture_size=None):
+    """
+    Load a third-party model and cache a normalized, optionally reduced copy.
+
+    The asset is centred, rotated, scaled to the requested height, decimated
+    to a triangle budget and has its textures downscaled to the size it
+    occupies on screen. The result is cached as a GLB keyed on the file
+    contents and these parameters, so builds after the first skip all of
+    that work and keep the downscaled textures as saved.
+
+    Parameters:
+    filename (str): Model file relative to this folder (e.g. "Crate.glb").
+    rotation (list): Rotation in degrees applied after centering.
+    height (float): Target extent along Z, or None to keep the source scale.
+    stretch (list): Extra per-axis scale applied on top of the height scale.
+    max_faces (int): Triangle budget across the whole asset, or None.
+    max_texture_size (int): Largest texture side in pixels, or None.
+
+    Returns:
+    trimesh.Scene: The normalized asset, a fresh copy on every call.
+    """
+    import trimesh
+
+    path = os.path.join(here, filename)
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read())
+    digest.update(repr((list(rotation), height, list(stretch), max_faces, max_texture_size)).encode())
+    cache_file = cache_path(f"asset_{digest.hexdigest()}.glb")
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, "rb") as f:
+                return load_glb(f.read())
+        except Exception:
+            print("Warning: Cache file corrupted, re-importing asset...")
+
+    asset = trimesh.load(path, force="scene")
+    rotate(center(asset), rotation)
+    if height is not None:
+        scale_factor = height / (asset.bounds[1][2] - asset.bounds[0][2])
+        asset.apply_scale(np.multiply(stretch, scale_factor))
+
+    total_faces = sum(len(g.faces) for g in asset.geometry.values())
+    for name, geom in list(asset.geometry.items()):
+        if max_faces is not None and total_faces > max_faces:
+            # Split the budget in proportion to each part's share of the triangles
+            geom = decimate(geom, max(4, max_faces * len(geom.faces) // total_faces))
+            asset.geometry[name] = geom
+        if max_texture_size is not None and hasattr(geom.visual, "material"):
+            downscale_textures(geom.visual.material, max_texture_size)
+
+    # With reproducible_export the downscaled JPEGs are kept as saved, so
+    # warm and cold builds agree
+    data = scene_glb(asset)
+    try:
+        write_atomic(cache_file, data)
+    except IOError as e:
+        print(f"Warning: Failed to cache asset ({str(e)})")
+    # Return what later builds will load from the cache, down to the float32
+    # rounding of the vertices, so the first build's output matches theirs
+    return load_glb(data)
+
+# Panel outlines already built, by kind and dimensions, most recently used
+# kept. Meshes are rebuilt from these arrays on every call so callers can
+# modify what they get.
+_panels = LRUCache(1024)
+
+# Profile u axis, profile v axis and thickness axis for each panel plane
+PANEL_PLANES = {"xy": (0, 1, 2), "xz": (0, 2, 1), "yz": (1, 2, 0)}
+
+def _center_axes(center_planes):
+    """[x, y, z] booleans from "xz"-style strings or [1, 0, 1]-style lists."""
+    if isinstance(center_planes, str):
+        return [axis in center_planes.lower() for axis in "xyz"]
+    return [bool(c) for c in center_planes]
+
+def _panel_mesh(outline, thickness, plane, center_planes):
+    """
+    Extrude a triangulated 2D outline into a panel without re-triangulating.
+
+    Parameters:
+    outline (tuple): (points, triangles, loops) with (n, 2) points, CCW
+        triangles and boundary loops (outer CCW, holes CW).
+    thickness (float): Extrusion along the plane's normal axis.
+    plane (str): 'xy', 'xz' or 'yz', the plane of the profile.
+    center_planes (str/list): Axes to center on; other axes start at 0.
+
+    Returns:
+    trimesh.Trimesh: The panel, with planar UVs and face normals on the
+    front and back.
+    """
+    import trimesh
+
+    if plane not in PANEL_PLANES:
+        raise ValueError(f"plane must be one of {sorted(PANEL_PLANES)}, not {plane!r}")
+    points, triangles, loops = outline
+    n = len(points)
+
+    local = np.vstack([np.column_stack([points, np.zeros(n)]),
+                       np.column_stack([points, np.full(n, float(thickness))])])
+    # Front faces -w, back faces +w, then a wall along every boundary edge
+    faces = [triangles[:, ::-1], triangles + n]
+    for loop in loops:
+        a, b = loop, np.roll(loop, -1)
+        faces += [np.column_stack([a, b, b + n]), np.column_stack([a, b + n, a + n])]
+    faces = np.vstack(faces)
+    normals = np.repeat([[0, 0, -1.0], [0, 0, 1.0]], n, axis=0)
+    low, high = points.min(axis=0), points.max(axis=0)
+    uv = np.tile((points - low) / np.maximum(high - low, 1e-12), (2, 1))
+
+    # Local (u, v, w) into the requested plane; odd permutations mirror
+    axes = PANEL_PLANES[plane]
+    vertices = np.empty_like(local)
+    vertex_normals = np.empty_like(normals)
+    vertices[:, axes] = local
+    vertex_normals[:, axes] = normals
+    if plane == "xz":
+        faces = faces[:, ::-1]
+
+    bounds = np.array([vertices.min(axis=0), vertices.max(axis=0)])
+    vertices -= np.where(_center_axes(center_planes), bounds.mean(axis=0), bounds[0])
+
+    mesh = trimesh.Trimesh(vertices=vertices, faces=faces, vertex_normals=vertex_normals,
+                           process=False)
+    mesh.visual = trimesh.visual.texture.TextureVisuals(uv=uv.astype(np.float32))
+    return mesh
+
+@span("create_rect_with_hole", "component")
+def create_rect_with_hole(width, height, top, bottom, left, right,
                          plane="xy", center_planes="xyz", extrusion_height=4):
     """
     Create a 3D extruded rectangular polygon with a rectangular hole.
-    
+
+    The framed panel is written out directly as 16 vertices and 32
+    triangles, no polygon triangulation involved, and its outline is
+    cached by dimensions.
+
     Parameters:
         width (float): Width of the outer rectangle.
         height (float): Height of the outer rectangle.
@@ -297,41 +1057,201 @@ def create_rect_with_hole(width, height, top, bottom, left, right,
         bottom (float): Bottom margin.
         left (float): Left margin.
         right (float): Right margin.
-        plane (str): Plane to create the 2D profile in ('xy', 'xz', 'yz').
+        plane (str): Plane to create the 2D profile in ('xy', 'xz', 'yz');
+                     the extrusion goes along the remaining axis.
         center_planes (str/list): Which planes to center the object in, as:
                                  - String: any combination of 'x','y','z' (e.g. "xy", "yzx")
                                  - List: [x,y,z] where 1=center, 0=don't center (e.g. [1,0,1])
+                                 Axes that aren't centered start at 0.
         extrusion_height (float): Height of extrusion in 3D.
-    
+
     Returns:
         trimesh.Trimesh: A 3D mesh of the extruded rectangle with hole.
     """
-    # Create outer rectangle coordinates (counter-clockwise)
-    outer_2d = np.array([
-        [-width / 2, -height / 2],
-        [ width / 2, -height / 2],
-        [ width / 2,  height / 2],
-        [-width / 2,  height / 2]
-    ])
+    key = ("frame", width, height, top, bottom, left, right)
+    if key not in _panels:
+        if left + right >= width or top + bottom >= height:
+            raise ValueError("Margins leave no hole in the panel.")
+        w, h = width / 2, height / 2
+        points = np.array([
+            [-w, -h], [w, -h], [w, h], [-w, h],  # outer, counter-clockwise
+            [-w + left, -h + bottom], [w - right, -h + bottom],
+            [w - right, h - top], [-w + left, h - top],  # inner, same order
+        ])
+        # Two triangles per side of the frame
+        o, i = np.arange(4), np.arange(4) + 4
+        o1, i1 = np.roll(o, -1), np.roll(i, -1)
+        triangles = np.vstack([np.column_stack([o, o1, i1]), np.column_stack([o, i1, i])])
+        _panels[key] = (points, triangles, [o, i[::-1]])
+    return _panel_mesh(_panels[key], extrusion_height, plane, center_planes)
 
-    # Create inner rectangle (hole, clockwise winding)
-    inner_2d = np.array([
-        [-width / 2 + left,  height / 2 - top],
-        [ width / 2 - right,  height / 2 - top],
-        [ width / 2 - right, -height / 2 + bottom],
-        [-width / 2 + left, -height / 2 + bottom]
-    ])
+def _circle_collar(center, radius, border, sections):
+    """
+    Triangulate a square around a circular hole.
 
-    # Always create polygon in XY plane first, then transform
-    polygon_with_hole = Polygon(outer_2d, [inner_2d])
-    mesh = trimesh.creation.extrude_polygon(polygon_with_hole, height=extrusion_height)
-    
-    return mesh
+    Both outlines are convex, so the ring between them is triangulated by
+    merging their edges in order of direction: each edge forms a triangle
+    with the other outline's current extreme vertex. Only the square's
+    corners and the grid points already on its sides (border, counter-
+    clockwise from the top right corner) are used, so no triangulator is
+    needed and there are no T-junctions with the grid.
+
+    Returns:
+    (np.ndarray, list): The circle's (sections, 2) points and triangles as
+    ("border", index) / ("circle", index) pairs.
+    """
+    sections = max(4, int(np.ceil(sections / 4)) * 4)
+    # Start on the diagonal so the first circle point faces the top right corner
+    theta = np.pi / 4 + 2 * np.pi * np.arange(sections) / sections
+    circle = center + radius * np.column_stack([np.cos(theta), np.sin(theta)])
+
+    # Edge directions, measured from the circle's edge arriving at its
+    # first point, so both outlines start at their extreme vertex
+    start = 3 * np.pi / 4 - np.pi / sections
+    outer_edges = np.roll(border, -1, axis=0) - border
+    outer_direction = np.mod(np.arctan2(outer_edges[:, 1], outer_edges[:, 0]) - start, 2 * np.pi)
+    inner_direction = 2 * np.pi * (np.arange(sections) + 1) / sections
+
+    triangles, i, j = [], 0, 0
+    for side, _ in sorted([(0, d) for d in outer_direction] + [(1, d) for d in inner_direction],
+                          key=lambda edge: edge[1]):
+        if side == 0:
+            triangles.append((("circle", j % sections), ("border", i),
+                              ("border", (i + 1) % len(border))))
+            i += 1
+        else:
+            triangles.append((("circle", j), ("border", i % len(border)),
+                              ("circle", (j + 1) % sections)))
+            j += 1
+    return circle, triangles
 
+def _panel_outline(width, height, cutouts, sections):
+    """
+    Triangulate a rectangle with rectangular and circular cutouts.
+
+    Every cutout is boxed (circles in a square 1.25 times their radius), the
+    panel is cut into a grid along all box edges, and the grid cells
+    outside the boxes become two triangles each. Circles are then joined to
+    their squares with _circle_collar.
+    """
+    w, h = width / 2, height / 2
+    boxes, circles = [], []
+    for cutout in cutouts:
+        kind, cu, cv = cutout[0], float(cutout[1]), float(cutout[2])
+        if kind == "rect":
+            size = np.array(cutout[3:5], dtype=np.float64) / 2
+            boxes.append((cu - size[0], cv - size[1], cu + size[0], cv + size[1]))
+        elif kind == "circle":
+            half = 1.25 * float(cutout[3])
+            boxes.append((cu - half, cv - half, cu + half, cv + half))
+            circles.append((len(boxes) - 1, float(cutout[3])))
+        else:
+            raise ValueError(f"Unknown cutout {kind!r}; use 'rect' or 'circle'.")
+    boxes = np.array(boxes, dtype=np.float64).reshape(-1, 4)
+
+    if len(boxes) and (np.any(boxes[:, :2] <= [-w, -h]) or np.any(boxes[:, 2:] >= [w, h])):
+        raise ValueError("Cutouts must lie inside the panel (circles need 1.25 x radius).")
+    for a in range(len(boxes)):
+        for b in range(a + 1, len(boxes)):
+            if (boxes[a, 0] < boxes[b, 2] and boxes[b, 0] < boxes[a, 2]
+                    and boxes[a, 1] < boxes[b, 3] and boxes[b, 1] < boxes[a, 3]):
+                raise ValueError("Cutouts overlap.")
+
+    xs = np.unique(np.concatenate([[-w, w], boxes[:, [0, 2]].ravel()]))
+    ys = np.unique(np.concatenate([[-h, h], boxes[:, [1, 3]].ravel()]))
+    gx, gy = np.meshgrid(xs, ys, indexing="ij")
+    points = [np.column_stack([gx.ravel(), gy.ravel()])]
+
+    def grid(ix, iy):
+        return ix * len(ys) + iy
+
+    # Grid cells outside every box
+    cx, cy = (xs[:-1] + xs[1:]) / 2, (ys[:-1] + ys[1:]) / 2
+    mx, my = np.meshgrid(cx, cy, indexing="ij")
+    inside = np.zeros(mx.shape, dtype=bool)
+    for x0, y0, x1, y1 in boxes:
+        inside |= (mx > x0) & (mx < x1) & (my > y0) & (my < y1)
+    ix, iy = np.nonzero(~inside)
+    a, b, c, d = grid(ix, iy), grid(ix + 1, iy), grid(ix + 1, iy + 1), grid(ix, iy + 1)
+    triangles = [np.column_stack([a, b, c]), np.column_stack([a, c, d])]
+
+    def boundary(x0, y0, x1, y1):
+        """Grid points around a box, counter-clockwise from its bottom left."""
+        bx = np.searchsorted(xs, [x0, x1])
+        by = np.searchsorted(ys, [y0, y1])
+        ring = ([grid(i, by[0]) for i in range(bx[0], bx[1])]
+                + [grid(bx[1], j) for j in range(by[0], by[1])]
+                + [grid(i, by[1]) for i in range(bx[1], bx[0], -1)]
+                + [grid(bx[0], j) for j in range(by[1], by[0], -1)])
+        return np.array(ring)
+
+    loops = [boundary(-w, -h, w, h)]
+    circle_boxes = dict(circles)
+    for index, (x0, y0, x1, y1) in enumerate(boxes):
+        if index not in circle_boxes:
+            loops.append(boundary(x0, y0, x1, y1)[::-1])
+            continue
+        ring = boundary(x0, y0, x1, y1)
+        center = np.array([(x0 + x1) / 2, (y0 + y1) / 2])
+        # Start the border at the top right corner, like the circle
+        ring = np.roll(ring, -int(np.argmin(np.linalg.norm(points[0][ring] - [x1, y1], axis=1))))
+        circle, collar = _circle_collar(center, circle_boxes[index], points[0][ring], sections)
+        offset = sum(len(p) for p in points)
+        points.append(circle)
+        lookup = {"border": ring, "circle": np.arange(len(circle)) + offset}
+        triangles.append(np.array([[lookup[kind][k] for kind, k in tri] for tri in collar]))
+        loops.append(np.arange(len(circle))[::-1] + offset)
+
+    # Drop grid points only used inside boxes
+    points = np.vstack(points)
+    triangles = np.vstack(triangles)
+    used, remap = np.unique(triangles, return_inverse=True)
+    index = np.full(len(points), -1)
+    index[used] = np.arange(len(used))
+    return points[used], remap.reshape(-1, 3), [index[loop] for loop in loops]
+
+@span("create_panel", "component")
+def create_panel(width, height, thickness=4, cutouts=(), plane="xy", center_planes="xyz",
+                 sections=32):
+    """
+    Create a flat panel with rectangular and circular cutouts: vents,
+    windows, control panel holes.
+
+    The outline is triangulated on a grid built from the cutouts' edges
+    rather than by the general polygon triangulator, and cached by
+    dimensions.
+
+    Parameters:
+        width (float): Panel size along the profile's first axis.
+        height (float): Panel size along the profile's second axis.
+        thickness (float): Extrusion along the remaining axis.
+        cutouts (list): ("rect", u, v, width, height) or ("circle", u, v,
+                        radius) tuples, positioned from the panel's centre.
+                        A circle needs clear space 1.25 times its radius
+                        around its centre.
+        plane (str): Plane to create the 2D profile in ('xy', 'xz', 'yz').
+        center_planes (str/list): Axes to center on, as for
+                                  create_rect_with_hole.
+        sections (int): Segments per circular cutout (rounded up to a
+                        multiple of 4).
+
+    Returns:
+        trimesh.Trimesh: The panel.
+    """
+    cutouts = tuple(tuple(cutout) for cutout in cutouts)
+    key = ("panel", width, height, cutouts, sections)
+    if key not in _panels:
+        _panels[key] = _panel_outline(width, height, cutouts, sections)
+    return _panel_mesh(_panels[key], thickness, plane, center_planes)
+
+@span("generateHoneycomb", "component")
 def generateHoneycomb(machine):
+    import pickle
+    import trimesh
+
     hash_object = hashlib.sha256(str(machine).encode())  # Convert string to bytes
     hex_dig = hash_object.hexdigest()            # Get hexadecimal digest
-    filename = os.path.join(cache_dir, "honeycomb" + hex_dig + ".pkl")
+    filename = cache_path("honeycomb" + hex_dig + ".pkl")
     if os.path.exists(filename):
         with open(filename, 'rb') as f:
             return pickle.load(f)
@@ -356,3 +1276,657 @@ def generateHoneycomb(machine):
     with open(filename, 'wb') as f:
         pickle.dump(retval, f)
     return retval
+
+@span("cylinder_between", "component")
+def cylinder_between(p0, p1, radius, sections=240, material=None):
+    """Create a cylinder between p0 and p1.
+    Robust to trimesh.geometry.align_vectors returning 3x3 or 4x4.
+    """
+    import trimesh
+
+    p0 = np.asarray(p0, dtype=float)
+    p1 = np.asarray(p1, dtype=float)
+    vec = p1 - p0
+    length = np.linalg.norm(vec)
+    if length == 0:
+        length = 1e-9
+
+    cyl = trimesh.creation.cylinder(radius=radius, height=length, sections=sections)
+
+    # cylinder is along +Z by default; align +Z to the segment direction
+    z_axis = np.array([0.0, 0.0, 1.0])
+    R = trimesh.geometry.align_vectors(z_axis, vec / length)
+
+    # Build a 4x4 transform from R, regardless of shape
+    if isinstance(R, np.ndarray) and R.shape == (4, 4):
+        M = R.copy()
+    else:
+        M = np.eye(4)
+        M[:3, :3] = R
+
+    # place at the midpoint
+    M[:3, 3] = (p0 + p1) / 2.0
+
+    cyl = Node(cyl, M)
+
+    if material is not None:
+        cyl.visual = material
+    return cyl
+
+
+@span("hollow_cylinder", "component")
+def hollow_cylinder(outer_r, inner_r, height, sections=128, cap=True):
+    """
+    Build a hollow cylinder (ring) with correct, outward-facing normals.
+    Axis: Z. Center at origin. Height spans [-h/2, +h/2].
+    """
+    import trimesh
+
+    assert outer_r > inner_r > 0, f"Bad radii: outer={outer_r}, inner={inner_r}"
+    n = int(sections)
+    h = float(height) * 0.5
+
+    theta = np.linspace(0, 2*np.pi, n, endpoint=False)
+    c, s = np.cos(theta), np.sin(theta)
+
+    # Rings
+    outer_top    = np.column_stack([outer_r*c, outer_r*s, np.full(n, +h)])
+    outer_bottom = np.column_stack([outer_r*c, outer_r*s, np.full(n, -h)])
+    inner_top    = np.column_stack([inner_r*c, inner_r*s, np.full(n, +h)])
+    inner_bottom = np.column_stack([inner_r*c, inner_r*s, np.full(n, -h)])
+
+    # Vertex layout
+    # 0..n-1      outer_top
+    # n..2n-1     outer_bottom
+    # 2n..3n-1    inner_top
+    # 3n..4n-1    inner_bottom
+    V = np.vstack([outer_top, outer_bottom, inner_top, inner_bottom])
+
+    def idx(i): return i % n
+
+    F = []
+
+    # ---- Outer wall
+    # For each sector, create two triangles with CCW order as seen from *outside* the ring.
+    # (ob0, ot0, ob1) and (ot0, ot1, ob1)
+    for i in range(n):
+        ot0 = i
+        ob0 = n + i
+        ot1 = idx(i+1)
+        ob1 = n + idx(i+1)
+        F += [
+            [ob0, ot0, ob1],
+            [ot0, ot1, ob1],
+        ]
+
+    # ---- Inner wall
+    # For the inner cylinder, the outward normal points toward the hole center,
+    # so we flip winding relative to outer wall.
+    # Use (it0, ib1, ib0) and (it0, it1, ib1) (CCW when viewed from inside).
+    for i in range(n):
+        it0 = 2*n + i
+        ib0 = 3*n + i
+        it1 = 2*n + idx(i+1)
+        ib1 = 3*n + idx(i+1)
+        F += [
+            [it0, ib1, ib0],
+            [it0, it1, ib1],
+        ]
+
+    if cap:
+        # ---- Top cap (viewed from +Z) -> CCW
+        for i in range(n):
+            ot0 = i
+            it0 = 2*n + i
+            ot1 = idx(i+1)
+            it1 = 2*n + idx(i+1)
+            F += [
+                [ot0, it0, it1],
+                [ot0, it1, ot1],
+            ]
+        # ---- Bottom cap (viewed from -Z) -> flip winding
+        for i in range(n):
+            ob0 = n + i
+            ib0 = 3*n + i
+            ob1 = n + idx(i+1)
+            ib1 = 3*n + idx(i+1)
+            F += [
+                [ob0, ib1, ib0],
+                [ob0, ob1, ib1],
+            ]
+
+    mesh = trimesh.Trimesh(vertices=V, faces=np.asarray(F, dtype=np.int64), process=False)
+
+    # Repair without reprocessing topology
+    trimesh.repair.fix_normals(mesh)                # ensure consistent normals
+
+    # --- Auto-check: ensure sidewall normals are truly "outward"
+    # Compare vertex normals on the outer_top ring with radial directions.
+    vt_normals = mesh.vertex_normals[:n]       # normals at outer_top vertices
+    radial = np.column_stack([c, s, np.zeros(n)])
+    # If mean dot < 0, the whole mesh is inverted; flip once.
+    if np.mean(np.einsum('ij,ij->i', vt_normals, radial)) < 0.0:
+        mesh.invert()
+        trimesh.repair.fix_normals(mesh)
+
+    # ----- UVs (basic but stable): cylindrical mapping for walls, radial for caps
+    uv = np.zeros((len(V), 2), dtype=np.float32)
+    u = (theta / (2*np.pi)).astype(np.float32)
+    uv[0:n, 0] = u;       uv[0:n, 1]   = 1.0   # outer_top
+    uv[n:2*n, 0] = u;     uv[n:2*n, 1] = 0.0   # outer_bottom
+    uv[2*n:3*n, 0] = u;   uv[2*n:3*n, 1] = 1.0 # inner_top
+    uv[3*n:4*n, 0] = u;   uv[3*n:4*n, 1] = 0.0 # inner_bottom
+
+    def radial_uv(xy):
+        scale = 0.5 / (outer_r + 1e-6)
+        return np.column_stack([0.5 + xy[:,0]*scale, 0.5 + xy[:,1]*scale]).astype(np.float32)
+
+    if cap:
+        top_xy = np.vstack([outer_top[:, :2], inner_top[:, :2]])
+        bot_xy = np.vstack([outer_bottom[:, :2], inner_bottom[:, :2]])
+        top_uv = radial_uv(top_xy)
+        bot_uv = radial_uv(bot_xy)
+        uv[0:n, :]       = top_uv[0:n, :]
+        uv[2*n:3*n, :]   = top_uv[n:2*n, :]
+        uv[n:2*n, :]     = bot_uv[0:n, :]
+        uv[3*n:4*n, :]   = bot_uv[n:2*n, :]
+
+    mesh.visual = trimesh.visual.texture.TextureVisuals(uv=uv)
+    return mesh
+
+
+def _profile_rows(points, crease_angle):
+    """
+    Split a lathe profile into vertex rows with 2D normals.
+
+    A point where the profile turns by more than crease_angle gets two rows,
+    one per side, so the corner stays sharp; elsewhere the neighbouring
+    segment normals are averaged.
+
+    Returns:
+    (np.ndarray, np.ndarray, np.ndarray, np.ndarray): (rows, 2) positions,
+    (rows, 2) unit normals, (rows,) arc length, and the (segments, 2) row
+    pairs to connect.
+    """
+    tangents = np.diff(points, axis=0)
+    length = np.linalg.norm(tangents, axis=1)
+    tangents = tangents / length[:, None]
+    # Outside is to the right of the direction of travel in the (r, z) plane
+    normals = np.column_stack([tangents[:, 1], -tangents[:, 0]])
+    arc = np.concatenate([[0], np.cumsum(length)])
+
+    closed = np.allclose(points[0], points[-1])
+    rows, row_normals, row_arc, segments = [], [], [], []
+    for i in range(len(points)):
+        before = normals[i - 1] if i > 0 else (normals[-1] if closed else None)
+        after = normals[i] if i < len(normals) else (normals[0] if closed else None)
+        if before is None or after is None:
+            sides = [before if after is None else after]
+        elif np.dot(before, after) < np.cos(crease_angle):
+            sides = [before, after]
+        else:
+            mean = before + after
+            sides = [mean / np.linalg.norm(mean)]
+        for side in sides:
+            rows.append(points[i])
+            row_normals.append(side)
+            row_arc.append(arc[i])
+        if i < len(normals):
+            # From the last row at this point to the first row at the next
+            segments.append(len(rows) - 1)
+    segments = np.array([[start, start + 1] for start in segments[:len(normals)]])
+    return np.array(rows), np.array(row_normals), np.array(row_arc), segments
+
+
+@span("lathe", "component")
+def lathe(profile, sections=64, cap=True, crease_angle=np.radians(30)):
+    """
+    Revolve a 2D profile around the Z axis.
+
+    Vertices, faces, normals and UVs are built for every section at once,
+    which makes crucibles, bells, ingots and flanges cheap to model and
+    lets the section count follow each part's size on screen.
+
+    Parameters:
+    profile (shapely.geometry.LineString or array): (radius, z) points.
+        Keep the outside of the surface on the right of the direction of
+        travel, e.g. list an outer wall from bottom to top. A profile that
+        ends where it starts is a closed ring and needs no caps.
+    sections (int): Segments around the axis.
+    cap (bool): Close each open end that is off the axis with a flat disc
+        (the first point's disc faces -Z, the last point's faces +Z).
+    crease_angle (float): Profile corners sharper than this, in radians,
+        get split normals.
+
+    Returns:
+    trimesh.Trimesh: The solid of revolution, with normals and UVs
+    (u around the axis, v along the profile).
+    """
+    import trimesh
+
+    points = np.asarray(getattr(profile, "coords", profile), dtype=np.float64)[:, :2]
+    rows, normals, arc, segments = _profile_rows(points, crease_angle)
+    n = int(sections)
+    count = len(rows)
+
+    # One ring per profile row, with the seam column repeated for the UVs
+    theta = np.linspace(0, 2 * np.pi, n + 1)
+    c, s = np.cos(theta), np.sin(theta)
+    vertices = np.stack([rows[:, :1] * c, rows[:, :1] * s,
+                         np.repeat(rows[:, 1:], n + 1, axis=1)], axis=-1).reshape(-1, 3)
+    vertex_normals = np.stack([normals[:, :1] * c, normals[:, :1] * s,
+                               np.repeat(normals[:, 1:], n + 1, axis=1)],
+                              axis=-1).reshape(-1, 3)
+    uv = np.column_stack([np.tile(theta / (2 * np.pi), count),
+                          np.repeat(arc / max(arc[-1], 1e-12), n + 1)])
+
+    # Two triangles per segment and section, CCW seen from the outside
+    j = np.arange(n)
+    a = segments[:, :1] * (n + 1) + j
+    b = segments[:, 1:] * (n + 1) + j
+    lower = np.stack([a, a + 1, b + 1], axis=-1)
+    upper = np.stack([a, b + 1, b], axis=-1)
+    # Triangles collapsing onto the axis would have no area
+    on_axis = np.isclose(rows[:, 0], 0)
+    faces = [lower[~on_axis[segments[:, 0]]].reshape(-1, 3),
+             upper[~on_axis[segments[:, 1]]].reshape(-1, 3)]
+
+    vertices, vertex_normals, uv = [vertices], [vertex_normals], [uv]
+    closed = np.allclose(points[0], points[-1])
+    if cap and not closed:
+        offset = count * (n + 1)
+        for (r, z), up in ((points[0], -1.0), (points[-1], 1.0)):
+            if np.isclose(r, 0):
+                continue
+            ring = np.column_stack([r * c[:n], r * s[:n], np.full(n, z)])
+            disc = np.vstack([ring, [[0, 0, z]]])
+            vertices.append(disc)
+            vertex_normals.append(np.tile([0, 0, up], (n + 1, 1)))
+            uv.append(0.5 + disc[:, :2] / (2 * r))
+            fan = np.column_stack([j, (j + 1) % n, np.full(n, n)]) + offset
+            faces.append(fan if up > 0 else fan[:, ::-1])
+            offset += n + 1
+
+    mesh = trimesh.Trimesh(vertices=np.vstack(vertices), faces=np.vstack(faces),
+                           vertex_normals=np.vstack(vertex_normals), process=False)
+    mesh.visual = trimesh.visual.texture.TextureVisuals(uv=np.vstack(uv).astype(np.float32))
+    return mesh
+
+
+def catmull_rom(points, samples=8):
+    """
+    Sample a Catmull-Rom spline through control points.
+
+    The end points are repeated so the curve starts and ends on them.
+
+    Parameters:
+    points (array): (n, d) control points.
+    samples (int): Points per span between two control points.
+
+    Returns:
+    np.ndarray: ((n - 1) * samples + 1, d) points on the curve.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if len(points) < 3 or samples < 2:
+        return points
+    padded = np.vstack([points[:1], points, points[-1:]])
+    spans = np.stack([padded[:-3], padded[1:-2], padded[2:-1], padded[3:]], axis=1)
+    t = np.arange(samples) / samples
+    powers = np.column_stack([np.ones_like(t), t, t ** 2, t ** 3])
+    basis = 0.5 * np.array([
+        [0, 2, 0, 0],
+        [-1, 0, 1, 0],
+        [2, -5, 4, -1],
+        [-1, 3, -3, 1],
+    ])
+    curve = np.einsum("tk,skd->std", powers @ basis, spans).reshape(-1, points.shape[1])
+    return np.vstack([curve, points[-1:]])
+
+
+def transport_frames(path):
+    """
+    Rotation-minimizing frames along a polyline (double reflection method).
+
+    Unlike Frenet frames these don't flip at inflections or spin on
+    straight runs, so a swept tube doesn't twist. Several polylines of the
+    same length can be passed as a (k, n, 3) array and are propagated
+    together.
+
+    Returns:
+    (np.ndarray, np.ndarray, np.ndarray): Unit tangents, normals and
+    binormals, shaped like path.
+    """
+    def dot(u, v):
+        return np.einsum("...d,...d->...", u, v)[..., None]
+
+    tangents = np.gradient(path, axis=-2)
+    length = np.linalg.norm(tangents, axis=-1, keepdims=True)
+    tangents = tangents / np.where(length > 0, length, 1)
+
+    normals = np.empty_like(path)
+    helper = np.eye(3)[np.argmin(np.abs(tangents[..., 0, :]), axis=-1)]
+    first = np.cross(tangents[..., 0, :], helper)
+    normals[..., 0, :] = first / np.linalg.norm(first, axis=-1, keepdims=True)
+    for i in range(path.shape[-2] - 1):
+        v1 = path[..., i + 1, :] - path[..., i, :]
+        c1 = dot(v1, v1)
+        c1_safe = np.where(c1 > 1e-18, c1, 1)
+        reflected = normals[..., i, :] - 2 / c1_safe * dot(v1, normals[..., i, :]) * v1
+        reflected_tangent = tangents[..., i, :] - 2 / c1_safe * dot(v1, tangents[..., i, :]) * v1
+        v2 = tangents[..., i + 1, :] - reflected_tangent
+        c2 = dot(v2, v2)
+        c2_safe = np.where(c2 > 1e-18, c2, 1)
+        step = np.where(c2 > 1e-18, reflected - 2 / c2_safe * dot(v2, reflected) * v2, reflected)
+        # Repeated points (padding) carry the frame over unchanged
+        normals[..., i + 1, :] = np.where(c1 > 1e-18, step, normals[..., i, :])
+    return tangents, normals, np.cross(tangents, normals)
+
+
+def _sweep_centerline(path, radius, samples):
+    """Smoothed centre line, arc length and radius at every point; see sweep."""
+    controls = np.asarray(path, dtype=np.float64)
+    path = catmull_rom(controls, samples)
+    keep = np.concatenate([[True], np.linalg.norm(np.diff(path, axis=0), axis=1) > 1e-9])
+    path = path[keep]
+    arc = np.concatenate([[0], np.cumsum(np.linalg.norm(np.diff(path, axis=0), axis=1))])
+    fraction = arc / max(arc[-1], 1e-12)
+
+    # Radius at every path point, from a constant, one value per control
+    # point, or a function of the fraction of the length travelled
+    if callable(radius):
+        r = np.asarray(radius(fraction), dtype=np.float64) * np.ones(len(path))
+    elif np.ndim(radius) == 0:
+        r = np.full(len(path), float(radius))
+    else:
+        control_fraction = np.linspace(0, 1, len(controls))
+        r = np.interp(fraction, control_fraction, np.asarray(radius, dtype=np.float64))
+    return path, arc, r
+
+
+def _tube_arrays(path, arc, r, frames, sections, cap):
+    """Vertices, faces, normals and UVs of one swept tube; see sweep."""
+    tangents, normals, binormals = frames
+    n = int(sections)
+    phi = np.linspace(0, 2 * np.pi, n + 1)
+    radial = (np.cos(phi)[None, :, None] * normals[:, None]
+              + np.sin(phi)[None, :, None] * binormals[:, None])
+    vertices = (path[:, None] + r[:, None, None] * radial).reshape(-1, 3)
+    # Tilt the normals back where the radius changes along the path
+    slope = np.gradient(r, arc) if len(path) > 1 and arc[-1] > 0 else np.zeros(len(path))
+    vertex_normals = radial - slope[:, None, None] * tangents[:, None]
+    vertex_normals = (vertex_normals / np.linalg.norm(vertex_normals, axis=2, keepdims=True)).reshape(-1, 3)
+    # v runs along the tube at the same scale as u runs around it
+    uv = np.column_stack([np.tile(phi / (2 * np.pi), len(path)),
+                          np.repeat(arc / (2 * np.pi * max(r.mean(), 1e-12)), n + 1)])
+
+    j = np.arange(n)
+    a = np.arange(len(path) - 1)[:, None] * (n + 1) + j
+    b = a + n + 1
+    faces = [np.stack([a, a + 1, b + 1], axis=-1).reshape(-1, 3),
+             np.stack([a, b + 1, b], axis=-1).reshape(-1, 3)]
+    vertices, vertex_normals, uv = [vertices], [vertex_normals], [uv]
+
+    if cap:
+        offset = len(path) * (n + 1)
+        for end, direction in ((0, -1.0), (-1, 1.0)):
+            ring = path[end] + r[end] * radial[end, :n]
+            vertices.append(np.vstack([ring, path[end]]))
+            vertex_normals.append(np.tile(direction * tangents[end], (n + 1, 1)))
+            uv.append(np.vstack([0.5 + 0.5 * np.column_stack([np.cos(phi[:n]), np.sin(phi[:n])]),
+                                 [[0.5, 0.5]]]))
+            fan = np.column_stack([j, (j + 1) % n, np.full(n, n)]) + offset
+            faces.append(fan if direction > 0 else fan[:, ::-1])
+            offset += n + 1
+    return np.vstack(vertices), np.vstack(faces), np.vstack(vertex_normals), np.vstack(uv)
+
+
+@span("sweep", "component")
+def sweep(path, radius, sections=16, samples=8, cap=True, texture=None):
+    """
+    Sweep a circle along a 3D path: cables, hoses, gas lines and ducts.
+
+    The path is smoothed with a Catmull-Rom spline through its points and
+    the tube is built in one pass over all rings, oriented with
+    rotation-minimizing frames so it never twists.
+
+    Parameters:
+    path (array): (n, 3) points the centre line passes through.
+    radius (float, array or callable): Constant radius, one radius per
+        path point, or a function of the fraction of the length travelled
+        (0 to 1) returning radii, e.g. for a tapering duct.
+    sections (int): Segments around the tube.
+    samples (int): Points per span between two path points; 1 keeps the
+        path as a polyline.
+    cap (bool): Close both ends with flat discs.
+    texture (str): Optional file in textures/, mapped along the tube.
+
+    Returns:
+    trimesh.Trimesh: The tube, with normals and UVs.
+    """
+    return _sweep_batch([path], [radius], sections, samples, cap, texture)
+
+
+@span("sweep_many", "component")
+def sweep_many(paths, radius, sections=16, samples=8, cap=True, texture=None):
+    """
+    Sweep several paths into one mesh, so a bundle of cables sharing a
+    material costs a single draw call.
+
+    Parameters:
+    paths (list): Paths as accepted by sweep.
+    radius: A constant radius or function shared by every path, or a list
+        with one radius per path, each as accepted by sweep.
+    Other parameters are as for sweep.
+
+    Returns:
+    trimesh.Trimesh: All tubes in one mesh.
+    """
+    if callable(radius) or np.isscalar(radius):
+        radius = [radius] * len(paths)
+    return _sweep_batch(paths, radius, sections, samples, cap, texture)
+
+
+def _sweep_batch(paths, radius, sections, samples, cap, texture):
+    import trimesh
+    from trimesh.visual.texture import SimpleMaterial, TextureVisuals
+
+    lines = [_sweep_centerline(path, r, samples) for path, r in zip(paths, radius)]
+    # Propagate every path's frames together, padding short paths by
+    # repeating their last point
+    longest = max(len(path) for path, _, _ in lines)
+    padded = np.stack([np.vstack([path, np.repeat(path[-1:], longest - len(path), axis=0)])
+                       for path, _, _ in lines])
+    frames = transport_frames(padded)
+
+    vertices, faces, normals, uv = [], [], [], []
+    offset = 0
+    for k, (path, arc, r) in enumerate(lines):
+        count = len(path)
+        v, f, n, t = _tube_arrays(path, arc, r, [frame[k, :count] for frame in frames],
+                                  sections, cap)
+        vertices.append(v)
+        faces.append(f + offset)
+        normals.append(n)
+        uv.append(t)
+        offset += len(v)
+
+    mesh = trimesh.Trimesh(vertices=np.vstack(vertices), faces=np.vstack(faces),
+                           vertex_normals=np.vstack(normals), process=False)
+    material = SimpleMaterial(image=texture_image(texture)) if texture else None
+    mesh.visual = TextureVisuals(uv=np.vstack(uv).astype(np.float32), material=material)
+    return mesh
+
+
+def _farthest_points(points, count):
+    """Pick count points spread over a point cloud, starting from the first."""
+    chosen = [0]
+    distance = np.linalg.norm(points - points[0], axis=1)
+    for _ in range(count - 1):
+        chosen.append(int(np.argmax(distance)))
+        distance = np.minimum(distance, np.linalg.norm(points - points[chosen[-1]], axis=1))
+    return points[chosen]
+
+
+def _round_axis(extents, tolerance=0.05):
+    """Return the axis whose cross-section is round (other two extents equal), or None."""
+    for axis in np.argsort(extents):
+        a, b = (extents[i] for i in range(3) if i != axis)
+        if abs(a - b) <= tolerance * max(a, b):
+            return int(axis)
+    return None
+
+
+def fit_collider(mesh, shape="auto", max_hull_vertices=64):
+    """
+    Fit one collision proxy around a mesh.
+
+    The proxy lives in the mesh's oriented bounding box frame. With
+    shape="auto" the cheapest Havok shape that fills the mesh's convex hull
+    well is picked: sphere, capsule (long round parts), cylinder, box, and
+    only otherwise a convex hull reduced to max_hull_vertices points.
+
+    Parameters:
+    mesh (trimesh.Trimesh): Geometry to wrap.
+    shape (str): "auto", "box", "sphere", "cylinder", "capsule" or "hull".
+    max_hull_vertices (int): Vertex limit for hull proxies.
+
+    Returns:
+    (np.ndarray, dict, trimesh.Trimesh or None): The 4x4 proxy frame in the
+    mesh's coordinates, the shape parameters, and the hull mesh for
+    "hull" proxies.
+    """
+    import trimesh
+
+    to_origin, extents = trimesh.bounds.oriented_bounds(mesh)
+    frame = np.linalg.inv(to_origin)
+    extents = np.asarray(extents, dtype=float)
+
+    hull = None
+    fill = 1.0
+    flat = extents.min() <= 1e-6 * extents.max()
+    if not flat and shape in ("auto", "hull"):
+        hull = mesh.convex_hull
+        fill = hull.volume / np.prod(extents)
+
+    axis = _round_axis(extents)
+    if shape == "auto":
+        if flat or fill > 0.85:
+            shape = "box"
+        elif axis is not None and np.ptp(extents) <= 0.05 * extents.max() and 0.45 < fill < 0.6:
+            shape = "sphere"
+        elif axis is not None and 0.7 < fill <= 0.85:
+            # A capsule is cheaper and steadier than a cylinder for rods and tubes
+            slender = extents[axis] > 4 * extents[(axis + 1) % 3]
+            shape = "capsule" if slender else "cylinder"
+        else:
+            shape = "hull"
+    if shape in ("cylinder", "capsule") and axis is None:
+        axis = int(np.argmax(extents))
+
+    if shape == "box":
+        return frame, {"shape": "box", "extents": extents.tolist()}, None
+    if shape == "sphere":
+        return frame, {"shape": "sphere", "radius": float(extents.max() / 2)}, None
+    if shape in ("cylinder", "capsule"):
+        radius = float(max(extents[i] for i in range(3) if i != axis) / 2)
+        # Capsule end points sit one radius inside the ends
+        half = extents[axis] / 2 - (radius if shape == "capsule" else 0)
+        point = np.zeros(3)
+        point[axis] = max(half, 0)
+        return frame, {"shape": shape, "radius": radius,
+                       "pointA": (-point).tolist(), "pointB": point.tolist()}, None
+
+    if hull is None:
+        hull = mesh.convex_hull
+    hull = hull.copy()
+    hull.apply_transform(to_origin)
+    if len(hull.vertices) > max_hull_vertices:
+        hull = trimesh.convex.convex_hull(_farthest_points(hull.vertices, max_hull_vertices))
+    return frame, {"shape": "convex_hull"}, hull
+
+
+def _cluster_bodies(bodies, max_parts):
+    """Group bodies into at most max_parts lists by k-means on their centroids."""
+    if len(bodies) <= max_parts:
+        return [[body] for body in bodies]
+    centroids = np.array([body.centroid for body in bodies])
+    centers = _farthest_points(centroids, max_parts)
+    for _ in range(10):
+        labels = np.argmin(np.linalg.norm(centroids[:, None] - centers[None], axis=2), axis=1)
+        centers = np.array([centroids[labels == k].mean(axis=0) if np.any(labels == k) else centers[k]
+                            for k in range(max_parts)])
+    return [[b for b, label in zip(bodies, labels) if label == k]
+            for k in range(max_parts) if np.any(labels == k)]
+
+
+@span("collision_proxies", "physics")
+def collision_proxies(component, shape="auto", max_parts=8, max_hull_vertices=64):
+    """
+    Build simplified collision proxies for a component.
+
+    A component made of several disconnected bodies (concatenated vents,
+    cables, a honeycomb) gets an approximate convex decomposition: the
+    bodies are clustered into at most max_parts groups and each group is
+    fitted on its own. Anything else gets a single proxy from fit_collider.
+
+    Parameters:
+    component (Node, trimesh.Trimesh or trimesh.Scene): The component.
+    shape (str): Proxy shape passed to fit_collider, or "decompose".
+    max_parts (int): Most proxies a decomposed component may have.
+    max_hull_vertices (int): Vertex limit for hull proxies.
+
+    Returns:
+    list of (np.ndarray, dict, trimesh.Trimesh or None): World-space
+    proxy frames, shape parameters and hull meshes.
+    """
+    import trimesh
+
+    if isinstance(component, Node):
+        mesh, matrix = component.geometry, component.matrix
+    elif isinstance(component, trimesh.Scene):
+        mesh, matrix = component.dump(concatenate=True), np.eye(4)
+    else:
+        mesh, matrix = component, np.eye(4)
+    if len(mesh.faces) == 0:
+        return []
+
+    parts = [[mesh]]
+    if shape in ("auto", "decompose"):
+        # Merge seam vertices first so UV splits don't count as separate bodies
+        welded = trimesh.Trimesh(vertices=mesh.vertices, faces=mesh.faces, process=True)
+        bodies = welded.split(only_watertight=False)
+        if len(bodies) > 1:
+            parts = _cluster_bodies(bodies, max_parts)
+    if shape == "decompose":
+        shape = "auto"
+
+    proxies = []
+    for part in parts:
+        part_mesh = part[0] if len(part) == 1 else trimesh.util.concatenate(part)
+        frame, params, hull = fit_collider(part_mesh, shape, max_hull_vertices)
+        proxies.append((matrix @ frame, params, hull))
+    return proxies
+
+
+def add_collider(scene, name, component, shape="auto", **kwargs):
+    """
+    Add collision proxies for a component to a scene as extra nodes.
+
+    Each proxy is a node named "<name>_collider" (numbered when there are
+    several) whose glTF extras hold {"collider": {"shape": ..., "for": name}}
+    plus the shape's parameters in the node's own frame. Convex hulls carry
+    their hull as the node's mesh; clients should bind it as a physics shape
+    and not draw it. shape=None adds nothing.
+    """
+    if shape is None:
+        return
+    proxies = collision_proxies(component, shape, **kwargs)
+    for i, (matrix, params, hull) in enumerate(proxies):
+        node_name = f"{name}_collider" if len(proxies) == 1 else f"{name}_collider_{i}"
+        metadata = {"collider": dict(params, **{"for": name})}
+        if hull is None:
+            scene.graph.update(frame_to=node_name, frame_from=scene.graph.base_frame,
+                               matrix=matrix, metadata=metadata)
+        else:
+            scene.add_geometry(hull, node_name=node_name, geom_name=node_name,
+                               transform=matrix, metadata=metadata)
@@ -0,0 +1,139 @@
+"""
+Build several parameter sets of a model in one run.
+
+A variant is a dict of parameters that the model script reads from its
+`params` global (lasercutter.py takes the machine size as x, y and z). All
+variants are built one after another in this process, so modules are
+imported once and whatever util keeps in memory carries over from one
+variant to the next: texture images, imported assets, panel outlines,
+glyphs and every part built through shared_component. Only the parts whose
+inputs changed are rebuilt, so a size sweep costs much less than running
+the script once per size.
+
+Each variant is written to variants/<script>_<name>.glb, where the name is
+the variant's "name" entry or its parameters joined together, and listed
+in variants/manifest.json with its parameters, size, hash and build time.
+
+Usage:
+    python3 variants.py lasercutter.py x=1000,y=500,z=600 x=2400,y=1400,z=1100
+    python3 variants.py lasercutter.py --file sizes.json [--publish]
+
+A --file holds a JSON list of parameter dicts. Variants are only copied to
+the publish directories (see util.publish_dirs) with --publish.
+"""
+import argparse
+import hashlib
+import json
+import os
+import runpy
+import time
+
+import util
+from util import here
+
+variant_dir = os.path.join(here, "variants")
+
+
+def parse_variant(text):
+    """Parse "x=1000,y=500,name=xr" into a dict, reading numbers as numbers."""
+    params = {}
+    for item in text.split(","):
+        key, _, value = item.partition("=")
+        try:
+            params[key.strip()] = json.loads(value)
+        except ValueError:
+            params[key.strip()] = value
+    return params
+
+
+def variant_name(params):
+    if "name" in params:
+        return str(params["name"])
+    return "_".join(f"{key}{value}" for key, value in params.items())
+
+
+def build_variants(script, variants, output_dir=variant_dir, publish=False):
+    """
+    Build every variant of a model script in this process.
+
+    Parameters:
+    script (str): Model script, e.g. "lasercutter.py".
+    variants (list): Parameter dicts; an optional "name" entry names the file.
+    output_dir (str): Where the GLBs and manifest.json are written.
+    publish (bool): Also copy each GLB to util.publish_dirs.
+
+    Returns:
+    dict: The manifest.
+    """
+    from budget import analyse_glb
+
+    path = os.path.join(here, script)
+    model = os.path.splitext(os.path.basename(script))[0]
+    os.makedirs(output_dir, exist_ok=True)
+
+    publish_dirs = list(util.publish_dirs)
+    if not publish:
+        util.publish_dirs[:] = []
+    entries = []
+    start = time.perf_counter()
+    try:
+        for params in variants:
+            name = variant_name(params)
+            export_path = os.path.join(output_dir, f"{model}_{name}.glb")
+            params = {key: value for key, value in params.items() if key != "name"}
+
+            print(f"Building {model} {name}")
+            t0 = time.perf_counter()
+            runpy.run_path(path, init_globals={"params": params, "export_path": export_path},
+                           run_name="__main__")
+            seconds = time.perf_counter() - t0
+
+            if not os.path.exists(export_path):
+                raise RuntimeError(f"{script} did not write {export_path}; "
+                                   "it must export to the export_path global")
+            with open(export_path, "rb") as f:
+                data = f.read()
+            stats = analyse_glb(data)
+            entries.append({
+                "name": name,
+                "params": params,
+                "file": os.path.basename(export_path),
+                "bytes": len(data),
+                "sha256": hashlib.sha256(data).hexdigest(),
+                "draw_calls": stats["draw_calls"],
+                "triangles": stats["triangles"],
+                "seconds": round(seconds, 3),
+            })
+    finally:
+        util.publish_dirs[:] = publish_dirs
+
+    manifest = {
+        "model": script,
+        "variants": entries,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    util.write_atomic(os.path.join(output_dir, "manifest.json"),
+                      (json.dumps(manifest, indent=2) + "\n").encode("utf-8"))
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("script", help="model script, e.g. lasercutter.py")
+    parser.add_argument("variants", nargs="*", help="key=value,... per variant")
+    parser.add_argument("--file", help="JSON list of parameter dicts")
+    parser.add_argument("--output", default=variant_dir, help="output directory")
+    parser.add_argument("--publish", action="store_true", help="also copy to util.publish_dirs")
+    args = parser.parse_args()
+
+    variants = [parse_variant(text) for text in args.variants]
+    if args.file:
+        with open(args.file) as f:
+            variants += json.load(f)
+    if not variants:
+        parser.error("no variants given")
+
+    manifest = build_variants(args.script, variants, args.output, args.publish)
+    for entry in manifest["variants"]:
+        print(f"{entry['file']:<40}{entry['bytes'] / 1024:>8.0f} KB{entry['seconds']:>8.2f} s")
+    print(f"{len(manifest['variants'])} variants in {manifest['seconds']:.2f} s")
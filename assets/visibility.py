@@ -0,0 +1,261 @@
+"""
+Offline hidden-surface removal.
+
+Samples camera positions from the region the viewer can orbit in and
+ray-casts from each of them to points on every triangle of the assembled
+scene. Triangles that no camera can see (back faces of panels behind the
+doors, the outer sides of the room walls, faces buried inside other parts)
+are dropped.
+
+Transparent materials (alphaMode BLEND) are tested for visibility but do
+not hide what is behind them. Collision proxies are left alone.
+
+Usage in a model script, on the scene that is about to be exported:
+
+    view_region = {"target": [0, 600, -700], "radius": (100, 5000),
+                   "beta": (0, np.pi), "bounds": room_interior}
+    remove_hidden_surfaces(new_scene, view_region)
+
+The region has to cover every camera a client offers; anything a client
+can see only from outside it is lost. mode="split" keeps the hidden
+triangles as "<name>_hidden" nodes in the same file instead, to check
+what a region would remove.
+"""
+import numpy as np
+
+from profiler import span
+
+# Barycentric sample points per triangle: the centroid and one point
+# pulled towards each corner, so a partly covered triangle is still seen
+FACE_SAMPLES = np.array([
+    [1 / 3, 1 / 3, 1 / 3],
+    [2 / 3, 1 / 6, 1 / 6],
+    [1 / 6, 2 / 3, 1 / 6],
+    [1 / 6, 1 / 6, 2 / 3],
+])
+
+# Rays per intersector call, which bounds memory in the fallback caster
+RAY_BATCH = 4096
+
+
+def camera_positions(target, radius, beta=(0.1, np.pi / 2), bounds=None, count=96, seed=0):
+    """
+    Sample camera positions from an orbit camera's allowed region.
+
+    The orbit is Y-up like the viewers: beta is the angle from +Y (0 looks
+    straight down, pi/2 is level with the target) and alpha goes all the
+    way round. Positions are spread evenly on a Fibonacci lattice and
+    jittered in radius.
+
+    Parameters:
+    target (list): Orbit centre.
+    radius (tuple): (min, max) orbit distance.
+    beta (tuple): (min, max) polar angle in radians.
+    bounds (array): Optional (2, 3) box the camera must stay inside, e.g.
+        the room interior.
+    count (int): Number of positions to return.
+    seed (int): Seed for the radius jitter, so builds are repeatable.
+
+    Returns:
+    np.ndarray: (n, 3) camera positions, n <= count if bounds clip some.
+    """
+    rng = np.random.default_rng(seed)
+    # Oversample so clipping against bounds still leaves enough cameras
+    n = count * 4 if bounds is not None else count
+    i = np.arange(n) + 0.5
+    cos_lo, cos_hi = np.cos(beta[1]), np.cos(beta[0])
+    polar = np.arccos(cos_lo + (cos_hi - cos_lo) * i / n)
+    alpha = np.pi * (1 + 5 ** 0.5) * i
+    r = rng.uniform(radius[0], radius[1], n)
+
+    directions = np.column_stack([
+        np.sin(polar) * np.cos(alpha),
+        np.cos(polar),
+        np.sin(polar) * np.sin(alpha),
+    ])
+    positions = np.asarray(target, dtype=float) + directions * r[:, None]
+    if bounds is not None:
+        bounds = np.asarray(bounds, dtype=float)
+        inside = np.all((positions > bounds[0]) & (positions < bounds[1]), axis=1)
+        positions = positions[inside]
+    if len(positions) > count:
+        # Thin out evenly; the lattice runs from the horizon to the top
+        positions = positions[np.linspace(0, len(positions) - 1, count).astype(int)]
+    return positions
+
+
+def _drawable_nodes(scene):
+    """Yield (node, world transform, geometry name, geometry) for every drawn node."""
+    graph = scene.graph.transforms
+    for node in scene.graph.nodes_geometry:
+        metadata = graph.edge_data.get((graph.parents.get(node), node), {}).get("metadata")
+        if metadata and "collider" in metadata:
+            continue
+        transform, geometry_name = scene.graph[node]
+        yield node, transform, geometry_name, scene.geometry[geometry_name]
+
+
+def _is_transparent(mesh):
+    material = getattr(mesh.visual, "material", None)
+    return getattr(material, "alphaMode", None) == "BLEND"
+
+
+def visible_faces(scene, cameras):
+    """
+    Work out which triangles of each geometry can be seen from any camera.
+
+    A geometry shared by several nodes keeps a face if any instance of it
+    is visible.
+
+    Returns:
+    dict: {geometry name: boolean mask over its faces}
+    """
+    import trimesh
+
+    nodes = list(_drawable_nodes(scene))
+    triangles, normals, owners = [], [], []
+    occluder_triangles = []
+    for node, transform, geometry_name, mesh in nodes:
+        world = trimesh.transformations.transform_points(
+            mesh.vertices, transform)[mesh.faces]
+        triangles.append(world)
+        normals.append(trimesh.triangles.normals(world)[0] if len(world) else np.zeros((0, 3)))
+        owners.append((geometry_name, len(world)))
+        if not _is_transparent(mesh):
+            occluder_triangles.append(world)
+
+    triangles = np.concatenate(triangles)
+    normals = np.concatenate(normals)
+    occluders = trimesh.Trimesh(**trimesh.triangles.to_kwargs(np.concatenate(occluder_triangles)),
+                                process=False)
+    occluder_normals = trimesh.triangles.normals(occluders.triangles)[0]
+    # Embree when embreex is installed, trimesh's pure Python caster otherwise
+    intersector = occluders.ray
+
+    # Points on each face, nudged off the surface so a face doesn't hide itself
+    scale = np.ptp(triangles.reshape(-1, 3), axis=0).max()
+    epsilon = 1e-5 * scale
+    points = np.einsum("sk,fkd->fsd", FACE_SAMPLES, triangles)
+    points += normals[:, None, :] * epsilon
+    points = points.reshape(-1, 3)
+    point_face = np.repeat(np.arange(len(triangles)), len(FACE_SAMPLES))
+    point_normal = normals[point_face]
+
+    seen = np.zeros(len(triangles), dtype=bool)
+    for camera in cameras:
+        # Only front-facing samples of faces not already known to be visible
+        to_camera = camera - points
+        candidates = np.nonzero(~seen[point_face] &
+                                (np.einsum("ij,ij->i", to_camera, point_normal) > 0))[0]
+        if len(candidates) == 0:
+            continue
+        distance = np.linalg.norm(to_camera[candidates], axis=1)
+        directions = -to_camera[candidates] / distance[:, None]
+        origins = np.repeat(camera[None], len(candidates), axis=0)
+
+        hit = np.concatenate([
+            intersector.intersects_first(origins[i:i + RAY_BATCH], directions[i:i + RAY_BATCH])
+            for i in range(0, len(origins), RAY_BATCH)
+        ])
+        visible = hit < 0
+        blocked = np.nonzero(hit >= 0)[0]
+        if len(blocked):
+            # Distance along each ray to the plane of the triangle it hit
+            n = occluder_normals[hit[blocked]]
+            v0 = occluders.triangles[hit[blocked], 0]
+            along = (np.einsum("ij,ij->i", n, v0 - origins[blocked]) /
+                     np.einsum("ij,ij->i", n, directions[blocked]))
+            visible[blocked] = along >= distance[blocked] - 2 * epsilon
+        seen[point_face[candidates[visible]]] = True
+
+    masks = {}
+    start = 0
+    for geometry_name, count in owners:
+        mask = seen[start:start + count]
+        masks[geometry_name] = masks.get(geometry_name, mask) | mask
+        start += count
+    return masks
+
+
+def face_subset(mesh, mask):
+    """
+    Copy of a mesh with only the masked faces and the vertices they use.
+
+    Unlike Trimesh.copy, per-vertex visual attributes such as baked
+    ambient occlusion colours, and explicit vertex normals, are carried over.
+    """
+    subset = mesh.copy()
+    subset.update_faces(mask)
+    subset.remove_unreferenced_vertices()
+    referenced = np.zeros(len(mesh.vertices), dtype=bool)
+    referenced[mesh.faces[mask]] = True
+    for key, values in getattr(mesh.visual, "vertex_attributes", {}).items():
+        subset.visual.vertex_attributes[key] = values[referenced]
+    if "vertex_normals" in mesh._cache:
+        subset.vertex_normals = mesh.vertex_normals[referenced]
+    return subset
+
+
+def buffer_bytes(mesh):
+    """Approximate GLB bytes of a mesh: float32 positions, normals and UVs plus uint32 indices."""
+    stride = 24 + (8 if getattr(mesh.visual, "uv", None) is not None else 0)
+    return len(mesh.vertices) * stride + len(mesh.faces) * 12
+
+
+@span("remove_hidden_surfaces", "visibility")
+def remove_hidden_surfaces(scene, view_region, mode="drop", cameras=384):
+    """
+    Remove triangles no allowed camera can see from a scene, in place.
+
+    Parameters:
+    scene (trimesh.Scene): The assembled scene about to be exported.
+    view_region (dict): Keyword arguments for camera_positions (target,
+        radius, beta, bounds).
+    mode (str): "drop" deletes hidden triangles, "split" moves them to a
+        "<node>_hidden" node with extras {"priority": "low"}.
+    cameras (int): Number of camera positions to sample.
+
+    Returns:
+    dict: {geometry name: {"triangles": removed, "bytes": removed}} for
+    every geometry that lost triangles.
+    """
+    positions = camera_positions(count=cameras, **view_region)
+    masks = visible_faces(scene, positions)
+
+    report = {}
+    for geometry_name, mask in masks.items():
+        if mask.all():
+            continue
+        mesh = scene.geometry[geometry_name]
+        kept = face_subset(mesh, mask)
+        report[geometry_name] = {
+            "triangles": int((~mask).sum()),
+            "bytes": buffer_bytes(mesh) - buffer_bytes(kept),
+        }
+
+        if mode == "split":
+            hidden = face_subset(mesh, ~mask)
+            hidden_name = f"{geometry_name}_hidden"
+            scene.geometry[hidden_name] = hidden
+            for node in scene.graph.geometry_nodes[geometry_name]:
+                transform, _ = scene.graph[node]
+                scene.graph.update(frame_to=f"{node}_hidden", frame_from=scene.graph.base_frame,
+                                   matrix=transform, geometry=hidden_name,
+                                   metadata={"priority": "low"})
+
+        if len(kept.faces):
+            scene.geometry[geometry_name] = kept
+        else:
+            # Don't leave nodes pointing at a mesh that no longer exists
+            for node in list(scene.graph.geometry_nodes[geometry_name]):
+                scene.graph.transforms.remove_node(node)
+            scene.delete_geometry(geometry_name)
+    return report
+
+
+def print_report(report):
+    print(f"\n{'hidden surfaces':<32}{'triangles':>10}{'bytes':>10}")
+    for name, row in sorted(report.items(), key=lambda item: -item[1]["bytes"]):
+        print(f"{name:<32}{row['triangles']:>10}{row['bytes']:>10}")
+    print(f"{'total':<32}{sum(r['triangles'] for r in report.values()):>10}"
+          f"{sum(r['bytes'] for r in report.values()):>10}")
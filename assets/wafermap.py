@@ -0,0 +1,373 @@
+"""
+Die patterns on a wafer, as a deep-zoom texture pyramid.
+
+The lithography, etch and electron microscope steps need to show a wafer
+with thousands of dies, down to the circuit on a single die, which is far
+too much for geometry or a single texture. This script rasterizes the
+wafer with NumPy into tiles at every power-of-two resolution and writes:
+
+    wafer/wafer.dzi            Deep Zoom descriptor (OpenSeadragon and
+                               similar viewers open it directly).
+    wafer/wafer_files/L/C_R.png
+                               The tiles: level L (0 is 1x1 pixels, the
+                               last is full size), column C, row R.
+    wafer/index.json           Per level: size, tile grid, mm per pixel and
+                               which tiles exist; plus the wafer and die
+                               layout, so a viewer can map a die to pixels.
+    textures/wafer.png         The 512 pixel level, used as the base color
+                               of the wafer in lasercutter.py. Only the
+                               default --size writes it, so preview builds
+                               at other sizes leave the model alone.
+
+Tiles that don't touch the wafer are not written; a viewer should treat
+them as transparent. In index.json each level lists, per tile row, the
+[first, last + 1) columns that exist, which is a single span because the
+wafer is round.
+
+Every feature is an axis-aligned rectangle or a periodic run of them, so
+full-size tiles are box-filtered analytically rather than point-sampled
+and show no moire even where the circuit is finer than a pixel. Smaller
+levels average 2x2 pixels of the level above in linear light. Subtrees of
+the pyramid are built in parallel across processes.
+
+Usage:
+    python3 wafermap.py [--size 16384] [--tile 256] [--workers N] [--force]
+
+The output is left alone if it is newer than this script unless --force
+is given.
+"""
+import argparse
+import io
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+from PIL import Image
+
+from texturegen import GAMMA, write_if_changed
+from util import here, write_atomic
+
+output_dir = os.path.join(here, "wafer")
+overview_path = os.path.join(here, "textures", "wafer.png")
+OVERVIEW_SIZE = 512
+
+# Full size of the pyramid textures/wafer.png is taken from. The overview
+# level of other sizes samples the dies differently, so they don't write it.
+DEFAULT_SIZE = 16384
+
+# Dimensions in mm. The flat is a chord this deep on the +x side, the same
+# proportion as the one cut into the wafer in lasercutter.py.
+WAFER = {
+    "diameter": 300.0,
+    "flat": 18.0,
+    "edge_exclusion": 3.0,
+    "die": (5.0, 4.0),
+    "scribe": 0.1,
+}
+
+
+def srgb(*rgb):
+    return np.array(rgb, dtype=np.float32) ** GAMMA
+
+
+SILICON = srgb(0.42, 0.45, 0.50)
+SCRIBE = srgb(0.58, 0.60, 0.63)
+OXIDE = srgb(0.30, 0.22, 0.45)
+PAD = srgb(0.85, 0.72, 0.38)
+SRAM = srgb(0.20, 0.32, 0.40)
+SRAM_LINE = srgb(0.45, 0.60, 0.62)
+CELL_ROW = srgb(0.26, 0.38, 0.30)
+METAL = srgb(0.66, 0.58, 0.52)
+
+
+def interval(x, a, b, pixel):
+    """Fraction of each pixel [x - pixel/2, x + pixel/2] covered by [a, b]."""
+    return np.clip(np.minimum(x + pixel / 2, b) - np.maximum(x - pixel / 2, a), 0, None) / pixel
+
+
+def stripes(x, period, width, pixel):
+    """Fraction of each pixel covered by stripes [k * period, k * period + width]."""
+    def integral(t):
+        # Covered length in [0, t]
+        k = np.floor(t / period)
+        return k * width + np.minimum(t - k * period, width)
+    return (integral(x + pixel / 2) - integral(x - pixel / 2)) / pixel
+
+
+def blend(color, over, coverage):
+    return color + (over - color) * coverage[..., None].astype(np.float32)
+
+
+def die_pattern(u, v, pixel, die):
+    """
+    Linear RGB of the circuit at die-local mm (u, v), box-filtered over pixel.
+
+    The die has a ring of bond pads, two SRAM macros down the left half
+    and rows of standard cells under vertical metal on the rest.
+    """
+    w, h = die
+    color = np.broadcast_to(OXIDE, np.broadcast_shapes(u.shape, v.shape) + (3,)).copy()
+
+    inset, pad, pitch = 0.1, 0.08, 0.15
+    ring = interval(u, inset, w - inset, pixel) * interval(v, inset, h - inset, pixel)
+    across = stripes(u - inset, pitch, pad, pixel) * (interval(v, inset, inset + pad, pixel)
+                                                    + interval(v, h - inset - pad, h - inset, pixel))
+    down = stripes(v - inset, pitch, pad, pixel) * (interval(u, inset, inset + pad, pixel)
+                                                  + interval(u, w - inset - pad, w - inset, pixel))
+    color = blend(color, PAD, np.clip(across + down, 0, 1) * ring)
+
+    core = 0.3
+    x0, x1, y0, y1 = core, w - core, core, h - core
+    split = x0 + (x1 - x0) * 0.35
+    ymid = (y0 + y1) / 2
+    sram = interval(u, x0, split - 0.05, pixel) * (interval(v, y0, ymid - 0.05, pixel)
+                                                 + interval(v, ymid + 0.05, y1, pixel))
+    grid = 1 - (1 - stripes(u, 0.004, 0.001, pixel)) * (1 - stripes(v, 0.004, 0.001, pixel))
+    logic = interval(u, split, x1, pixel) * interval(v, y0, y1, pixel)
+
+    color = blend(color, SRAM, sram)
+    color = blend(color, SRAM_LINE, sram * grid)
+    color = blend(color, CELL_ROW, logic * stripes(v, 0.03, 0.015, pixel))
+    return blend(color, METAL, logic * stripes(u, 0.02, 0.006, pixel) * 0.6)
+
+
+def layout(size, tile, wafer=WAFER):
+    """Pyramid geometry shared by every tile."""
+    max_level = int(np.log2(size))
+    if 2 ** max_level != size or size < tile:
+        raise ValueError(f"size must be a power of two of at least {tile}, not {size}")
+    radius = wafer["diameter"] / 2
+    die_w, die_h = wafer["die"]
+    pitch = np.array([die_w + wafer["scribe"], die_h + wafer["scribe"]])
+    return SimpleNamespace(size=size, tile=tile, max_level=max_level, radius=radius,
+                           flat_x=radius - wafer["flat"], die=(die_w, die_h), pitch=pitch,
+                           # Die grid centered on the wafer, a die's lower left corner at
+                           # origin + index * pitch
+                           origin=-pitch * np.floor(radius / pitch + 0.5) + wafer["scribe"] / 2,
+                           printable=radius - wafer["edge_exclusion"], wafer=wafer)
+
+
+def level_size(spec, level):
+    return spec.size >> (spec.max_level - level)
+
+
+def tile_bounds(spec, level, col, row):
+    """(x0, x1, y0, y1) of a tile in wafer mm, y up, and its pixel size in mm."""
+    pixel = 2 * spec.radius / level_size(spec, level)
+    x0 = -spec.radius + col * spec.tile * pixel
+    y1 = spec.radius - row * spec.tile * pixel
+    n = min(spec.tile, level_size(spec, level))
+    return x0, x0 + n * pixel, y1 - n * pixel, y1, pixel
+
+
+def tile_exists(spec, level, col, row):
+    """True if the tile touches the wafer."""
+    x0, x1, y0, y1, _ = tile_bounds(spec, level, col, row)
+    dx = max(x0, 0, -x1)
+    dy = max(y0, 0, -y1)
+    return dx * dx + dy * dy < spec.radius ** 2 and x0 < spec.flat_x
+
+
+def render_tile(spec, col, row):
+    """Premultiplied linear RGBA of one full-size tile."""
+    x0, x1, y0, y1, pixel = tile_bounds(spec, spec.max_level, col, row)
+    # A row of x and a column of y: everything but the blending is separable
+    x = (x0 + (np.arange(spec.tile) + 0.5) * pixel)[None, :]
+    y = (y1 - (np.arange(spec.tile) + 0.5) * pixel)[:, None]
+
+    # Die-local coordinates, and each pixel's die's lower left corner
+    cx = spec.origin[0] + np.floor((x - spec.origin[0]) / spec.pitch[0]) * spec.pitch[0]
+    cy = spec.origin[1] + np.floor((y - spec.origin[1]) / spec.pitch[1]) * spec.pitch[1]
+    u, v = (x - cx).astype(np.float32), (y - cy).astype(np.float32)
+    # Only whole dies inside the edge exclusion and clear of the flat are printed
+    far_x = np.maximum(np.abs(cx), np.abs(cx + spec.die[0]))
+    far_y = np.maximum(np.abs(cy), np.abs(cy + spec.die[1]))
+    printed = ((far_x ** 2 + far_y ** 2 <= spec.printable ** 2)
+               & (cx + spec.die[0] <= spec.flat_x - spec.wafer["edge_exclusion"]))
+
+    cell = interval(u, 0, spec.die[0], pixel) * interval(v, 0, spec.die[1], pixel)
+    color = blend(np.broadcast_to(SCRIBE, cell.shape + (3,)), die_pattern(u, v, pixel, spec.die), cell)
+    color = np.where(printed[..., None], color, SILICON)
+
+    r = np.hypot(x, y)
+    alpha = (np.clip((spec.radius - r) / pixel + 0.5, 0, 1)
+             * np.clip((spec.flat_x - x) / pixel + 0.5, 0, 1))
+    return np.concatenate([color * alpha[..., None], alpha[..., None]], axis=-1).astype(np.float32)
+
+
+def downsample(image):
+    return (image[0::2, 0::2] + image[1::2, 0::2] + image[0::2, 1::2] + image[1::2, 1::2]) / 4
+
+
+def tile_path(level, col, row):
+    return os.path.join(output_dir, "wafer_files", str(level), f"{col}_{row}.png")
+
+
+def encode(image):
+    """Premultiplied linear RGBA to an sRGB PNG with straight alpha."""
+    alpha = image[..., 3:]
+    color = np.where(alpha > 0, image[..., :3] / np.maximum(alpha, 1e-8), 0)
+    pixels = np.concatenate([np.clip(color, 0, 1) ** (1 / GAMMA), alpha], axis=-1)
+    buffer = io.BytesIO()
+    Image.fromarray(np.round(pixels * 255).astype(np.uint8), "RGBA").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def build_tile(spec, level, col, row, built=None):
+    """
+    Build a tile and every tile under it, writing each one.
+
+    Tiles already in built, by (level, col, row), are taken from there
+    instead of being built again.
+
+    Returns:
+    np.ndarray or None: The tile's premultiplied linear RGBA, or None if
+    it doesn't touch the wafer.
+    """
+    if built is not None and (level, col, row) in built:
+        return built[(level, col, row)]
+    if not tile_exists(spec, level, col, row):
+        return None
+    if level == spec.max_level:
+        image = render_tile(spec, col, row)
+    else:
+        # The four tiles below, or the single one once a level fits in a tile
+        n = min(spec.tile, level_size(spec, level + 1))
+        children = 2 if level_size(spec, level + 1) > spec.tile else 1
+        image = np.zeros((children * n, children * n, 4), dtype=np.float32)
+        for dr in range(children):
+            for dc in range(children):
+                child = build_tile(spec, level + 1, 2 * col + dc, 2 * row + dr, built)
+                if child is not None:
+                    image[dr * n:(dr + 1) * n, dc * n:(dc + 1) * n] = child
+        image = downsample(image)
+
+    path = tile_path(level, col, row)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(encode(image))
+    return image
+
+
+def _build_subtrees(args):
+    spec, level, tiles = args
+    return {(level, col, row): build_tile(spec, level, col, row) for col, row in tiles}
+
+
+def build(size=DEFAULT_SIZE, tile=256, workers=None):
+    """
+    Write the whole pyramid, its descriptor and index, and at DEFAULT_SIZE
+    the overview texture.
+
+    Returns:
+    dict: The index.
+    """
+    spec = layout(size, tile)
+    if size < OVERVIEW_SIZE:
+        raise ValueError(f"size must be at least the {OVERVIEW_SIZE} px overview")
+    shutil.rmtree(os.path.join(output_dir, "wafer_files"), ignore_errors=True)
+
+    # Build the subtrees under the first level with a few tiles per worker
+    # in parallel, then the levels above them from their roots
+    workers = workers or os.cpu_count() or 1
+    split = spec.max_level
+    while split > 0 and (level_size(spec, split - 1) // tile) ** 2 >= 4 * workers:
+        split -= 1
+    grid = max(1, level_size(spec, split) // tile)
+    roots = [(col, row) for row in range(grid) for col in range(grid)]
+    jobs = [(spec, split, roots[i::workers]) for i in range(workers)]
+    built = {}
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            for result in pool.map(_build_subtrees, jobs):
+                built.update(result)
+    else:
+        built = _build_subtrees(jobs[0])
+    build_tile(spec, 0, 0, 0, built)
+
+    if size == DEFAULT_SIZE:
+        write_overview(spec)
+    return write_index(spec)
+
+
+def write_overview(spec):
+    """Paste the tiles of the OVERVIEW_SIZE level into textures/wafer.png."""
+    level = spec.max_level - int(np.log2(spec.size // OVERVIEW_SIZE))
+    grid = max(1, OVERVIEW_SIZE // spec.tile)
+    overview = Image.new("RGBA", (OVERVIEW_SIZE, OVERVIEW_SIZE))
+    for row in range(grid):
+        for col in range(grid):
+            if tile_exists(spec, level, col, row):
+                with Image.open(tile_path(level, col, row)) as tile:
+                    overview.paste(tile, (col * spec.tile, row * spec.tile))
+    buffer = io.BytesIO()
+    overview.save(buffer, "PNG")
+    write_if_changed(overview_path, buffer.getvalue())
+
+
+def write_index(spec):
+    levels = []
+    for level in range(spec.max_level + 1):
+        grid = max(1, level_size(spec, level) // spec.tile)
+        spans = []
+        for row in range(grid):
+            cols = [col for col in range(grid) if tile_exists(spec, level, col, row)]
+            spans.append([cols[0], cols[-1] + 1] if cols else [0, 0])
+        levels.append({
+            "level": level,
+            "size": level_size(spec, level),
+            "tiles": [grid, grid],
+            "mm_per_pixel": 2 * spec.radius / level_size(spec, level),
+            "rows": spans,
+        })
+    index = {
+        "format": "png",
+        "size": spec.size,
+        "tile_size": spec.tile,
+        "overlap": 0,
+        "wafer": dict(spec.wafer, die_origin=spec.origin.tolist(), die_pitch=spec.pitch.tolist()),
+        "levels": levels,
+    }
+    write_atomic(os.path.join(output_dir, "index.json"),
+                 (json.dumps(index, indent=1) + "\n").encode("utf-8"))
+    dzi = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+           f'Format="png" Overlap="0" TileSize="{spec.tile}">\n'
+           f'  <Size Width="{spec.size}" Height="{spec.size}"/>\n'
+           '</Image>\n')
+    write_atomic(os.path.join(output_dir, "wafer.dzi"), dzi.encode("utf-8"))
+    return index
+
+
+def up_to_date(size):
+    path = os.path.join(output_dir, "index.json")
+    if not (os.path.exists(path) and os.path.exists(overview_path)
+            and os.path.getmtime(path) >= os.path.getmtime(__file__)):
+        return False
+    # A preview at another size doesn't count
+    with open(path) as f:
+        return json.load(f)["size"] == size
+
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE,
+                        help="full size in pixels, a power of two")
+    parser.add_argument("--tile", type=int, default=256, help="tile size in pixels")
+    parser.add_argument("--workers", type=int, help="processes to use, default every core")
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    if not args.force and up_to_date(args.size):
+        print("Wafer pyramid is up to date")
+    else:
+        start = time.perf_counter()
+        index = build(args.size, args.tile, args.workers)
+        tiles = sum(end - begin for level in index["levels"] for begin, end in level["rows"])
+        print(f"Wrote {tiles} tiles in {len(index['levels'])} levels "
+              f"in {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,189 @@
+"""
+Development build daemon.
+
+Keeps trimesh, shapely and manifold3d imported, watches the model scripts
+and textures in this folder, and rebuilds only the models affected by a
+change. Each build runs in a forked child so it starts with every heavy
+module already loaded, and the GLB is swapped into place atomically by
+util.export_scene. The viewer already polls the selected model's
+Last-Modified header, so it reloads just that model once the swap lands.
+
+Usage:
+    python3 watch.py [model.py ...]
+
+Any models named on the command line are built once at startup.
+"""
+import ast
+import importlib
+import os
+import runpy
+import sys
+import time
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, here)
+
+# Warm up everything the model scripts import so builds don't pay for it
+import numpy as np
+import trimesh
+import trimesh.boolean
+import trimesh.creation
+import trimesh.exchange.gltf
+import shapely.geometry
+import shapely.ops
+import manifold3d
+from PIL import Image
+
+import util
+
+texture_dir = os.path.join(here, "textures")
+poll_interval = 0.2
+
+
+def snapshot():
+    """Return {path: mtime} for every watched file."""
+    paths = [
+        os.path.join(here, name)
+        for name in os.listdir(here)
+        if name.endswith(".py") and name != "watch.py"
+        or name.lower().endswith(".glb") and name not in util.MODELS.values()
+    ]
+    if os.path.isdir(texture_dir):
+        paths += [os.path.join(texture_dir, name) for name in os.listdir(texture_dir)]
+
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            pass
+    return mtimes
+
+
+def local_imports(script):
+    """
+    Return the .py files in this folder that a script imports, directly or
+    through other local modules, including imports inside functions.
+    """
+    found, pending = set(), [script]
+    while pending:
+        with open(os.path.join(here, pending.pop())) as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                filename = name.split(".")[0] + ".py"
+                if filename not in found and os.path.exists(os.path.join(here, filename)):
+                    found.add(filename)
+                    pending.append(filename)
+    return found
+
+
+def affected_models(changed):
+    """
+    Work out which model scripts need rebuilding for a set of changed files.
+
+    A changed model script or a helper module it imports rebuilds that
+    model; scripts no model imports (fabsim.py, variants.py) rebuild
+    nothing. A changed texture or imported asset rebuilds the models whose
+    source mentions it by name.
+    """
+    sources, imports = {}, {}
+    for script in util.MODELS:
+        with open(os.path.join(here, script)) as f:
+            sources[script] = f.read()
+        imports[script] = local_imports(script)
+
+    models = set()
+    for path in changed:
+        name = os.path.basename(path)
+        if name in util.MODELS:
+            models.add(name)
+        elif name.endswith(".py"):
+            models.update(script for script in util.MODELS if name in imports[script])
+        else:
+            models.update(script for script, src in sources.items() if name in src)
+    return sorted(models)
+
+
+def reload_helpers():
+    """
+    Forget every module imported from this folder and import util again.
+
+    Forked builds then import the edited helpers fresh, while numpy,
+    trimesh and the other heavy dependencies stay loaded.
+    """
+    global util
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None) or ""
+        if os.path.dirname(os.path.abspath(path)) == here and name != "__main__":
+            del sys.modules[name]
+    util = importlib.import_module("util")
+
+
+def build(script):
+    """Run one model script with the warm interpreter state, return True on success."""
+    start = time.perf_counter()
+    path = os.path.join(here, script)
+
+    if hasattr(os, "fork"):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                runpy.run_path(path, run_name="__main__")
+            except BaseException as e:
+                print(f"{script} failed: {e!r}")
+                code = 1
+            sys.stdout.flush()
+            os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        ok = os.waitstatus_to_exitcode(status) == 0
+    else:
+        try:
+            runpy.run_path(path, run_name="__main__")
+            ok = True
+        except Exception as e:
+            print(f"{script} failed: {e!r}")
+            ok = False
+
+    if ok:
+        print(f"Rebuilt {util.MODELS[script]} in {time.perf_counter() - start:.2f}s")
+    return ok
+
+
+def main(argv):
+    os.chdir(here)
+    for script in argv:
+        build(os.path.basename(script))
+
+    print(f"Watching {here} for changes (Ctrl+C to stop)")
+    mtimes = snapshot()
+    while True:
+        time.sleep(poll_interval)
+        current = snapshot()
+        changed = [path for path, mtime in current.items() if mtimes.get(path) != mtime]
+        # Taken before building, so edits saved during a build are seen next
+        mtimes = current
+        if not changed:
+            continue
+
+        # Pick up edits to any helper module before rebuilding anything
+        if any(path.endswith(".py") and os.path.basename(path) not in util.MODELS
+               for path in changed):
+            reload_helpers()
+
+        for script in affected_models(changed):
+            build(script)
+
+
+if __name__ == "__main__":
+    try:
+        main(sys.argv[1:])
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1 @@
+docker run -it -v $(pwd)/..:/repo -w /repo/assets --rm lasercutter:latest python3 watch.py
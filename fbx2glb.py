@@ -1,18 +1,41 @@
-import bpy
-import os
+"""
+Batch FBX -> GLB conversion inside Blender.
+
+Usage:
+    blender --background --python fbx2glb.py -- SOURCE [options]
 
-# === CONFIG ===
-fbx_path = "/home/julian/Downloads/CrateFBX/FBX/Create.FBX"
-texture_dir = "/home/julian/Downloads/CrateFBX/Textures/1024"
-output_path = "/home/julian/Downloads/CrateFBX/Create.glb"
+SOURCE is either a directory (searched recursively for .fbx files) or a
+JSON manifest listing conversions:
 
-# === CLEAN START ===
-bpy.ops.wm.read_factory_settings(use_empty=True)
+    [
+      {"fbx": "CrateFBX/FBX/Create.FBX",
+       "textures": "CrateFBX/Textures/1024",
+       "output": "assets/Crate.glb"}
+    ]
 
-# === IMPORT FBX ===
-bpy.ops.import_scene.fbx(filepath=fbx_path)
+Relative manifest paths are resolved against the manifest's folder.
+"textures" and "output" are optional and fall back to --textures and
+--out (or the FBX's own folder).
+
+Options:
+    --textures DIR  texture folder for entries that don't name one
+    --out DIR       output folder for entries that don't name one
+    --jobs N        split the batch across N headless Blender sessions
+    --force         convert even if the output is newer than its inputs
+
+All files in one session share a single Blender instance, and each
+texture image is loaded once and reused across materials and files.
+Outputs that are already newer than their FBX and textures are skipped.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import bpy
 
-# === TEXTURE ASSIGNMENT ===
 # Simple filename-to-channel mapping
 texture_map = {
     "diffuse": "Base Color",
@@ -20,28 +43,146 @@ texture_map = {
     "spec": "Specular",
 }
 
-# Find texture files
-for mat in bpy.data.materials:
-    mat.use_nodes = True
-    bsdf = mat.node_tree.nodes.get("Principled BSDF")
-    if not bsdf:
-        continue
-
-    for tex_type, input_name in texture_map.items():
-        for file in os.listdir(texture_dir):
-            if tex_type.lower() in file.lower():
-                img_path = os.path.join(texture_dir, file)
-                image = bpy.data.images.load(img_path)
-                tex_node = mat.node_tree.nodes.new("ShaderNodeTexImage")
-                tex_node.image = image
-                mat.node_tree.links.new(bsdf.inputs[input_name], tex_node.outputs["Color"])
-
-                # Normal map handling
-                if tex_type == "normal":
-                    norm_node = mat.node_tree.nodes.new("ShaderNodeNormalMap")
-                    mat.node_tree.links.new(norm_node.inputs["Color"], tex_node.outputs["Color"])
-                    mat.node_tree.links.new(bsdf.inputs["Normal"], norm_node.outputs["Normal"])
-
-# === EXPORT GLB ===
-bpy.ops.export_scene.gltf(filepath=output_path, export_format='GLB')
-    
\ No newline at end of file
+# Cached os.listdir results, keyed by texture folder
+texture_listings = {}
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="fbx2glb.py")
+    parser.add_argument("source")
+    parser.add_argument("--textures")
+    parser.add_argument("--out")
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--force", action="store_true")
+    return parser.parse_args(argv)
+
+
+def load_jobs(args):
+    """Build the list of {"fbx", "textures", "output"} jobs from a folder or manifest."""
+    source = os.path.abspath(args.source)
+    if os.path.isdir(source):
+        entries = []
+        for root, dirs, files in os.walk(source):
+            for file in sorted(files):
+                if file.lower().endswith(".fbx"):
+                    entries.append({"fbx": os.path.join(root, file)})
+        base = source
+    else:
+        with open(source) as f:
+            entries = json.load(f)
+        base = os.path.dirname(source)
+
+    jobs = []
+    for entry in entries:
+        fbx = os.path.join(base, entry["fbx"])
+        textures = entry.get("textures") or args.textures or os.path.dirname(fbx)
+        name = os.path.splitext(os.path.basename(fbx))[0] + ".glb"
+        output = entry.get("output") or os.path.join(args.out or os.path.dirname(fbx), name)
+        jobs.append({
+            "fbx": fbx,
+            "textures": os.path.join(base, textures),
+            "output": os.path.join(base, output),
+        })
+    return jobs
+
+
+def texture_files(texture_dir):
+    """Return {tex_type: path} for a texture folder, listing it only once."""
+    if texture_dir not in texture_listings:
+        found = {}
+        if os.path.isdir(texture_dir):
+            for file in sorted(os.listdir(texture_dir)):
+                for tex_type in texture_map:
+                    if tex_type in file.lower() and tex_type not in found:
+                        found[tex_type] = os.path.join(texture_dir, file)
+        texture_listings[texture_dir] = found
+    return texture_listings[texture_dir]
+
+
+def up_to_date(job):
+    if not os.path.exists(job["output"]):
+        return False
+    inputs = [job["fbx"], *texture_files(job["textures"]).values()]
+    return os.path.getmtime(job["output"]) >= max(os.path.getmtime(p) for p in inputs)
+
+
+def clear_scene():
+    """Remove everything from the previous file but keep loaded images for reuse."""
+    for collection in (bpy.data.objects, bpy.data.meshes, bpy.data.materials,
+                       bpy.data.armatures, bpy.data.actions, bpy.data.cameras,
+                       bpy.data.lights, bpy.data.node_groups):
+        for block in list(collection):
+            collection.remove(block)
+
+
+def assign_textures(texture_dir):
+    files = texture_files(texture_dir)
+    for mat in bpy.data.materials:
+        mat.use_nodes = True
+        bsdf = mat.node_tree.nodes.get("Principled BSDF")
+        if not bsdf:
+            continue
+
+        for tex_type, img_path in files.items():
+            # check_existing returns the already loaded image instead of reading it again
+            image = bpy.data.images.load(img_path, check_existing=True)
+            tex_node = mat.node_tree.nodes.new("ShaderNodeTexImage")
+            tex_node.image = image
+
+            # Normal map handling
+            if tex_type == "normal":
+                image.colorspace_settings.name = "Non-Color"
+                norm_node = mat.node_tree.nodes.new("ShaderNodeNormalMap")
+                mat.node_tree.links.new(norm_node.inputs["Color"], tex_node.outputs["Color"])
+                mat.node_tree.links.new(bsdf.inputs["Normal"], norm_node.outputs["Normal"])
+            else:
+                mat.node_tree.links.new(bsdf.inputs[texture_map[tex_type]], tex_node.outputs["Color"])
+
+
+def convert(job):
+    clear_scene()
+    bpy.ops.import_scene.fbx(filepath=job["fbx"])
+    assign_textures(job["textures"])
+    os.makedirs(os.path.dirname(job["output"]), exist_ok=True)
+    bpy.ops.export_scene.gltf(filepath=job["output"], export_format='GLB')
+
+
+def run_pool(jobs, n_jobs):
+    """Split jobs across headless Blender sessions and wait for all of them."""
+    chunks = [jobs[i::n_jobs] for i in range(n_jobs) if jobs[i::n_jobs]]
+    procs = []
+    for chunk in chunks:
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+            json.dump(chunk, f)
+        procs.append((f.name, subprocess.Popen([
+            bpy.app.binary_path, "--background", "--factory-startup",
+            "--python", os.path.abspath(__file__), "--", f.name, "--force",
+        ])))
+
+    failed = 0
+    for manifest, proc in procs:
+        failed += proc.wait() != 0
+        os.remove(manifest)
+    return failed
+
+
+def main():
+    args = parse_args()
+    jobs = load_jobs(args)
+    if not args.force:
+        pending = [job for job in jobs if not up_to_date(job)]
+        print(f"{len(jobs) - len(pending)} of {len(jobs)} outputs up to date")
+        jobs = pending
+
+    if args.jobs > 1 and len(jobs) > 1:
+        sys.exit(1 if run_pool(jobs, args.jobs) else 0)
+
+    # === CLEAN START ===
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    for job in jobs:
+        print(f"Converting {job['fbx']} -> {job['output']}")
+        convert(job)
+
+
+main()
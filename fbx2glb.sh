@@ -1 +1 @@
-blender --background --python fbx2glb.py
\ No newline at end of file
+blender --background --python fbx2glb.py -- "$@"
\ No newline at end of file
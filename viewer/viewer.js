@@ -119,7 +119,8 @@ document.addEventListener('DOMContentLoaded', async function () {
         });
         camera.wheelPrecision = 0.2; // Increased zoom rate
 
-        envTex = new BABYLON.CubeTexture("/assets/skybox/skybox", scene);
+        // Prefiltered by assets/environment.py, so PBR materials get IBL without runtime convolution
+        envTex = BABYLON.CubeTexture.CreateFromPrefilteredData("/assets/skybox/environment.env", scene);
         scene.environmentTexture = envTex; // Applies to all PBR materials
 
         // Lighting
@@ -208,13 +209,23 @@ document.addEventListener('DOMContentLoaded', async function () {
                     const pathParts = url.pathname.split('/');
                     const path = pathParts.slice(0, -1).join('/') + '/';
 
-                    const meshes = await BABYLON.SceneLoader.ImportMeshAsync(
+                    const loaded = await BABYLON.SceneLoader.ImportMeshAsync(
                         null,
                         path,
                         fileName,
                         scene
                     ).then(result => result.meshes);
 
+                    // Collision proxies (util.add_collider) are physics data
+                    // for the XR client, not something to draw
+                    const meshes = loaded.filter((mesh, i) => {
+                        if (i > 0 && mesh.metadata?.gltf?.extras?.collider) {
+                            mesh.dispose();
+                            return false;
+                        }
+                        return true;
+                    });
+
                     currentModel = meshes[0];
                     currentModel.name = `model_${index}`;
                     currentModel.position = BABYLON.Vector3.Zero();
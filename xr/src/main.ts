@@ -13,6 +13,70 @@ const engine = new BABYLON.Engine(canvas, true);
 let havokInstance: HavokPhysicsWithBindings;
 let scene: BABYLON.Scene;
 
+type ColliderExtras = {
+  shape: "box" | "sphere" | "cylinder" | "capsule" | "convex_hull";
+  for: string;
+  extents?: number[];
+  radius?: number;
+  pointA?: number[];
+  pointB?: number[];
+};
+
+// Create the Havok shape described by a collider node's glTF extras. The
+// parameters are in the node's own frame, so the body follows the node.
+function colliderShape(
+  node: BABYLON.TransformNode,
+  collider: ColliderExtras,
+  scene: BABYLON.Scene
+): BABYLON.PhysicsShape {
+  const center = BABYLON.Vector3.Zero();
+  switch (collider.shape) {
+    case "box":
+      return new BABYLON.PhysicsShapeBox(
+        center,
+        BABYLON.Quaternion.Identity(),
+        BABYLON.Vector3.FromArray(collider.extents!),
+        scene
+      );
+    case "sphere":
+      return new BABYLON.PhysicsShapeSphere(center, collider.radius!, scene);
+    case "capsule":
+      return new BABYLON.PhysicsShapeCapsule(
+        BABYLON.Vector3.FromArray(collider.pointA!),
+        BABYLON.Vector3.FromArray(collider.pointB!),
+        collider.radius!,
+        scene
+      );
+    case "cylinder":
+      return new BABYLON.PhysicsShapeCylinder(
+        BABYLON.Vector3.FromArray(collider.pointA!),
+        BABYLON.Vector3.FromArray(collider.pointB!),
+        collider.radius!,
+        scene
+      );
+    default:
+      return new BABYLON.PhysicsShapeConvexHull(node as BABYLON.Mesh, scene);
+  }
+}
+
+// Give every collider node a static body and hide the hull meshes
+function bindColliders(nodes: BABYLON.TransformNode[], scene: BABYLON.Scene) {
+  for (const node of nodes) {
+    const collider: ColliderExtras = node.metadata.gltf.extras.collider;
+    if (node instanceof BABYLON.AbstractMesh) {
+      node.isVisible = false;
+      node.isPickable = false;
+    }
+    const body = new BABYLON.PhysicsBody(
+      node,
+      BABYLON.PhysicsMotionType.STATIC,
+      false,
+      scene
+    );
+    body.shape = colliderShape(node, collider, scene);
+  }
+}
+
 async function createScene() {
   // Load Havok WASM
   const wasmBinary = await fetch(
@@ -60,10 +124,10 @@ async function createScene() {
     scene
   );
 
-  // Environment - Add fallback if environment texture fails
+  // Environment prefiltered from the skybox by assets/environment.py - Add fallback if it fails
   try {
     scene.environmentTexture = BABYLON.CubeTexture.CreateFromPrefilteredData(
-      "https://assets.babylonjs.com/environments/environmentSpecular.dds",
+      "/assets/environment.env",
       scene
     );
   } catch (error) {
@@ -123,10 +187,20 @@ async function createScene() {
           path,
           scene
         );
+        // Collision proxies baked by the Python build (util.add_collider)
+        const colliders = [...result.meshes, ...result.transformNodes].filter(
+          (node) => node.metadata?.gltf?.extras?.collider
+        );
+        if (colliders.length > 0) {
+          bindColliders(colliders, scene);
+        }
+
         result.meshes.forEach((mesh, i) => {
+          if (colliders.includes(mesh)) return;
           if (mesh instanceof BABYLON.Mesh && mesh.getTotalVertices() > 0) {
             allMeshes.push(mesh);
-            if (i === 0) {
+            // Models without baked proxies fall back to a single box
+            if (i === 0 && colliders.length === 0) {
               mesh.position.y = 500;
               // Use simpler BOX shape for physics if mesh is complex
               const shapeType =